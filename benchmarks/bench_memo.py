@@ -0,0 +1,251 @@
+"""
+MemoManagerの主要な処理のベンチマーク
+
+合成したメモ帳（日本語とASCIIが混在した本文、偏りのあるタグ分布）に対して各処理の
+実行時間とピークメモリを計測し、結果をJSONファイルに書き出す。以前の結果を指定すると
+処理ごとの比を表示し、閾値を超えて遅くなった処理があれば終了コード1で終了する。
+検索・絞り込みは結果のキャッシュを実行ごとに破棄して計測し、キャッシュから返す場合は
+search_memos_cachedとして別に計測する。
+
+使い方:
+    python benchmarks/bench_memo.py --sizes 1000 10000 --output bench.json
+    python benchmarks/bench_memo.py --output new.json --compare bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic import Memo, MemoManager  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# 本文の生成に使う語彙
+_JAPANESE_WORDS = ["会議", "予算", "資料", "確認", "対応", "来週", "打ち合わせ", "議事録", "課題",
+                   "進捗", "報告", "見積もり", "契約", "担当者", "スケジュール", "レビュー"]
+_ASCII_WORDS = ["budget", "meeting", "release", "review", "TODO", "deadline", "API", "bug",
+                "deploy", "design", "memo", "draft"]
+_TAGS = ["仕事", "個人", "重要", "アイデア", "買い物", "読書", "旅行", "開発", "会議", "done"] + \
+        [f"project-{i}" for i in range(40)]
+
+# 検索に使うクエリ（よく出る語、ASCII、ほとんど出ない語）
+_SEARCH_QUERIES = ["予算", "review", "見積もり", "deadline", "存在しない語"]
+
+
+def generate_memos(size: int, seed: int = 0) -> list[Memo]:
+    """
+    合成したメモのリストを生成する
+
+    Args:
+        size (int): メモの件数
+        seed (int): 乱数のシード
+
+    Returns:
+        list[Memo]: 生成したメモのリスト
+    """
+    rng = random.Random(seed)
+    # タグはZipf分布に近い偏りで付ける
+    tag_weights = [1 / rank for rank in range(1, len(_TAGS) + 1)]
+    start = date(2020, 1, 1)
+    memos = []
+    for i in range(size):
+        words = [rng.choice(_JAPANESE_WORDS if rng.random() < 0.7 else _ASCII_WORDS)
+                 for _ in range(rng.randint(5, 120))]
+        content = "".join(word + ("。\n" if rng.random() < 0.1 else "、") for word in words)
+        memo_date = (start + timedelta(days=rng.randrange(365 * 5))).strftime('%Y/%m/%d')
+        tags = set(rng.choices(_TAGS, tag_weights, k=rng.randint(0, 4)))
+        memos.append(Memo(f"{rng.choice(_JAPANESE_WORDS)} {i}", memo_date, content, tags))
+    return memos
+
+
+def build_manager(size: int, seed: int = 0) -> MemoManager:
+    """
+    合成したメモを読み込んだMemoManagerを作成する
+
+    Args:
+        size (int): メモの件数
+        seed (int): 乱数のシード
+
+    Returns:
+        MemoManager: メモを追加済みのMemoManager
+    """
+    manager = MemoManager()
+    manager.merge_memos(generate_memos(size, seed))
+    return manager
+
+
+def _measure(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> dict:
+    """
+    処理の実行時間（最小値）とピークメモリを計測する
+
+    実行時間はtracemallocを無効にした状態で計測し、ピークメモリは別に1回実行して計測する。
+
+    Args:
+        func (Callable[[], object]): 計測する処理
+        repeat (int): 実行時間を計測する回数
+        setup (Optional[Callable[[], None]]): 各実行の前に呼ぶ準備処理（計測対象外）
+
+    Returns:
+        dict: secondsとpeak_bytesを含む辞書
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run_benchmarks(sizes, repeat: int = 3, seed: int = 0, work_dir: Optional[str] = None) -> list[dict]:
+    """
+    すべてのサイズと処理のベンチマークを実行する
+
+    Args:
+        sizes (Iterable[int]): メモ帳のメモの件数
+        repeat (int): 各処理の実行時間を計測する回数
+        seed (int): 乱数のシード
+        work_dir (Optional[str]): 一時ファイルを作成するディレクトリ
+
+    Returns:
+        list[dict]: size、operation、seconds、peak_bytesを含む結果のリスト
+    """
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+        xml_path = os.path.join(temp_dir, "memos.xml")
+        export_path = os.path.join(temp_dir, "memos.txt")
+
+        for size in sizes:
+            manager = build_manager(size, seed)
+            start_date, end_date = manager.get_date_range()
+            mid_date = manager.filter_by_date(start_date, end_date)
+            mid_date = manager.memos[mid_date[len(mid_date) // 2]].date if mid_date else start_date
+
+            state = {}
+
+            def reset_empty():
+                state["empty"] = MemoManager()
+
+            def add_memos():
+                empty = state["empty"]
+                for _ in range(size):
+                    empty.add_memo()
+
+            def search():
+                for query in _SEARCH_QUERIES:
+                    manager.search_memos(query)
+
+            def filter_dates():
+                manager.filter_by_date(start_date, mid_date)
+                manager.filter_by_date(mid_date, end_date)
+
+            def clear_cache():
+                # 結果のキャッシュから返さず、検索・絞り込みの処理そのものを計測する
+                manager._result_cache.clear()
+
+            operations = [
+                ("add_memo", add_memos, reset_empty),
+                ("save_to_file", lambda: manager.save_to_file(xml_path), None),
+                ("load_from_file", lambda: MemoManager().load_from_file(xml_path), None),
+                ("search_memos", search, clear_cache),
+                ("search_memos_cached", search, None),
+                ("filter_by_date", filter_dates, clear_cache),
+                ("get_all_tags", manager.get_all_tags, clear_cache),
+                ("export_memos", lambda: manager.export_memos(export_path), None),
+            ]
+            for name, func, setup in operations:
+                measurement = _measure(func, repeat, setup)
+                results.append({"size": size, "operation": name, **measurement})
+                print(f"{size:>8} {name:<20} {measurement['seconds'] * 1000:>10.2f} ms "
+                      f"{measurement['peak_bytes'] / 1024 / 1024:>9.2f} MiB", flush=True)
+            state.clear()
+    return results
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    以前の結果と比較し、閾値を超えて遅くなった処理を返す
+
+    Args:
+        baseline (dict): 以前の結果
+        current (dict): 今回の結果
+        threshold (float): 遅くなったとみなす実行時間の比（例: 1.2なら20%増）
+
+    Returns:
+        list[str]: 遅くなった処理の説明のリスト
+    """
+    previous = {(r["size"], r["operation"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'size':>8} {'operation':<20} {'time ratio':>10} {'memory ratio':>12}")
+    for result in current["results"]:
+        old = previous.get((result["size"], result["operation"]))
+        if old is None:
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] else float('inf')
+        memory_ratio = result["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else float('inf')
+        marker = " *" if time_ratio > threshold else ""
+        print(f"{result['size']:>8} {result['operation']:<20} {time_ratio:>10.2f} {memory_ratio:>12.2f}{marker}")
+        if time_ratio > threshold:
+            regressions.append(f"{result['operation']} ({result['size']}件): {time_ratio:.2f}倍")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MemoManagerのベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="メモ帳のメモの件数（既定: 1000 10000 100000）")
+    parser.add_argument("--repeat", type=int, default=3, help="実行時間を計測する回数")
+    parser.add_argument("--seed", type=int, default=0, help="合成データの乱数シード")
+    parser.add_argument("--output", default="bench_results.json", help="結果を書き出すJSONファイル")
+    parser.add_argument("--compare", help="比較する以前の結果のJSONファイル")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="遅くなったとみなす実行時間の比（既定: 1.2）")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": run_benchmarks(args.sizes, args.repeat, args.seed),
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare_results(baseline, report, args.threshold)
+        if regressions:
+            print("\n遅くなった処理:\n  " + "\n  ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+メモ帳をウィンドウなしで操作するコマンドラインツール
+
+tkinterを読み込まないため、ディスプレイのないサーバーでのバッチ処理にも使える。
+XMLファイルは読み取り専用（メモリマップ）で開き、拡張子が.db・.sqlite・.sqlite3の
+ファイルはSQLiteデータベースとして開く。
+
+使い方:
+    python cli.py search memos.xml "title:会議 AND 予算" --limit 20
+    python cli.py search memos.xml "予算 見積もり" --ranked
+    python cli.py filter memos.xml --tag 仕事 --tag 重要 --from 2024/01/01 --to 2024/03/31
+    python cli.py filter memos.xml --tag 仕事 --tag 重要 --all-tags --query "予算"
+    python cli.py export memos.xml out.jsonl.gz --tag 仕事
+    python cli.py stats memos.db --json
+    python cli.py merge merged.xml notebooks/ --jobs 4
+"""
+import argparse
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from typing import Optional
+
+from logic import MemoManager
+
+# SQLiteデータベースとして開くファイルの拡張子
+_DATABASE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+def open_notebook(file_path: str) -> MemoManager:
+    """
+    メモ帳のファイルを開く
+
+    Args:
+        file_path (str): XMLファイルまたはSQLiteデータベースのパス
+
+    Returns:
+        MemoManager: メモを読み込んだMemoManager
+
+    Raises:
+        FileNotFoundError: ファイルが存在しない場合
+    """
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
+    manager = MemoManager()
+    if file_path.lower().endswith(_DATABASE_SUFFIXES):
+        manager.open_database(file_path)
+    else:
+        manager.load_from_file(file_path, read_only=True)
+    return manager
+
+def _close_notebook(manager: MemoManager) -> None:
+    """開いているデータベースやマップしたファイルを閉じる（内部関数）"""
+    if manager.store is not None:
+        manager.store.close()
+        manager.store = None
+
+def _filtered_ids(manager: MemoManager, args: argparse.Namespace) -> Optional[list[str]]:
+    """
+    --tag・--all-tags・--from・--to・--queryの条件に一致するメモIDをメモの順に返す（内部関数）
+
+    Args:
+        manager (MemoManager): 対象のMemoManager
+        args (argparse.Namespace): コマンドライン引数
+
+    Returns:
+        Optional[list[str]]: 一致するメモIDのリスト。条件が指定されていない場合はNone
+    """
+    if not args.tags and not args.start_date and not args.end_date and not args.query:
+        return None
+    return manager.filter_memos(args.tags, args.all_tags, args.start_date, args.end_date,
+                                args.query, args.case_sensitive)
+
+def _memo_line(manager: MemoManager, memo_id: str) -> str:
+    """
+    メモの一覧に表示する1行を作成する（内部関数）
+
+    Args:
+        manager (MemoManager): 対象のMemoManager
+        memo_id (str): メモのID
+
+    Returns:
+        str: ID・日付・タイトル・タグをタブで区切った行
+    """
+    memo = manager.memos[memo_id]
+    return f"{memo_id}\t{memo.date}\t{memo.title}\t{','.join(sorted(memo.tags))}"
+
+def command_search(args: argparse.Namespace) -> int:
+    """一致するメモを一覧表示する（--rankedの場合は関連度順）"""
+    manager = open_notebook(args.file)
+    try:
+        if args.ranked:
+            for memo_id, score in manager.rank_memos(args.query, args.limit or 10, args.case_sensitive):
+                print(f"{_memo_line(manager, memo_id)}\t{score:.3f}")
+            return 0
+
+        printed = set()
+        for memo_id, _, _, _ in manager.iter_query_memos(args.query, args.case_sensitive):
+            if memo_id in printed:
+                continue
+            printed.add(memo_id)
+            print(_memo_line(manager, memo_id))
+            if args.limit and len(printed) >= args.limit:
+                break
+        return 0
+    finally:
+        _close_notebook(manager)
+
+def command_filter(args: argparse.Namespace) -> int:
+    """タグ・日付の条件に一致するメモを一覧表示する"""
+    manager = open_notebook(args.file)
+    try:
+        memo_ids = _filtered_ids(manager, args)
+        for memo_id in manager.memos if memo_ids is None else memo_ids:
+            print(_memo_line(manager, memo_id))
+        return 0
+    finally:
+        _close_notebook(manager)
+
+def command_export(args: argparse.Namespace) -> int:
+    """メモをファイルにエクスポートする（タグ・日付で絞り込める）"""
+    manager = open_notebook(args.file)
+    try:
+        memo_ids = _filtered_ids(manager, args)
+        if memo_ids == []:
+            print("条件に一致するメモがありません", file=sys.stderr)
+            return 1
+        manager.export_memos(args.output, memo_ids, export_format=args.format,
+                             compress=True if args.gzip else None)
+        return 0
+    finally:
+        _close_notebook(manager)
+
+def command_stats(args: argparse.Namespace) -> int:
+    """メモ数・日付の範囲・タグごとのメモ数を表示する"""
+    manager = open_notebook(args.file)
+    try:
+        first_date, last_date = manager.get_date_range()
+        tag_counts = {tag: len(manager.filter_by_tags([tag])) for tag in manager.get_all_tags()}
+        tags = sorted(tag_counts.items(), key=lambda item: (-item[1], item[0]))
+        if args.json:
+            print(json.dumps({"memos": len(manager.memos), "first_date": first_date, "last_date": last_date,
+                              "tags": dict(tags)}, ensure_ascii=False, indent=2))
+            return 0
+        print(f"メモ数: {len(manager.memos)}")
+        print(f"期間: {first_date} - {last_date}" if first_date else "期間: -")
+        print(f"タグ: {len(tags)}種類")
+        for tag, count in tags:
+            print(f"  {tag}\t{count}")
+        return 0
+    finally:
+        _close_notebook(manager)
+
+def command_merge(args: argparse.Namespace) -> int:
+    """複数のXMLファイル（またはディレクトリ内のXMLファイル）を1つのファイルにまとめる"""
+    manager = MemoManager()
+    sources = args.inputs[0] if len(args.inputs) == 1 else args.inputs
+    new_ids = manager.merge_from_files(sources, max_workers=args.jobs)
+    manager.save_to_file(args.output)
+    print(f"{len(new_ids)}件のメモを{args.output}に保存しました", file=sys.stderr)
+    return 0
+
+def _add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """--tag・--all-tags・--from・--to・--queryの引数を追加する（内部関数）"""
+    parser.add_argument("--tag", dest="tags", action="append", default=[],
+                        help="いずれかのタグを持つメモに絞り込む（複数指定可）")
+    parser.add_argument("--all-tags", action="store_true", help="--tagのすべてのタグを持つメモに絞り込む")
+    parser.add_argument("--from", dest="start_date", help="開始日（YYYY/MM/DD）")
+    parser.add_argument("--to", dest="end_date", help="終了日（YYYY/MM/DD）")
+    parser.add_argument("--query", help="検索クエリに一致するメモに絞り込む")
+    parser.add_argument("--case-sensitive", action="store_true", help="検索クエリで大文字と小文字を区別する")
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    コマンドライン引数のパーサーを作成する
+
+    Returns:
+        argparse.ArgumentParser: サブコマンドを登録したパーサー
+    """
+    from exporters import EXPORT_FORMATS
+
+    parser = argparse.ArgumentParser(description="メモ帳をウィンドウなしで操作する")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search = subparsers.add_parser("search", help="クエリに一致するメモを表示する")
+    search.add_argument("file", help="メモ帳のファイル")
+    search.add_argument("query", help="検索クエリ（例: 'title:会議 AND 予算 NOT tag:done'）")
+    search.add_argument("--case-sensitive", action="store_true", help="大文字と小文字を区別する")
+    search.add_argument("--limit", type=int, help="表示するメモの最大数")
+    search.add_argument("--ranked", action="store_true",
+                        help="空白区切りの語との関連度が高い順に表示する（既定の件数は10）")
+    search.set_defaults(handler=command_search)
+
+    filter_parser = subparsers.add_parser("filter", help="タグ・日付で絞り込んだメモを表示する")
+    filter_parser.add_argument("file", help="メモ帳のファイル")
+    _add_filter_arguments(filter_parser)
+    filter_parser.set_defaults(handler=command_filter)
+
+    export = subparsers.add_parser("export", help="メモをファイルにエクスポートする")
+    export.add_argument("file", help="メモ帳のファイル")
+    export.add_argument("output", help="エクスポート先のファイル")
+    export.add_argument("--format", choices=list(EXPORT_FORMATS),
+                        help="エクスポート形式（既定は出力ファイルの拡張子から判定）")
+    export.add_argument("--gzip", action="store_true", help="gzipで圧縮する")
+    _add_filter_arguments(export)
+    export.set_defaults(handler=command_export)
+
+    stats = subparsers.add_parser("stats", help="メモ数・期間・タグの統計を表示する")
+    stats.add_argument("file", help="メモ帳のファイル")
+    stats.add_argument("--json", action="store_true", help="JSONで出力する")
+    stats.set_defaults(handler=command_stats)
+
+    merge = subparsers.add_parser("merge", help="複数のXMLファイルを1つにまとめる")
+    merge.add_argument("output", help="保存先のXMLファイル")
+    merge.add_argument("inputs", nargs="+", help="読み込むXMLファイル、またはXMLファイルのあるディレクトリ")
+    merge.add_argument("--jobs", type=int, help="解析に使うプロセス数（既定はCPU数）")
+    merge.set_defaults(handler=command_merge)
+    return parser
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError, ET.ParseError) as e:
+        # QuerySyntaxErrorもValueErrorとして扱う
+        print(f"エラー: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,563 @@
+"""
+ダイアログとウィジェットの作成
+
+メインウィンドウの表示を速くするため、このモジュールはダイアログを初めて開く時点
+（日付選択はウィンドウの表示後）に読み込まれる。
+"""
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from datetime import datetime
+from itertools import islice
+from exporters import EXPORT_FORMATS, TextExporter
+from instrumentation import instrumentation
+from query import QuerySyntaxError
+
+# 検索結果の件数を数える際の1回あたりの件数
+_COUNT_CHUNK_SIZE = 2000
+# 関連度順の検索で一覧に表示するメモの最大数
+_RANKED_RESULT_LIMIT = 50
+
+def create_date_entry(parent):
+    """
+    日付選択ウィジェットを作成する
+
+    tkcalendarは読み込みに時間がかかるため、最初の日付選択を作成する時点で読み込む。
+
+    Args:
+        parent: 親ウィジェット
+
+    Returns:
+        DateEntry: YYYY/MM/DD形式の日付選択ウィジェット
+    """
+    from tkcalendar import DateEntry
+
+    return DateEntry(parent, width=12, background='darkblue', foreground='white', borderwidth=2,
+                     locale='ja_JP', date_pattern='yyyy/mm/dd')
+
+class ExportDialog:
+    def __init__(self, parent, app):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("エクスポート設定")
+        self.dialog.geometry("300x380")  # サイズを調整
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+        
+        self.export_frame = ttk.LabelFrame(self.dialog, text="エクスポート範囲", padding=10)
+        self.export_frame.pack(fill='x', padx=10, pady=5)
+        
+        self.export_var = tk.StringVar(value="all")
+        ttk.Radiobutton(self.export_frame, text="すべてのメモ", 
+                       variable=self.export_var, value="all").pack(anchor='w')
+        ttk.Radiobutton(self.export_frame, text="選択中のメモのみ", 
+                       variable=self.export_var, value="selected").pack(anchor='w')
+        # フィルター中のメモのエクスポートオプションを追加
+        ttk.Radiobutton(self.export_frame, text="フィルター中のメモ", 
+                       variable=self.export_var, value="filtered",
+                       state='normal' if app.is_tag_filtered or app.is_date_filtered else 'disabled'
+                       ).pack(anchor='w')
+
+        # エクスポート形式
+        self.format_frame = ttk.LabelFrame(self.dialog, text="形式", padding=10)
+        self.format_frame.pack(fill='x', padx=10, pady=5)
+
+        self.format_var = tk.StringVar(value=TextExporter.name)
+        for exporter in EXPORT_FORMATS.values():
+            ttk.Radiobutton(self.format_frame, text=f"{exporter.label} (*{exporter.extension})",
+                            variable=self.format_var, value=exporter.name).pack(anchor='w')
+        self.compress_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.format_frame, text="gzipで圧縮する",
+                        variable=self.compress_var).pack(anchor='w', pady=(5, 0))
+        
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill='x', padx=10, pady=10)
+        
+        ttk.Button(button_frame, text="キャンセル", 
+                  command=self.dialog.destroy).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="エクスポート", 
+                  command=lambda: self.export(app)).pack(side='right')
+
+    def export(self, app):
+        export_type = self.export_var.get()
+        options = {"export_format": self.format_var.get(), "compress": self.compress_var.get()}
+        self.dialog.destroy()
+        
+        if export_type == "selected":
+            app.export_memos(selected_only=True, **options)
+        elif export_type == "filtered":
+            # フィルター中のメモをエクスポート
+            filtered_ids = [item for item in app.tree.get_children()]
+            app.export_memos(filtered_only=True, filtered_ids=filtered_ids, **options)
+        else:  # "all"
+            app.export_memos(**options)
+
+class TagFilterDialog:
+    def __init__(self, parent, app):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("タグでフィルター")
+        self.dialog.geometry("300x400")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        self.tag_frame = ttk.LabelFrame(self.dialog, text="フィルターするタグを選択", padding=10)
+        self.tag_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+        self.tag_listbox = tk.Listbox(self.tag_frame, selectmode=tk.MULTIPLE)
+        self.tag_listbox.pack(fill='both', expand=True)
+
+        self.tag_listbox.insert(tk.END, *app.memo_manager.get_all_tags())
+
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill='x', padx=10, pady=10)
+
+        ttk.Button(button_frame, text="フィルター解除", 
+                  command=lambda: self.apply_filter(app, None)).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="キャンセル", 
+                  command=self.dialog.destroy).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="実行", 
+                  command=lambda: self.apply_filter(app)).pack(side='right')
+
+    def apply_filter(self, app, selected_tags=None):
+        if selected_tags is None and self.tag_listbox.curselection():
+            selected_tags = [self.tag_listbox.get(i) for i in self.tag_listbox.curselection()]
+        
+        app.apply_tag_filter(selected_tags)
+        self.dialog.destroy()
+
+class DateFilterDialog:
+    def __init__(self, parent, app):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("日付でフィルター")
+        self.dialog.geometry("400x200")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        # 日付範囲の取得
+        start_date, end_date = app.memo_manager.get_date_range()
+
+        # 日付選択フレーム
+        self.date_frame = ttk.LabelFrame(self.dialog, text="日付範囲を選択", padding=10)
+        self.date_frame.pack(fill='x', padx=10, pady=5)
+
+        # 開始日
+        start_frame = ttk.Frame(self.date_frame)
+        start_frame.pack(fill='x', pady=5)
+        ttk.Label(start_frame, text="開始日：").pack(side='left')
+        self.start_date = create_date_entry(start_frame)
+        if start_date:
+            self.start_date.set_date(datetime.strptime(start_date, '%Y/%m/%d').date())
+        self.start_date.pack(side='left', padx=5)
+
+        # 終了日
+        end_frame = ttk.Frame(self.date_frame)
+        end_frame.pack(fill='x', pady=5)
+        ttk.Label(end_frame, text="終了日：").pack(side='left')
+        self.end_date = create_date_entry(end_frame)
+        if end_date:
+            self.end_date.set_date(datetime.strptime(end_date, '%Y/%m/%d').date())
+        self.end_date.pack(side='left', padx=5)
+
+        # ボタンフレーム
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill='x', padx=10, pady=10)
+
+        ttk.Button(button_frame, text="フィルター解除", 
+                  command=lambda: self.apply_filter(app, None, None)).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="キャンセル", 
+                  command=self.dialog.destroy).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="実行", 
+                  command=lambda: self.apply_filter(app, self.start_date.get_date().strftime('%Y/%m/%d'), 
+                                                  self.end_date.get_date().strftime('%Y/%m/%d'))).pack(side='right')
+
+    def apply_filter(self, app, start_date=None, end_date=None):
+        if start_date is None and end_date is None:
+            app.apply_date_filter("", "")
+        else:
+            app.apply_date_filter(start_date, end_date)
+        self.dialog.destroy()
+
+class SearchDialog:
+    def __init__(self, parent, app):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("メモを検索")
+        self.dialog.geometry("400x430")
+        self.dialog.transient(parent)
+        
+        self.app = app
+        # 取得済みの検索結果と、未取得の結果のイテレーター（すべて取得済みならNone）
+        self.search_results = []
+        self._result_iter = None
+        self.current_result_index = -1
+        # 残りの結果を取得しながら件数を数える処理の予約
+        self._count_job = None
+        # 検索を実行した時点でのファイル処理の数（その後に処理が始まると結果は使えない）
+        self._operation_count = app.operation_count
+        
+        # 検索フレーム
+        search_frame = ttk.Frame(self.dialog, padding=10)
+        search_frame.pack(fill='x')
+        
+        ttk.Label(search_frame, text="検索内容：").pack(side='left')
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
+        self.search_entry.pack(side='left', padx=5)
+
+        # 検索オプション（クエリの書き方は title:会議 AND (予算 OR budget) NOT tag:done のように指定できる）
+        option_frame = ttk.Frame(self.dialog, padding=(10, 0))
+        option_frame.pack(fill='x')
+        self.case_sensitive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="大文字と小文字を区別する",
+                        variable=self.case_sensitive_var).pack(side='left')
+        # 関連度順の一覧では、空白で区切った語をクエリ言語ではなく単純な語として扱う
+        self.ranked_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(option_frame, text="関連度順に一覧表示",
+                        variable=self.ranked_var).pack(side='left', padx=(10, 0))
+        # フィルター中は、フィルターに一致するメモの中だけを検索できる
+        filtered = app.is_tag_filtered or app.is_date_filtered
+        self.within_filter_var = tk.BooleanVar(value=filtered)
+        ttk.Checkbutton(self.dialog, text="フィルター中のメモのみ検索", variable=self.within_filter_var,
+                        state='normal' if filtered else 'disabled').pack(anchor='w', padx=10)
+        
+        # 検索結果表示ラベル
+        self.result_label = ttk.Label(self.dialog, text="")
+        self.result_label.pack(fill='x', padx=10)
+
+        # 関連度順の検索結果の一覧
+        ranked_frame = ttk.Frame(self.dialog, padding=(10, 5, 10, 0))
+        ranked_frame.pack(fill='both', expand=True)
+        self.ranked_listbox = tk.Listbox(ranked_frame, height=8)
+        ranked_scrollbar = ttk.Scrollbar(ranked_frame, orient='vertical', command=self.ranked_listbox.yview)
+        self.ranked_listbox.configure(yscrollcommand=ranked_scrollbar.set)
+        self.ranked_listbox.pack(side='left', fill='both', expand=True)
+        ranked_scrollbar.pack(side='right', fill='y')
+        self.ranked_listbox.bind('<<ListboxSelect>>', self.on_ranked_select)
+        self.ranked_ids = []
+        
+        # ボタンフレーム
+        button_frame = ttk.Frame(self.dialog, padding=10)
+        button_frame.pack(fill='x')
+        
+        self.prev_button = ttk.Button(button_frame, text="前の項目", command=self.prev_result, state='disabled')
+        self.prev_button.pack(side='left', padx=5)
+        
+        self.next_button = ttk.Button(button_frame, text="次の項目", command=self.next_result, state='disabled')
+        self.next_button.pack(side='left', padx=5)
+        
+        ttk.Button(button_frame, text="実行", command=self.execute_search).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="キャンセル", command=self.close_dialog).pack(side='right', padx=5)
+        
+        self.search_entry.focus_set()
+        self.dialog.bind('<Return>', lambda e: self.execute_search())
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close_dialog)
+
+    def execute_search(self):
+        search_text = self.search_var.get()
+        if not search_text or self.app.is_busy():
+            return
+        self.app.flush_content()
+        self._cancel_count()
+        self.ranked_listbox.delete(0, tk.END)
+        self.ranked_ids = []
+        memo_manager = self.app.memo_manager
+        case_sensitive = self.case_sensitive_var.get()
+        if self.ranked_var.get():
+            self.execute_ranked_search(search_text, case_sensitive)
+            return
+        try:
+            # 最初の結果だけを取得し、残りは件数を数えながら少しずつ取得する
+            scope = self._search_scope()
+            self._result_iter = memo_manager.iter_query_memos(search_text, case_sensitive=case_sensitive,
+                                                              memo_ids=scope)
+            self.search_results = list(islice(self._result_iter, 1))
+        except QuerySyntaxError as e:
+            self.search_results = []
+            self._result_iter = None
+            self.update_button_states()
+            self.result_label.config(text=str(e))
+            return
+        self.current_result_index = -1
+        self._operation_count = self.app.operation_count
+        
+        if self.search_results:
+            self.next_result()
+            # 件数は少しずつ数え、その間も結果を操作できるようにする
+            self.result_label.config(text="件数を数えています...")
+            self._count_job = self.dialog.after(1, self._count_next_chunk)
+        else:
+            self._result_iter = None
+            self.update_button_states()
+            self.result_label.config(text="見つかりませんでした。")
+
+    def execute_ranked_search(self, search_text, case_sensitive):
+        """関連度の高い順にメモを一覧に表示する"""
+        self.search_results = []
+        self._result_iter = None
+        self.current_result_index = -1
+        self.update_button_states()
+        memo_manager = self.app.memo_manager
+        scope = self._search_scope()
+        if scope is None:
+            ranked = memo_manager.rank_memos(search_text, _RANKED_RESULT_LIMIT, case_sensitive)
+        else:
+            # すべてのメモを順位付けし、フィルターに一致する上位のメモを表示する
+            ranked = [(memo_id, score)
+                      for memo_id, score in memo_manager.rank_memos(search_text, len(memo_manager.memos),
+                                                                    case_sensitive)
+                      if memo_id in scope][:_RANKED_RESULT_LIMIT]
+        if not ranked:
+            self.result_label.config(text="見つかりませんでした。")
+            return
+        self.ranked_ids = [memo_id for memo_id, _ in ranked]
+        self.ranked_listbox.insert(tk.END, *(f"{score:6.2f}  {memo_manager.memos[memo_id].title}"
+                                             for memo_id, score in ranked))
+        self.result_label.config(text=f"関連度の高い{len(ranked)}件を表示しています。")
+
+    def _search_scope(self):
+        """「フィルター中のメモのみ検索」が有効な場合は、フィルターに一致するメモIDの集合を返す"""
+        if not self.within_filter_var.get():
+            return None
+        return self.app.filter_memo_ids()
+
+    def on_ranked_select(self, event):
+        """一覧で選択したメモを表示する"""
+        selection = self.ranked_listbox.curselection()
+        if not selection or self.app.is_busy():
+            return
+        memo_id = self.ranked_ids[selection[0]]
+        if memo_id not in self.app.memo_manager.memos or not self.app.tree.exists(memo_id):
+            return
+        self.app.tree.selection_set(memo_id)
+        self.app.tree.see(memo_id)
+        self.app.on_tree_select(None)
+
+    def _results_outdated(self):
+        """
+        検索の実行後にファイル処理が始まっていれば、検索結果とイテレーターを破棄する
+
+        ファイル処理はワーカースレッドでメモとインデックスを変更するため、
+        処理中・処理後に未取得の結果を取得すると一貫しない結果や例外となる。
+
+        Returns:
+            bool: 検索結果を破棄した場合True
+        """
+        if self._operation_count == self.app.operation_count:
+            return False
+        self._cancel_count()
+        self.search_results = []
+        self._result_iter = None
+        self.current_result_index = -1
+        self.update_button_states()
+        self.result_label.config(text="メモが変更されたため、検索をやり直してください。")
+        return True
+
+    def _count_next_chunk(self):
+        """検索結果を1チャンク分取得して件数を表示し、残りがあれば次のチャンクを予約する"""
+        self._count_job = None
+        if self._results_outdated():
+            return
+        fetched = len(self.search_results)
+        if self._result_iter is not None:
+            # 「次の項目」で取得した結果と同じイテレーターから続けて取得する
+            self.search_results.extend(islice(self._result_iter, _COUNT_CHUNK_SIZE))
+        if len(self.search_results) - fetched == _COUNT_CHUNK_SIZE:
+            self.result_label.config(text=f"{len(self.search_results)}件以上見つかりました（数えています）")
+            self._count_job = self.dialog.after(1, self._count_next_chunk)
+        else:
+            self._result_iter = None
+            self.update_button_states()
+            self.result_label.config(text=f"{len(self.search_results)}件見つかりました。")
+
+    def _cancel_count(self):
+        """予約済みの件数の計数を取り消す"""
+        if self._count_job is not None:
+            self.dialog.after_cancel(self._count_job)
+            self._count_job = None
+
+    def close_dialog(self):
+        self._cancel_count()
+        # ハイライトを解除
+        self.app.text_area.tag_remove('search', '1.0', tk.END)
+        self.dialog.destroy()
+
+    def next_result(self):
+        if not self.search_results or self._results_outdated():
+            return
+
+        if self.current_result_index + 1 >= len(self.search_results) and self._result_iter is not None:
+            # 取得済みの結果を使い切ったら次の結果を取得する
+            match = next(self._result_iter, None)
+            if match is None:
+                self._result_iter = None
+            else:
+                self.search_results.append(match)
+            
+        self.current_result_index = (self.current_result_index + 1) % len(self.search_results)
+        self.show_current_result()
+        self.update_button_states()
+
+    def prev_result(self):
+        if not self.search_results or self._results_outdated():
+            return
+        if self.current_result_index == 0 and self._result_iter is not None:
+            # 末尾の結果はまだ取得していないため、先頭から戻らない
+            return
+            
+        self.current_result_index = (self.current_result_index - 1) % len(self.search_results)
+        self.show_current_result()
+        self.update_button_states()
+
+    def show_current_result(self):
+        if not (0 <= self.current_result_index < len(self.search_results)) or self.app.is_busy():
+            return
+
+        memo_id, start, end, is_title = self.search_results[self.current_result_index]
+        memo = self.app.memo_manager.memos[memo_id]
+        
+        # メモを選択してテキストエリアを更新
+        self.app.tree.selection_set(memo_id)
+        self.app.tree.see(memo_id)
+        self.app.on_tree_select(None)
+        
+        # テキストエリアの更新を待つ
+        self.dialog.after(10, lambda: self._highlight_text(start, end, is_title))
+
+    def _highlight_text(self, start, end, is_title):
+        try:
+            self.app.text_area.tag_remove('search', '1.0', tk.END)
+            self.app.text_area.tag_config('search', background='yellow')
+
+            # タイトルとコンテンツの位置を計算
+            if is_title:
+                start_pos = f"1.{start}"
+                end_pos = f"1.{end}"
+            else:
+                # コンテンツ内の位置を計算（タイトル行を考慮）
+                content = self.app.text_area.get('1.0', tk.END)
+                lines = content[:start].count('\n') + 1
+                start_col = start - content[:start].rindex('\n') - 1 if '\n' in content[:start] else start
+                end_col = end - content[:end].rindex('\n') - 1 if '\n' in content[:end] else end
+                start_pos = f"{lines}.{start_col}"
+                end_pos = f"{lines}.{end_col}"
+
+            # ハイライトを適用
+            self.app.text_area.tag_add('search', start_pos, end_pos)
+            self.app.text_area.see(start_pos)
+            self.app.text_area.focus_set()
+            self.app.text_area.mark_set(tk.INSERT, start_pos)
+        except Exception as e:
+            messagebox.showerror("エラー", f"検索結果のハイライト中にエラーが発生しました：{str(e)}")
+
+    def update_button_states(self):
+        state = 'normal' if self.search_results else 'disabled'
+        at_unbounded_start = self.current_result_index == 0 and self._result_iter is not None
+        self.prev_button.configure(state='disabled' if at_unbounded_start else state)
+        self.next_button.configure(state=state)
+
+class TagSelectionDialog:
+    def __init__(self, parent, app, title, callback):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(title)
+        self.dialog.geometry("300x400")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        self.tag_frame = ttk.LabelFrame(self.dialog, text="タグを選択", padding=10)
+        self.tag_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+        self.tag_listbox = tk.Listbox(self.tag_frame, selectmode=tk.MULTIPLE)
+        self.tag_listbox.pack(fill='both', expand=True)
+
+        if title == "削除するタグを選択":
+            tags = sorted(app.memo_manager.memos[app.current_memo_id].tags)
+        else:
+            tags = app.memo_manager.get_all_tags()
+
+        self.tag_listbox.insert(tk.END, *tags)
+
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill='x', padx=10, pady=10)
+
+        ttk.Button(button_frame, text="キャンセル", 
+                  command=self.dialog.destroy).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="実行", 
+                  command=lambda: self.apply_selection(callback)).pack(side='right')
+
+    def apply_selection(self, callback):
+        selected_tags = [self.tag_listbox.get(i) for i in self.tag_listbox.curselection()]
+        self.dialog.destroy()
+        callback(selected_tags)
+
+class StatsDialog:
+    """処理ごとの集計と最近の遅い処理を表示するダイアログ"""
+    def __init__(self, parent):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("処理時間の統計")
+        self.dialog.geometry("560x480")
+        self.dialog.transient(parent)
+
+        summary_frame = ttk.LabelFrame(self.dialog, text="処理ごとの集計", padding=5)
+        summary_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        self.summary_tree = ttk.Treeview(summary_frame, columns=('count', 'total', 'mean', 'max'), height=8)
+        self.summary_tree.heading('#0', text='処理')
+        self.summary_tree.heading('count', text='回数')
+        self.summary_tree.heading('total', text='合計 (ms)')
+        self.summary_tree.heading('mean', text='平均 (ms)')
+        self.summary_tree.heading('max', text='最大 (ms)')
+        self.summary_tree.column('#0', width=180)
+        for column in ('count', 'total', 'mean', 'max'):
+            self.summary_tree.column(column, width=80, anchor='e')
+        self.summary_tree.pack(fill='both', expand=True)
+
+        slow_frame = ttk.LabelFrame(self.dialog, text=f"最近の遅い処理（{instrumentation.slow_threshold * 1000:.0f} ms以上）",
+                                    padding=5)
+        slow_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        self.slow_tree = ttk.Treeview(slow_frame, columns=('seconds', 'finished_at'), height=8)
+        self.slow_tree.heading('#0', text='処理')
+        self.slow_tree.heading('seconds', text='時間 (ms)')
+        self.slow_tree.heading('finished_at', text='終了時刻')
+        self.slow_tree.column('#0', width=180)
+        self.slow_tree.column('seconds', width=80, anchor='e')
+        self.slow_tree.column('finished_at', width=200)
+        self.slow_tree.pack(fill='both', expand=True)
+
+        button_frame = ttk.Frame(self.dialog)
+        button_frame.pack(fill='x', padx=10, pady=10)
+        ttk.Button(button_frame, text="更新", command=self.refresh).pack(side='left')
+        ttk.Button(button_frame, text="リセット", command=self.reset).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="閉じる", command=self.dialog.destroy).pack(side='right')
+        ttk.Button(button_frame, text="CSVで保存", command=lambda: self.dump("csv")).pack(side='right', padx=5)
+        ttk.Button(button_frame, text="JSONで保存", command=lambda: self.dump("json")).pack(side='right')
+
+        self.refresh()
+
+    def refresh(self):
+        """記録の内容を表示し直す"""
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        for row in instrumentation.summary():
+            self.summary_tree.insert('', 'end', text=row["operation"], values=(
+                row["count"], f"{row['total_seconds'] * 1000:.1f}",
+                f"{row['mean_seconds'] * 1000:.1f}", f"{row['max_seconds'] * 1000:.1f}"))
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for entry in instrumentation.slow_operations():
+            self.slow_tree.insert('', 'end', text=entry["operation"],
+                                  values=(f"{entry['seconds'] * 1000:.1f}", entry["finished_at"]))
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def dump(self, file_format):
+        """記録をJSONまたはCSVファイルに書き出す"""
+        file_path = filedialog.asksaveasfilename(
+            parent=self.dialog,
+            defaultextension=f".{file_format}",
+            filetypes=[(f"{file_format.upper()}ファイル", f"*.{file_format}"), ("すべてのファイル", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            if file_format == "json":
+                instrumentation.dump_json(file_path)
+            else:
+                instrumentation.dump_csv(file_path)
+        except OSError as e:
+            messagebox.showerror("エラー", f"統計の保存中にエラーが発生しました：{str(e)}", parent=self.dialog)
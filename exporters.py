@@ -0,0 +1,186 @@
+"""
+メモのエクスポート形式
+
+各形式はMemoExporterのサブクラスとして実装し、EXPORT_FORMATSに形式名で登録する。
+エクスポーターはメモを1件ずつ受け取ってファイルに書き込むため、メモの件数によらず
+一定のメモリで書き出せる。
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from typing import Dict, Optional, TextIO, Type
+
+# gzipで圧縮したファイルの拡張子
+GZIP_SUFFIX = ".gz"
+
+class MemoExporter:
+    """
+    メモを1件ずつファイルに書き込むエクスポーターの基底クラス
+
+    サブクラスはwrite_memoを実装し、必要に応じてbegin・endでヘッダーやフッターを書き込む。
+    エクスポーターは1回のエクスポートごとに作成する。
+
+    Attributes:
+        name (str): 形式名
+        label (str): ファイルダイアログなどに表示する形式の名前
+        extension (str): ファイルの拡張子
+        newline (Optional[str]): ファイルを開く際のnewline引数
+    """
+    name = ""
+    label = ""
+    extension = ""
+    newline: Optional[str] = None
+
+    def begin(self, file: TextIO) -> None:
+        """
+        最初のメモを書き込む前に呼ばれる
+
+        Args:
+            file (TextIO): 書き込み先のファイルオブジェクト
+        """
+
+    def write_memo(self, file: TextIO, memo, content: str) -> None:
+        """
+        メモを1件書き込む
+
+        Args:
+            file (TextIO): 書き込み先のファイルオブジェクト
+            memo (Memo): 書き込むメモ
+            content (str): メモの本文（未読み込みの本文はメモに保持せずに渡される）
+        """
+        raise NotImplementedError
+
+    def end(self, file: TextIO) -> None:
+        """
+        すべてのメモを書き込んだ後に呼ばれる
+
+        Args:
+            file (TextIO): 書き込み先のファイルオブジェクト
+        """
+
+class TextExporter(MemoExporter):
+    """「タイトル:」「日付:」「タグ:」「内容:」の見出しを付けたテキスト形式"""
+    name = "text"
+    label = "テキストファイル"
+    extension = ".txt"
+
+    def __init__(self):
+        self._first = True
+
+    def write_memo(self, file: TextIO, memo, content: str) -> None:
+        # 2件目以降は前のメモとの間に区切り線を入れる
+        separator = "" if self._first else "-" * 50 + "\n"
+        self._first = False
+        file.write(f"{separator}タイトル: {memo.title}\n日付: {memo.date}\n"
+                   f"タグ: {', '.join(sorted(memo.tags))}\n内容:\n{content}\n")
+
+class JsonLinesExporter(MemoExporter):
+    """1行に1件のメモをJSONオブジェクトとして書き込むJSON Lines形式"""
+    name = "jsonl"
+    label = "JSON Lines"
+    extension = ".jsonl"
+    newline = "\n"
+
+    def write_memo(self, file: TextIO, memo, content: str) -> None:
+        record = {"title": memo.title, "date": memo.date, "tags": sorted(memo.tags), "content": content}
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class CsvExporter(MemoExporter):
+    """見出し行付きのCSV形式（タグは「, 」区切りで1列にまとめる）"""
+    name = "csv"
+    label = "CSVファイル"
+    extension = ".csv"
+    newline = ""
+
+    def __init__(self):
+        self._writer = None
+
+    def begin(self, file: TextIO) -> None:
+        self._writer = csv.writer(file)
+        self._writer.writerow(["タイトル", "日付", "タグ", "内容"])
+
+    def write_memo(self, file: TextIO, memo, content: str) -> None:
+        self._writer.writerow([memo.title, memo.date, ", ".join(sorted(memo.tags)), content])
+
+class MarkdownExporter(MemoExporter):
+    """メモごとにタイトルを見出しとするMarkdown形式"""
+    name = "markdown"
+    label = "Markdown"
+    extension = ".md"
+
+    def __init__(self):
+        self._first = True
+
+    def write_memo(self, file: TextIO, memo, content: str) -> None:
+        separator = "" if self._first else "\n---\n\n"
+        self._first = False
+        file.write(f"{separator}# {memo.title}\n\n- 日付: {memo.date}\n"
+                   f"- タグ: {', '.join(sorted(memo.tags))}\n\n{content}\n")
+
+# 形式名とエクスポーターの対応（表示順）
+EXPORT_FORMATS: Dict[str, Type[MemoExporter]] = {
+    exporter.name: exporter for exporter in (TextExporter, JsonLinesExporter, CsvExporter, MarkdownExporter)
+}
+
+def create_exporter(export_format: str) -> MemoExporter:
+    """
+    形式名に対応するエクスポーターを作成する
+
+    Args:
+        export_format (str): 形式名（EXPORT_FORMATSのキー）
+
+    Returns:
+        MemoExporter: 作成したエクスポーター
+
+    Raises:
+        ValueError: 対応していない形式名の場合
+    """
+    try:
+        return EXPORT_FORMATS[export_format]()
+    except KeyError:
+        raise ValueError(f"対応していないエクスポート形式です: {export_format}") from None
+
+def format_from_path(file_path: str) -> str:
+    """
+    ファイルの拡張子からエクスポート形式を判定する
+
+    末尾の「.gz」は無視し、対応する形式がない拡張子はテキスト形式とみなす。
+
+    Args:
+        file_path (str): エクスポート先のファイルパス
+
+    Returns:
+        str: 形式名
+    """
+    path = file_path.lower()
+    if path.endswith(GZIP_SUFFIX):
+        path = path[:-len(GZIP_SUFFIX)]
+    extension = os.path.splitext(path)[1]
+    for exporter in EXPORT_FORMATS.values():
+        if exporter.extension == extension:
+            return exporter.name
+    return TextExporter.name
+
+def open_export_file(file_path: str, newline: Optional[str], compress: bool, buffer_size: int) -> TextIO:
+    """
+    エクスポート先のファイルをUTF-8のテキストとして書き込み用に開く
+
+    Args:
+        file_path (str): エクスポート先のファイルパス
+        newline (Optional[str]): 改行の扱い（openのnewline引数）
+        compress (bool): gzipで圧縮するかどうか
+        buffer_size (int): 書き込みバッファのサイズ
+
+    Returns:
+        TextIO: 書き込み用のファイルオブジェクト
+    """
+    if not compress:
+        return open(file_path, 'w', encoding='utf-8', newline=newline, buffering=buffer_size)
+    raw = gzip.GzipFile(file_path, 'wb')
+    try:
+        return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size), encoding='utf-8', newline=newline)
+    except BaseException:
+        raw.close()
+        raise
@@ -0,0 +1,240 @@
+"""
+処理時間の計測
+
+MemoManagerとMemoAppの主な処理（読み込み・保存・検索・フィルター・エクスポート・
+メモリストの更新）は@timedで計測対象として登録されている。計測は既定で無効で、
+instrumentation.enabledをTrueにすると処理ごとの呼び出し回数と実行時間、
+閾値を超えた最近の遅い処理が記録される。無効の間は属性を1回参照するだけで処理を呼び出す。
+
+環境変数MEMO_APP_INSTRUMENTATIONに1を指定して起動すると、最初から計測が有効になる。
+
+起動時間はstartup_profileで段階ごとに計測する。環境変数MEMO_APP_STARTUP_PROFILEに1を
+指定して起動すると、ウィンドウの最初の描画までの各段階の所要時間が標準エラー出力に表示される。
+
+使い方:
+    from instrumentation import instrumentation
+    instrumentation.enabled = True
+    ...
+    instrumentation.dump_json("stats.json")
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, TextIO
+
+# 遅い処理とみなす実行時間（秒）
+_SLOW_THRESHOLD = 0.1
+
+# 記録する遅い処理の件数
+_SLOW_HISTORY_SIZE = 50
+
+# CSVに書き出す集計の列
+_SUMMARY_FIELDS = ("operation", "count", "total_seconds", "mean_seconds", "max_seconds")
+
+class Instrumentation:
+    """
+    処理ごとの呼び出し回数と実行時間を記録する
+
+    記録はUIのワーカースレッドとメインスレッドの両方から行われるため、ロックで保護する。
+
+    Attributes:
+        enabled (bool): 計測が有効かどうか
+        slow_threshold (float): 遅い処理として記録する実行時間（秒）
+    """
+    def __init__(self, slow_threshold: float = _SLOW_THRESHOLD, history_size: int = _SLOW_HISTORY_SIZE):
+        self.enabled = False
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        # 処理名 -> [呼び出し回数, 合計時間, 最大時間]
+        self._totals: Dict[str, list] = {}
+        self._slow_operations = deque(maxlen=history_size)
+
+    def record(self, operation: str, seconds: float) -> None:
+        """
+        処理の実行時間を記録する
+
+        Args:
+            operation (str): 処理名
+            seconds (float): 実行時間（秒）
+        """
+        with self._lock:
+            totals = self._totals.get(operation)
+            if totals is None:
+                self._totals[operation] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] = max(totals[2], seconds)
+            if seconds >= self.slow_threshold:
+                self._slow_operations.append(
+                    (operation, seconds, datetime.now().isoformat(timespec='milliseconds')))
+
+    @contextmanager
+    def measure(self, operation: str) -> Iterator[None]:
+        """
+        withブロックの実行時間を記録する（計測が無効の場合は何もしない）
+
+        Args:
+            operation (str): 処理名
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - start)
+
+    def summary(self) -> list[dict]:
+        """
+        処理ごとの集計を合計時間の長い順に返す
+
+        Returns:
+            list[dict]: operation、count、total_seconds、mean_seconds、max_secondsを含む辞書のリスト
+        """
+        with self._lock:
+            rows = [{"operation": operation, "count": count, "total_seconds": total,
+                     "mean_seconds": total / count, "max_seconds": longest}
+                    for operation, (count, total, longest) in self._totals.items()]
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return rows
+
+    def slow_operations(self) -> list[dict]:
+        """
+        最近の遅い処理を新しい順に返す
+
+        Returns:
+            list[dict]: operation、seconds、finished_atを含む辞書のリスト
+        """
+        with self._lock:
+            entries = list(self._slow_operations)
+        return [{"operation": operation, "seconds": seconds, "finished_at": finished_at}
+                for operation, seconds, finished_at in reversed(entries)]
+
+    def reset(self) -> None:
+        """記録をすべて破棄する"""
+        with self._lock:
+            self._totals.clear()
+            self._slow_operations.clear()
+
+    def dump_json(self, file_path: str) -> None:
+        """
+        集計と最近の遅い処理をJSONファイルに書き出す
+
+        Args:
+            file_path (str): 書き出すファイルのパス
+        """
+        import json
+
+        report = {"summary": self.summary(), "slow_operations": self.slow_operations()}
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def dump_csv(self, file_path: str) -> None:
+        """
+        処理ごとの集計をCSVファイルに書き出す
+
+        Args:
+            file_path (str): 書き出すファイルのパス
+        """
+        import csv
+
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=_SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.summary())
+
+class StartupProfile:
+    """
+    起動の各段階の所要時間を記録する
+
+    計測の起点はこのモジュールの読み込み時点で、mark()を呼ぶたびに直前の記録からの時間を
+    1つの段階として記録する。
+
+    Attributes:
+        enabled (bool): 計測が有効かどうか
+    """
+    def __init__(self):
+        self.enabled = False
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """
+        直前の記録からこの時点までを1つの段階として記録する（計測が無効の場合は何もしない）
+
+        Args:
+            phase (str): 段階の名前
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last))
+        self._last = now
+
+    def phases(self) -> list[dict]:
+        """
+        記録した段階を順に返す
+
+        Returns:
+            list[dict]: phase、seconds（段階の所要時間）、elapsed_seconds（起点からの経過時間）を含む辞書のリスト
+        """
+        rows = []
+        elapsed = 0.0
+        for phase, seconds in self._phases:
+            elapsed += seconds
+            rows.append({"phase": phase, "seconds": seconds, "elapsed_seconds": elapsed})
+        return rows
+
+    def report(self, file: Optional[TextIO] = None) -> None:
+        """
+        記録した段階を表形式で出力する（計測が無効の場合は何もしない）
+
+        Args:
+            file (Optional[TextIO]): 出力先。Noneの場合は標準エラー出力
+        """
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        print(f"{'段階':<16}{'所要時間 (ms)':>14}{'経過時間 (ms)':>14}", file=file)
+        for row in self.phases():
+            print(f"{row['phase']:<16}{row['seconds'] * 1000:>14.1f}{row['elapsed_seconds'] * 1000:>14.1f}",
+                  file=file)
+
+# アプリケーション全体で共有する計測
+instrumentation = Instrumentation()
+instrumentation.enabled = os.environ.get("MEMO_APP_INSTRUMENTATION") == "1"
+
+# 起動時間の計測（main.pyはこのモジュールを最初に読み込むため、tkinterなどの読み込みも計測に含まれる）
+startup_profile = StartupProfile()
+startup_profile.enabled = os.environ.get("MEMO_APP_STARTUP_PROFILE") == "1"
+
+def timed(operation: str) -> Callable[[Callable], Callable]:
+    """
+    関数の実行時間を記録するデコレーター
+
+    Args:
+        operation (str): 処理名
+
+    Returns:
+        Callable[[Callable], Callable]: デコレーター
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrumentation.record(operation, time.perf_counter() - start)
+        return wrapper
+    return decorator
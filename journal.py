@@ -0,0 +1,137 @@
+import json
+import os
+from typing import Iterable, Optional
+
+# XMLファイルのパスに付けるジャーナルファイルの拡張子
+JOURNAL_SUFFIX = ".journal"
+
+def journal_path(file_path: str) -> str:
+    """
+    XMLファイルに対応するジャーナルファイルのパスを返す
+
+    Args:
+        file_path (str): XMLファイルのパス
+
+    Returns:
+        str: ジャーナルファイルのパス
+    """
+    return file_path + JOURNAL_SUFFIX
+
+class MemoJournal:
+    """
+    XMLファイルへの変更を追記していくジャーナルファイル
+
+    1行目はジャーナルの基になったXMLファイルのサイズと更新時刻を記録したヘッダーで、
+    以降の各行はメモの追加・変更・削除を表すJSONレコードとなる。XMLファイルが
+    ジャーナルの作成後に置き換えられた場合、ヘッダーが一致しないため再生されない。
+
+    Attributes:
+        path (str): ジャーナルファイルのパス
+        active (bool): ジャーナルが現在のXMLファイルに対応しているかどうか
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.active = False
+
+    @staticmethod
+    def _base_header(file_path: str) -> dict:
+        """
+        XMLファイルのサイズと更新時刻からヘッダーを作成する（内部メソッド）
+
+        Args:
+            file_path (str): XMLファイルのパス
+
+        Returns:
+            dict: ヘッダーのレコード
+        """
+        stat = os.stat(file_path)
+        return {"op": "base", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def start(self, file_path: str) -> None:
+        """
+        ジャーナルを新しく作成し、XMLファイルの情報をヘッダーとして書き込む
+
+        既存のジャーナルファイルは上書きされる。
+
+        Args:
+            file_path (str): ジャーナルの基になるXMLファイルのパス
+        """
+        header = self._base_header(file_path)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(header) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.active = True
+
+    def append(self, records: Iterable[dict]) -> None:
+        """
+        レコードをジャーナルの末尾に追記し、ディスクに書き出す
+
+        Args:
+            records (Iterable[dict]): 追記するレコード
+        """
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(''.join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def replay(self, file_path: str, repair: bool = True) -> Optional[list[dict]]:
+        """
+        XMLファイルに対応するジャーナルのレコードを読み込む
+
+        書き込み途中で中断された末尾の不完全な行は無視され、ファイルから切り詰められる。
+
+        Args:
+            file_path (str): 読み込んだXMLファイルのパス
+            repair (bool): 末尾の不完全な行をファイルから切り詰めるかどうか
+
+        Returns:
+            Optional[list[dict]]: ヘッダー以降のレコードのリスト。ジャーナルが存在しない場合や
+                XMLファイルに対応しない場合はNone
+        """
+        self.active = False
+        try:
+            file = open(self.path, 'rb')
+        except FileNotFoundError:
+            return None
+        with file:
+            try:
+                header = json.loads(file.readline())
+            except ValueError:
+                return None
+            if header != self._base_header(file_path):
+                return None
+
+            records = []
+            valid_size = file.tell()
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+                valid_size += len(line)
+
+        if repair and valid_size < os.path.getsize(self.path):
+            os.truncate(self.path, valid_size)
+        self.active = True
+        return records
+
+    def size(self) -> int:
+        """
+        ジャーナルファイルのサイズを返す
+
+        Returns:
+            int: バイト数。ファイルが存在しない場合は0
+        """
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def remove(self) -> None:
+        """ジャーナルファイルを削除する"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.active = False
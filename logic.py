@@ -1,7 +1,117 @@
+import heapq
+import math
+import os
+import re
+import shutil
+import sys
+import weakref
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Dict, Set, Optional
+from functools import reduce
+from itertools import compress, groupby, islice, repeat
+from operator import add, and_, attrgetter, itemgetter, or_
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, Set, Optional, Union
+
+from instrumentation import timed
+from journal import MemoJournal, journal_path
+from query import compile_query, filter_resumed, parse_resume_token, skip_to_resume
+
+# 保存・エクスポート時の書き込みバッファサイズ
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# ジャーナルをXMLファイルに統合する大きさ（XMLファイルのサイズに対する比と最小バイト数）
+_JOURNAL_COMPACT_RATIO = 0.5
+_JOURNAL_COMPACT_MIN_SIZE = 1 << 20
+
+# ジャーナルに記録するメモの属性
+_MEMO_FIELDS = ('title', 'date', 'content', 'tags')
+
+# 検索時に未読み込みの本文をまとめて取得するメモの数
+_SEARCH_FETCH_BATCH_SIZE = 500
+
+# エクスポート時に未読み込みの本文をまとめて取得するメモの数
+_EXPORT_FETCH_BATCH_SIZE = 500
+
+# 関連度検索（BM25）のパラメータと、本文に対するタイトルの一致の重み
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_BM25_TITLE_WEIGHT = 2.0
+
+# フィルター・検索の結果をキャッシュする件数と、キャッシュする検索結果の最大の一致箇所数
+_RESULT_CACHE_SIZE = 64
+_RESULT_CACHE_MAX_MATCHES = 100_000
+
+# ビット集合の2進表記（b"0"/b"1"）とフラグ（0/1）の相互変換表
+_BIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+_FLAG_BITS = bytes.maketrans(b"\x00\x01", b"01")
+
+# ディレクトリから読み込むメモ帳ファイルの拡張子
+_NOTEBOOK_SUFFIX = ".xml"
+
+# XML 1.0で使用できない制御文字
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# テキスト中でエスケープする文字と実体参照（&は最初に置き換える）
+_XML_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'))
+
+def _xml_element(tag: str, text: str) -> str:
+    """
+    テキストをエスケープしてXML要素の文字列を生成する
+
+    Args:
+        tag (str): 要素名
+        text (str): 要素のテキスト
+
+    Returns:
+        str: XML要素の文字列。テキストが空の場合は空要素
+
+    Raises:
+        ValueError: XMLで扱えない制御文字が含まれている場合
+    """
+    if not text:
+        return f"<{tag}/>"
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError(f"XMLに保存できない制御文字が含まれています: <{tag}>")
+    for char, entity in _XML_ESCAPES:
+        if char in text:
+            text = text.replace(char, entity)
+    return f"<{tag}>{text}</{tag}>"
+
+class OperationCancelled(Exception):
+    """
+    進捗通知用のコールバックから送出して、読み込み・保存・エクスポートを中断するための例外
+
+    中断された処理はメモと既存のファイルを変更しない（書きかけの一時ファイルは削除される）。
+    """
+
+# タグ集合の共有テーブル（同じ組み合わせのタグ集合は1つのfrozensetを共有する）。
+# どのメモからも参照されなくなったタグ集合は自動的に取り除かれる
+_SHARED_TAG_SETS: 'weakref.WeakValueDictionary[FrozenSet[str], FrozenSet[str]]' = weakref.WeakValueDictionary()
+_EMPTY_TAGS: FrozenSet[str] = frozenset()
+
+def _intern_tags(tags: Iterable[str]) -> FrozenSet[str]:
+    """
+    タグ集合を共有テーブルに登録し、共有されたfrozensetを返す
+
+    タグ文字列自体もインターンされるため、多数のメモで同じタグを使っても重複して保持されない。
+
+    Args:
+        tags (Iterable[str]): タグ
+
+    Returns:
+        FrozenSet[str]: 共有されたタグのfrozenset
+    """
+    key = tags if isinstance(tags, frozenset) else frozenset(tags)
+    if not key:
+        return _EMPTY_TAGS
+    shared = _SHARED_TAG_SETS.get(key)
+    if shared is None:
+        shared = frozenset(map(sys.intern, key))
+        # キーには共有するfrozensetとは別のオブジェクトを使い、値への強い参照を残さない
+        _SHARED_TAG_SETS[key] = shared
+    return shared
 
 # メモの基本データを管理するクラス
 class Memo:
@@ -12,13 +122,745 @@ class Memo:
         title (str): メモのタイトル
         date (str): メモの作成/更新日付（YYYY/MM/DD形式）
         content (str): メモの本文
-        tags (Set[str]): メモに付けられたタグのセット
+        tags (FrozenSet[str]): メモに付けられたタグの集合
+        source (Optional[str]): インポートしたメモの読み込み元のファイルパス。
+            ファイルには保存されず、変更通知の対象にもならない
+
+    Note:
+        各属性への代入はMemoManagerに通知され、検索用インデックスなどの派生データが更新される。
+        本文にNoneを指定したメモは本文が未読み込みの状態となり、最初に参照された時点で
+        登録先のMemoManagerのストレージから読み込まれる。
+        大量のメモを保持できるよう__slots__を使い、日付とタグの文字列はインターンし、
+        タグ集合は同じ組み合わせのメモ間で共有する不変のfrozensetとして保持する。
+        タグを変更する場合は新しい集合を代入すること。
+    """
+    __slots__ = ('_observer', '_title', '_date', '_content', '_tags', 'source')
+
+    def __init__(self, title: str, date: str, content: Optional[str] = "",
+                 tags: Optional[Iterable[str]] = None, source: Optional[str] = None):
+        self._observer: Optional[_MemoBinding] = None
+        self._title = title
+        self._date = sys.intern(date)
+        self._content = content
+        self._tags = _intern_tags(tags) if tags else _EMPTY_TAGS
+        self.source = source
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @title.setter
+    def title(self, value: str) -> None:
+        old = self._title
+        self._title = value
+        self._notify('title', old)
+
+    @property
+    def date(self) -> str:
+        return self._date
+
+    @date.setter
+    def date(self, value: str) -> None:
+        old = self._date
+        self._date = sys.intern(value)
+        self._notify('date', old)
+
+    @property
+    def content(self) -> str:
+        content = self._content
+        if content is None:
+            # 未読み込みの本文は登録先のMemoManagerから読み込む
+            content = self._observer.load_content(self) if self._observer is not None else ""
+        return content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        old = self._content
+        self._content = value
+        self._notify('content', old)
+
+    @property
+    def tags(self) -> FrozenSet[str]:
+        return self._tags
+
+    @tags.setter
+    def tags(self, value: Iterable[str]) -> None:
+        old = self._tags
+        self._tags = _intern_tags(value)
+        self._notify('tags', old)
+
+    def _notify(self, field: str, old) -> None:
+        """
+        属性の変更を登録先のMemoManagerに通知する（内部メソッド）
+
+        Args:
+            field (str): 変更された属性名
+            old: 変更前の値
+        """
+        if self._observer is not None:
+            self._observer(self, field, old)
+
+class _MemoBinding:
+    """
+    メモと登録先のMemoManagerの対応付け（内部クラス）
+
+    メモ属性の変更通知と、未読み込みの本文の読み込みをMemoManagerに中継する。
+
+    Attributes:
+        manager (MemoManager): 登録先のMemoManager
+        memo_id (str): メモのID
+    """
+    __slots__ = ('manager', 'memo_id')
+
+    def __init__(self, manager: 'MemoManager', memo_id: str):
+        self.manager = manager
+        self.memo_id = memo_id
+
+    def __call__(self, memo: Memo, field: str, old) -> None:
+        self.manager._on_memo_changed(self.memo_id, memo, field, old)
+
+    def load_content(self, memo: Memo) -> str:
+        return self.manager._load_content(self.memo_id, memo)
+
+class _NgramIndex:
+    """
+    文字n-gramによる転置インデックス（内部クラス）
+
+    分かち書きのない日本語でも部分一致検索の候補を絞り込めるよう、ケースフォールドしたテキストの
+    1文字（ユニグラム）と2文字（バイグラム）ごとに、それを含むメモIDの集合を保持する。
+    casefoldは文字ごとに独立した変換（lowerと異なり語末のΣをςにしない）のため、大文字小文字を
+    区別する検索・区別しない検索のどちらでも、一致するメモが候補から漏れることはない。
+
+    Attributes:
+        postings (Dict[str, Set[str]]): n-gramをキーとするメモIDの集合の辞書
+    """
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _grams(text: str) -> Set[str]:
+        """
+        テキストに含まれるユニグラムとバイグラムの集合を返す
+
+        Args:
+            text (str): 対象のテキスト
+
+        Returns:
+            Set[str]: ケースフォールドしたテキストのn-gramの集合
+        """
+        text = text.casefold()
+        grams = set(text)
+        grams.update(map(add, text, text[1:]))
+        return grams
+
+    def clear(self) -> None:
+        """インデックスを空にする"""
+        self.postings.clear()
+
+    def add(self, memo_id: str, text: str) -> None:
+        """
+        メモのテキストをインデックスに登録する
+
+        Args:
+            memo_id (str): メモのID
+            text (str): 登録するテキスト
+        """
+        postings = self.postings
+        for gram in self._grams(text):
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = {memo_id}
+            else:
+                ids.add(memo_id)
+
+    def remove(self, memo_id: str, text: str) -> None:
+        """
+        メモのテキストをインデックスから取り除く
+
+        Args:
+            memo_id (str): メモのID
+            text (str): 登録済みのテキスト
+        """
+        self._discard(memo_id, self._grams(text))
+
+    def replace(self, memo_id: str, old_text: str, new_text: str) -> None:
+        """
+        メモのテキスト変更をインデックスに反映する（差分のn-gramのみ更新）
+
+        Args:
+            memo_id (str): メモのID
+            old_text (str): 変更前のテキスト
+            new_text (str): 変更後のテキスト
+        """
+        old_grams = self._grams(old_text)
+        new_grams = self._grams(new_text)
+        self._discard(memo_id, old_grams - new_grams)
+        postings = self.postings
+        for gram in new_grams - old_grams:
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = {memo_id}
+            else:
+                ids.add(memo_id)
+
+    def _discard(self, memo_id: str, grams: Iterable[str]) -> None:
+        """
+        指定されたn-gramの転置リストからメモIDを取り除く（内部メソッド）
+
+        Args:
+            memo_id (str): メモのID
+            grams (Iterable[str]): 対象のn-gram
+        """
+        postings = self.postings
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is not None:
+                ids.discard(memo_id)
+                if not ids:
+                    del postings[gram]
+
+    def candidates(self, search_text: str) -> Set[str]:
+        """
+        検索テキストを含む可能性のあるメモIDの集合を返す
+
+        Args:
+            search_text (str): 検索するテキスト（空文字は不可）
+
+        Returns:
+            Set[str]: 検索テキストのn-gramをすべて含むメモIDの集合
+        """
+        search_text = search_text.casefold()
+        if len(search_text) == 1:
+            grams = {search_text}
+        else:
+            grams = set(map(add, search_text, search_text[1:]))
+
+        posting_sets = []
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if not ids:
+                return set()
+            posting_sets.append(ids)
+
+        # 小さい集合から順に積集合を取る
+        posting_sets.sort(key=len)
+        result = set(posting_sets[0])
+        for ids in posting_sets[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+class _TagIndex:
+    """
+    タグからメモIDの集合を引く転置インデックス（内部クラス）
+
+    各タグの集合の要素数がそのタグの参照数となり、参照数が0になったタグは取り除かれる。
+    ソート済みのタグ一覧はタグの追加・消滅時にのみ作り直す。
+
+    Attributes:
+        memo_ids (Dict[str, Set[str]]): タグをキーとするメモIDの集合の辞書
+    """
+    def __init__(self):
+        self.memo_ids: Dict[str, Set[str]] = {}
+        self._sorted_tags: Optional[list[str]] = None
+
+    def clear(self) -> None:
+        """インデックスを空にする"""
+        self.memo_ids.clear()
+        self._sorted_tags = None
+
+    def add(self, memo_id: str, tags: Iterable[str]) -> None:
+        """
+        メモのタグをインデックスに登録する
+
+        Args:
+            memo_id (str): メモのID
+            tags (Iterable[str]): 登録するタグ
+        """
+        memo_ids = self.memo_ids
+        for tag in tags:
+            ids = memo_ids.get(tag)
+            if ids is None:
+                memo_ids[tag] = {memo_id}
+                self._sorted_tags = None
+            else:
+                ids.add(memo_id)
+
+    def remove(self, memo_id: str, tags: Iterable[str]) -> None:
+        """
+        メモのタグをインデックスから取り除く
+
+        Args:
+            memo_id (str): メモのID
+            tags (Iterable[str]): 取り除くタグ
+        """
+        memo_ids = self.memo_ids
+        for tag in tags:
+            ids = memo_ids.get(tag)
+            if ids is not None:
+                ids.discard(memo_id)
+                if not ids:
+                    del memo_ids[tag]
+                    self._sorted_tags = None
+
+    def replace(self, memo_id: str, old_tags: FrozenSet[str], new_tags: FrozenSet[str]) -> None:
+        """
+        メモのタグ変更をインデックスに反映する
+
+        Args:
+            memo_id (str): メモのID
+            old_tags (FrozenSet[str]): 変更前のタグ
+            new_tags (FrozenSet[str]): 変更後のタグ
+        """
+        self.remove(memo_id, old_tags - new_tags)
+        self.add(memo_id, new_tags - old_tags)
+
+    def sorted_tags(self) -> list[str]:
+        """
+        登録されているタグをソート済みのリストで返す
+
+        Returns:
+            list[str]: ソート済みのタグのリスト
+        """
+        if self._sorted_tags is None:
+            self._sorted_tags = sorted(self.memo_ids)
+        return list(self._sorted_tags)
+
+class _DateIndex:
+    """
+    日付順にソートされたメモの索引（内部クラス）
+
+    (日付, メモID)のタプルを昇順に保持し、範囲検索を二分探索で行う。
+
+    Attributes:
+        entries (list[tuple[str, str]]): (日付, メモID)のソート済みリスト
+    """
+    def __init__(self):
+        self.entries: list[tuple[str, str]] = []
+
+    def build(self, entries: Iterable[tuple[str, str]]) -> None:
+        """
+        (日付, メモID)の組からインデックスを作り直す
+
+        Args:
+            entries (Iterable[tuple[str, str]]): 登録する(日付, メモID)の組
+        """
+        self.entries = sorted(entries)
+
+    def add(self, memo_id: str, date: str) -> None:
+        """
+        メモの日付をインデックスに登録する
+
+        Args:
+            memo_id (str): メモのID
+            date (str): メモの日付
+        """
+        insort(self.entries, (date, memo_id))
+
+    def add_many(self, entries: list[tuple[str, str]]) -> None:
+        """
+        複数の(日付, メモID)の組をまとめて登録する
+
+        Args:
+            entries (list[tuple[str, str]]): 登録する(日付, メモID)の組
+        """
+        if len(entries) == 1:
+            insort(self.entries, entries[0])
+        elif entries:
+            # 既存の整列済みリストと新しい整列済みの組をTimsortで併合する
+            self.entries.extend(sorted(entries))
+            self.entries.sort()
+
+    def remove(self, memo_id: str, date: str) -> None:
+        """
+        メモの日付をインデックスから取り除く
+
+        Args:
+            memo_id (str): メモのID
+            date (str): 登録済みの日付
+        """
+        entry = (date, memo_id)
+        pos = bisect_left(self.entries, entry)
+        if pos < len(self.entries) and self.entries[pos] == entry:
+            del self.entries[pos]
+
+    def range(self, start_date: str, end_date: str) -> list[str]:
+        """
+        日付範囲内のメモIDを日付順に返す（O(log n + k)）
+
+        Args:
+            start_date (str): 開始日
+            end_date (str): 終了日
+
+        Returns:
+            list[str]: 範囲内のメモIDのリスト
+        """
+        lo = bisect_left(self.entries, start_date, key=itemgetter(0))
+        hi = bisect_right(self.entries, end_date, lo=lo, key=itemgetter(0))
+        return [memo_id for _, memo_id in self.entries[lo:hi]]
+
+class _ResultCache:
+    """
+    フィルター・検索の結果のLRUキャッシュ（内部クラス）
+
+    結果はデータの世代番号とともに記録される。メモが変更されて世代が進むと、
+    古い世代の結果は二度と使われないため、次の参照時にまとめて破棄される。
+
+    Attributes:
+        hits (int): キャッシュから結果を返した回数
+        misses (int): キャッシュに結果がなかった回数
+    """
+    def __init__(self, maxsize: int = _RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sync(self, generation: int) -> None:
+        """世代が進んでいれば記録済みの結果を破棄する（内部メソッド）"""
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: tuple, generation: int):
+        """
+        記録済みの結果を返す
+
+        Args:
+            key (tuple): 処理の種類と引数の組
+            generation (int): 現在のデータの世代番号
+
+        Returns:
+            記録済みの結果。ない場合はNone
+        """
+        self._sync(generation)
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: tuple, generation: int, result) -> None:
+        """
+        結果を記録する（件数が上限を超えた場合は最も長く使われていない結果を破棄する）
+
+        Args:
+            key (tuple): 処理の種類と引数の組
+            generation (int): 結果を求めた時点のデータの世代番号
+            result: 記録する結果（変更されない型にすること）
+        """
+        if generation < self._generation:
+            return
+        self._sync(generation)
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """記録済みの結果と回数をすべて破棄する"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+def _bits_from_positions(positions: Iterable[int], size: int) -> int:
+    """
+    通し番号の集まりをビット集合（i番目のビットが通し番号iに対応する整数）に変換する
+
+    Args:
+        positions (Iterable[int]): 通し番号
+        size (int): 通し番号の上限
+
+    Returns:
+        int: ビット集合
+    """
+    positions = list(positions)
+    if len(positions) * 64 < size:
+        # 疎な場合は8ビット単位にまとめたバイト列を組み立てる
+        packed = bytearray((size + 7) >> 3)
+        for position in positions:
+            packed[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(packed, 'little')
+    # 密な場合は1バイト1ビットのフラグをC実装のループで立て、2進表記から変換する
+    flags = bytearray(size)
+    deque(map(flags.__setitem__, positions, repeat(1)), maxlen=0)
+    return int(flags.translate(_FLAG_BITS)[::-1], 2) if size else 0
+
+class _BitsetIndex:
+    """
+    タグ・日付ごとのメモをビット集合で保持するインデックス（内部クラス）
+
+    各メモに追加順の通し番号を割り当て、タグ・日付ごとに該当するメモの通し番号のビットを立てた
+    整数を保持する。条件の組み合わせは整数のビット演算（AND/OR/NOT）で求める。
+
+    Attributes:
+        valid (bool): インデックスが最新かどうか。一括での追加・読み込み後はFalseとなり、
+            次の利用時にbuildで作り直す
+        live (int): 存在するメモのビット集合
+        tag_bits (Dict[str, int]): タグごとのビット集合
+        date_bits (Dict[str, int]): 日付ごとのビット集合
+        dates (list[str]): 日付の昇順のリスト（重複なし）
+    """
+    def __init__(self):
+        self.valid = False
+        self._clear()
+
+    def _clear(self) -> None:
+        """すべての登録を破棄する（内部メソッド）"""
+        self.live = 0
+        self.tag_bits: Dict[str, int] = {}
+        self.date_bits: Dict[str, int] = {}
+        self.dates: list[str] = []
+        self._ordinals: Dict[str, int] = {}
+        # 通し番号からメモIDへの対応（削除されたメモはNone）
+        self._memo_ids: list[Optional[str]] = []
+        self._holes = 0
+
+    def build(self, memo_ids: Iterable[str], tag_index: _TagIndex, date_index: _DateIndex) -> None:
+        """
+        タグ・日付のインデックスから作り直す（削除で空いた通し番号も詰める）
+
+        Args:
+            memo_ids (Iterable[str]): すべてのメモID（この順に通し番号を割り当てる）
+            tag_index (_TagIndex): タグのインデックス
+            date_index (_DateIndex): 日付のインデックス
+        """
+        self._clear()
+        self._memo_ids = list(memo_ids)
+        size = len(self._memo_ids)
+        ordinals = self._ordinals = dict(zip(self._memo_ids, range(size)))
+        self.live = (1 << size) - 1
+        self.tag_bits = {tag: _bits_from_positions(map(ordinals.__getitem__, ids), size)
+                         for tag, ids in tag_index.memo_ids.items()}
+        for date, entries in groupby(date_index.entries, key=itemgetter(0)):
+            self.date_bits[date] = _bits_from_positions(
+                map(ordinals.__getitem__, map(itemgetter(1), entries)), size)
+            self.dates.append(date)
+        self.valid = True
+
+    def add(self, memo_id: str, memo: Memo) -> None:
+        """
+        メモに新しい通し番号を割り当てて登録する
+
+        Args:
+            memo_id (str): メモのID
+            memo (Memo): 登録するメモ
+        """
+        ordinal = len(self._memo_ids)
+        self._memo_ids.append(memo_id)
+        self._ordinals[memo_id] = ordinal
+        bit = 1 << ordinal
+        self.live |= bit
+        for tag in memo.tags:
+            self.tag_bits[tag] = self.tag_bits.get(tag, 0) | bit
+        self._add_date(memo.date, bit)
+
+    def remove(self, memo_id: str, memo: Memo) -> None:
+        """
+        メモの登録を取り除く（削除が多くなった場合は次の利用時に作り直す）
+
+        Args:
+            memo_id (str): メモのID
+            memo (Memo): 削除されたメモ
+        """
+        ordinal = self._ordinals.pop(memo_id)
+        self._memo_ids[ordinal] = None
+        bit = 1 << ordinal
+        self.live &= ~bit
+        self.replace_tags(memo_id, memo.tags, frozenset(), bit)
+        self._remove_date(memo.date, bit)
+        self._holes += 1
+        if self._holes * 2 > len(self._memo_ids):
+            self.valid = False
+
+    def replace_tags(self, memo_id: str, old_tags: FrozenSet[str], new_tags: FrozenSet[str],
+                     bit: Optional[int] = None) -> None:
+        """
+        メモのタグの変更を反映する
+
+        Args:
+            memo_id (str): メモのID
+            old_tags (FrozenSet[str]): 変更前のタグ
+            new_tags (FrozenSet[str]): 変更後のタグ
+            bit (Optional[int]): メモのビット（省略時はメモIDから求める）
+        """
+        if bit is None:
+            bit = 1 << self._ordinals[memo_id]
+        for tag in old_tags - new_tags:
+            bits = self.tag_bits[tag] & ~bit
+            if bits:
+                self.tag_bits[tag] = bits
+            else:
+                del self.tag_bits[tag]
+        for tag in new_tags - old_tags:
+            self.tag_bits[tag] = self.tag_bits.get(tag, 0) | bit
+
+    def replace_date(self, memo_id: str, old_date: str, new_date: str) -> None:
+        """
+        メモの日付の変更を反映する
+
+        Args:
+            memo_id (str): メモのID
+            old_date (str): 変更前の日付
+            new_date (str): 変更後の日付
+        """
+        bit = 1 << self._ordinals[memo_id]
+        self._remove_date(old_date, bit)
+        self._add_date(new_date, bit)
+
+    def _add_date(self, date: str, bit: int) -> None:
+        """日付のビット集合にメモを加える（内部メソッド）"""
+        bits = self.date_bits.get(date)
+        if bits is None:
+            insort(self.dates, date)
+            self.date_bits[date] = bit
+        else:
+            self.date_bits[date] = bits | bit
+
+    def _remove_date(self, date: str, bit: int) -> None:
+        """日付のビット集合からメモを除く（内部メソッド）"""
+        bits = self.date_bits[date] & ~bit
+        if bits:
+            self.date_bits[date] = bits
+        else:
+            del self.date_bits[date]
+            del self.dates[bisect_left(self.dates, date)]
+
+    def tags(self, tags: Iterable[str], match_all: bool = False) -> int:
+        """
+        タグの条件に一致するメモのビット集合を返す
+
+        Args:
+            tags (Iterable[str]): タグ
+            match_all (bool): すべてのタグを持つメモに限る場合True（Falseの場合はいずれかのタグ）
+
+        Returns:
+            int: ビット集合
+        """
+        bits = [self.tag_bits.get(tag, 0) for tag in tags]
+        if not bits:
+            return self.live
+        return reduce(and_ if match_all else or_, bits)
+
+    def date_range(self, start_date: str, end_date: str) -> int:
+        """
+        日付範囲内のメモのビット集合を返す
+
+        Args:
+            start_date (str): 開始日
+            end_date (str): 終了日
+
+        Returns:
+            int: ビット集合
+        """
+        lo = bisect_left(self.dates, start_date)
+        hi = bisect_right(self.dates, end_date, lo=lo)
+        if (hi - lo) * 2 <= len(self.dates):
+            return reduce(or_, (self.date_bits[date] for date in self.dates[lo:hi]), 0)
+        # 範囲が広い場合は範囲外の日付を除く方が少ない演算で済む
+        outside = reduce(or_, (self.date_bits[date] for date in self.dates[:lo]), 0)
+        outside = reduce(or_, (self.date_bits[date] for date in self.dates[hi:]), outside)
+        return self.live & ~outside
+
+    def from_ids(self, memo_ids: Iterable[str]) -> int:
+        """
+        メモIDの集まりをビット集合に変換する（登録されていないIDは無視する）
+
+        Args:
+            memo_ids (Iterable[str]): メモID
+
+        Returns:
+            int: ビット集合
+        """
+        ordinals = self._ordinals
+        return _bits_from_positions((ordinals[memo_id] for memo_id in memo_ids if memo_id in ordinals),
+                                    len(self._memo_ids))
+
+    def to_ids(self, bits: int) -> list[str]:
+        """
+        ビット集合をメモIDのリスト（通し番号の順）に変換する
+
+        Args:
+            bits (int): ビット集合
+
+        Returns:
+            list[str]: メモIDのリスト
+        """
+        # 下位のビットから順に並べたフラグでメモIDを選ぶ
+        flags = bin(bits)[:1:-1].encode().translate(_BIT_FLAGS)
+        return list(compress(self._memo_ids, flags))
+
+class _SortedView:
     """
-    def __init__(self, title: str, date: str, content: str = "", tags: Optional[Set[str]] = None):
-        self.title = title
-        self.date = date
-        self.content = content
-        self.tags = tags or set()
+    メモIDを属性の昇順に並べた一覧（内部クラス）
+
+    (ソートキー, メモIDの数値, メモID)の組を昇順のリストで保持し、メモの追加・削除・変更時は
+    二分探索で位置を更新する。メモごとのソートキー（タイトルの照合キーなど）は変更時にだけ求め直す。
+
+    Attributes:
+        valid (bool): 一覧が最新かどうか。一括での追加・読み込み後はFalseとなり、
+            次の利用時にbuildで作り直す
+        key (Callable[[Memo], object]): メモからソートキーを求める関数
+        entries (list[tuple]): (ソートキー, メモIDの数値, メモID)の昇順のリスト
+    """
+    def __init__(self, key: Callable[[Memo], object]):
+        self.valid = False
+        self.key = key
+        self.entries: list[tuple] = []
+        self._entry_of: Dict[str, tuple] = {}
+
+    def build(self, memos: Dict[str, Memo]) -> None:
+        """
+        すべてのメモから作り直す
+
+        Args:
+            memos (Dict[str, Memo]): メモIDをキーとするメモの辞書
+        """
+        key = self.key
+        self._entry_of = {memo_id: (key(memo), int(memo_id), memo_id) for memo_id, memo in memos.items()}
+        self.entries = sorted(self._entry_of.values())
+        self.valid = True
+
+    def add(self, memo_id: str, memo: Memo) -> None:
+        """メモを並び順の位置に追加する"""
+        entry = (self.key(memo), int(memo_id), memo_id)
+        self._entry_of[memo_id] = entry
+        insort(self.entries, entry)
+
+    def remove(self, memo_id: str) -> None:
+        """メモを一覧から取り除く"""
+        entry = self._entry_of.pop(memo_id)
+        del self.entries[bisect_left(self.entries, entry)]
+
+    def update(self, memo_id: str, memo: Memo) -> None:
+        """変更されたメモを新しいソートキーの位置に移す"""
+        self.remove(memo_id)
+        self.add(memo_id, memo)
+
+    def memo_ids(self, reverse: bool = False) -> list[str]:
+        """
+        メモIDを並び順で返す
+
+        Args:
+            reverse (bool): 降順にする場合True
+
+        Returns:
+            list[str]: メモIDのリスト
+        """
+        entries = reversed(self.entries) if reverse else self.entries
+        return list(map(itemgetter(2), entries))
+
+def _match_position(match: tuple[str, int, int, bool]) -> tuple[int, int, int, int]:
+    """一致箇所の並び順のキー（parse_resume_tokenの再開位置と比較できる形）を返す"""
+    memo_id, start, end, is_title = match
+    return int(memo_id), 0 if is_title else 1, start, end
 
 class MemoManager:
     """
@@ -26,11 +868,56 @@ class MemoManager:
     
     Attributes:
         memos (Dict[str, Memo]): メモIDをキーとするメモオブジェクトの辞書
-        current_file (Optional[str]): 現在開いているファイルのパス
+        current_file (Optional[str]): 現在開いているファイル（XMLまたはデータベース）のパス
+        store (Optional[SQLiteMemoStore | MappedXMLStore]): 開いているSQLiteデータベース、または
+            読み取り専用でマップしたXMLファイル。通常のXMLファイルを扱う場合はNone
+
+    Note:
+        memosは参照専用として扱い、メモの追加・削除はMemoManagerのメソッドで行うこと。
+        検索用のn-gramインデックスやタグ・日付のインデックスは、これらのメソッドとメモ属性の変更通知によって更新される。
+        本文が未読み込みのメモは本文のn-gramインデックスに含まれず、検索時はストレージ側で候補を絞り込む。
+        XMLファイルの上書き保存（save_changes）は変更されたメモのみをジャーナルファイルに追記し、
+        load_from_fileはジャーナルを再生して保存済みの変更を復元する。
+        読み取り専用で開いたXMLファイルでは、本文はメモに保持されず参照のたびにマップから取得される。
+        フィルター・検索の結果は世代番号付きでキャッシュされ、メモの追加・削除・変更で世代が進むと使われなくなる。
     """
     def __init__(self):
         self.memos: Dict[str, Memo] = {}
         self.current_file: Optional[str] = None
+        self.store = None
+        # 本文が未読み込みのメモID
+        self._lazy_ids: Set[str] = set()
+        # 最後の保存以降に追加・削除されたメモIDと、既存のメモで変更された属性
+        self._added_ids: Set[str] = set()
+        self._dirty_fields: Dict[str, Set[str]] = {}
+        self._deleted_ids: Set[str] = set()
+        # XMLファイルの変更を追記するジャーナルと、メモIDからジャーナル上のIDへの対応
+        # （Noneの場合はメモIDをそのまま使う）
+        self._journal: Optional[MemoJournal] = None
+        self._journal_keys: Optional[Dict[str, str]] = None
+        self._journal_next_key = 0
+        self._title_index = _NgramIndex()
+        self._content_index = _NgramIndex()
+        self._tag_index = _TagIndex()
+        self._date_index = _DateIndex()
+        # 関連度検索で使うタイトル・読み込み済みの本文の文字数の合計
+        self._title_length_total = 0
+        self._content_length_total = 0
+        self._next_id = 0
+        # メモの追加・削除・変更のたびに進む世代番号と、フィルター・検索の結果のキャッシュ
+        self._generation = 0
+        self._result_cache = _ResultCache()
+        # filter_memosで使うタグ・日付のビット集合（最初の利用時に作成する）
+        self._bitsets = _BitsetIndex()
+        # 列の並べ替えで使うタイトル・日付順の一覧（最初の利用時に作成する）
+        self._title_collation: Optional[Callable[[str], object]] = None
+        self._sorted_views = {'title': _SortedView(self._title_sort_key),
+                              'date': _SortedView(attrgetter('date'))}
+
+    @property
+    def read_only(self) -> bool:
+        """読み取り専用で開いたXMLファイルを扱っているかどうか"""
+        return self.store is not None and self.store.read_only
 
     def add_memo(self) -> str:
         """
@@ -40,12 +927,188 @@ class MemoManager:
             str: 作成されたメモのID
 
         Note:
-            メモIDは既存IDの数値部分の最大値に1を加えて生成される
+            メモIDは単調増加するカウンタから割り当てられ、削除されたメモのIDは再利用されない
         """
-        memo_id = str(max(map(int, self.memos.keys()), default=-1) + 1)
         title = "新規メモ"
         date = datetime.now().strftime('%Y/%m/%d')
-        self.memos[memo_id] = Memo(title, date)
+        return self.insert_memo(Memo(title, date))
+
+    def insert_memo(self, memo: Memo) -> str:
+        """
+        既存のメモオブジェクトに新しいIDを割り当てて追加する
+
+        Args:
+            memo (Memo): 追加するメモオブジェクト
+
+        Returns:
+            str: 割り当てられたメモのID
+
+        Note:
+            他のMemoManagerに登録済みのメモは複製して追加し、元のメモは元のMemoManagerに残す。
+        """
+        memo = self._adopt(memo)
+        memo_id = self._allocate_id()
+        self.memos[memo_id] = memo
+        self._attach_memo(memo_id, memo)
+        self._added_ids.add(memo_id)
+        return memo_id
+
+    @staticmethod
+    def _adopt(memo: Memo) -> Memo:
+        """
+        追加するメモが既にMemoManagerに登録されていれば複製を返す（内部メソッド）
+
+        変更通知の登録先は1つのため、登録済みのメモをそのまま追加すると元のMemoManagerの
+        インデックスが以降の変更に追従しなくなる。
+
+        Args:
+            memo (Memo): 追加するメモオブジェクト
+
+        Returns:
+            Memo: 未登録のメモオブジェクト（未読み込みの本文は読み込んで複製する）
+        """
+        if memo._observer is None:
+            return memo
+        return Memo(memo.title, memo.date, memo.content, memo.tags, memo.source)
+
+    def merge_memos(self, memos: Iterable[Memo]) -> list[str]:
+        """
+        複数のメモオブジェクトに新しいIDを割り当てて一括で追加する
+
+        Args:
+            memos (Iterable[Memo]): 追加するメモオブジェクト
+
+        Returns:
+            list[str]: 追加順に割り当てられたメモIDのリスト
+
+        Note:
+            insert_memoと同様に、MemoManagerに登録済みのメモは複製して追加する。
+        """
+        new_ids = []
+        date_entries = []
+        for memo in map(self._adopt, memos):
+            memo_id = self._allocate_id()
+            self.memos[memo_id] = memo
+            self._attach_memo(memo_id, memo, index_date=False)
+            self._added_ids.add(memo_id)
+            new_ids.append(memo_id)
+            date_entries.append((memo.date, memo_id))
+        # 日付インデックスはまとめて併合する
+        self._date_index.add_many(date_entries)
+        return new_ids
+
+    @timed("merge_from_file")
+    def merge_from_file(self, file_path: str,
+                        progress: Optional[Callable[[int, int], None]] = None) -> list[str]:
+        """
+        XMLファイルのメモを現在のメモに追加する（インポート）
+
+        既存のメモはそのまま残り、読み込んだメモには既存のIDと重複しないIDが割り当てられる。
+        current_fileは変更されない。
+
+        Args:
+            file_path (str): 読み込むファイルのパス
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                引数はload_from_fileと同じ
+
+        Returns:
+            list[str]: 追加されたメモのIDのリスト
+
+        Note:
+            解析に失敗した場合、既存のメモは変更されない。
+            ファイルのジャーナルに保存済みの変更も反映する。
+            読み込んだメモのsourceにはファイルパスが設定される。
+        """
+        memos: Dict[str, Memo] = {str(i): memo for i, memo in enumerate(self._iter_memo_file(file_path, progress))}
+        self._apply_journal(memos, MemoJournal(journal_path(file_path)).replay(file_path) or (), len(memos))
+        ordered = [memo for _, memo in sorted(memos.items(), key=lambda item: int(item[0]))]
+        for memo in ordered:
+            memo.source = file_path
+        return self.merge_memos(ordered)
+
+    @timed("merge_from_files")
+    def merge_from_files(self, sources: Union[str, Iterable[str]], max_workers: Optional[int] = None,
+                         progress: Optional[Callable[[int, int], None]] = None) -> list[str]:
+        """
+        複数のXMLファイルのメモを並列に解析し、現在のメモに追加する
+
+        各ファイルはプロセスプールのワーカーで解析し、ファイルごとのジャーナルも反映する。
+        解析結果は指定した順にファイル単位で追加され、既存のIDと重複しないIDが割り当てられる。
+        current_fileは変更されない。
+
+        Args:
+            sources (Union[str, Iterable[str]]): 読み込むファイルパスのリスト、またはディレクトリのパス。
+                ディレクトリの場合は直下の拡張子「.xml」のファイルを名前順に読み込む
+            max_workers (Optional[int]): ワーカープロセスの最大数。Noneの場合はCPU数
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                ファイルを1つ解析するごとに(解析したファイル数, ファイル数)を引数に呼ばれる
+
+        Returns:
+            list[str]: 追加されたメモのIDのリスト
+
+        Note:
+            いずれかのファイルの解析に失敗した場合、既存のメモは変更されない。
+            読み込んだメモのsourceには読み込み元のファイルパスが設定される。
+        """
+        file_paths = self._notebook_paths(sources)
+        parsed: list = [None] * len(file_paths)
+        workers = min(max_workers or os.cpu_count() or 1, len(file_paths))
+        if workers <= 1:
+            for i, file_path in enumerate(file_paths):
+                parsed[i] = _parse_notebook(file_path)
+                if progress is not None:
+                    progress(i + 1, len(file_paths))
+        else:
+            # Tkのイベントループやワーカースレッドから呼ばれてもよいよう、forkせずに起動する
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = {executor.submit(_parse_notebook, file_path): i
+                           for i, file_path in enumerate(file_paths)}
+                try:
+                    for done, future in enumerate(as_completed(futures), 1):
+                        parsed[futures[future]] = future.result()
+                        if progress is not None:
+                            progress(done, len(file_paths))
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        return self.merge_memos(Memo(title, date, content, tags, file_path)
+                                for file_path, entries in zip(file_paths, parsed)
+                                for title, date, content, tags in entries)
+
+    @staticmethod
+    def _notebook_paths(sources: Union[str, Iterable[str]]) -> list[str]:
+        """
+        読み込むメモ帳ファイルのパスのリストを作成する（内部メソッド）
+
+        Args:
+            sources (Union[str, Iterable[str]]): ファイルパスのリスト、またはファイル・ディレクトリのパス
+
+        Returns:
+            list[str]: ファイルパスのリスト
+        """
+        if isinstance(sources, str):
+            if not os.path.isdir(sources):
+                return [sources]
+            return [os.path.join(sources, name) for name in sorted(os.listdir(sources))
+                    if name.lower().endswith(_NOTEBOOK_SUFFIX)
+                    and os.path.isfile(os.path.join(sources, name))]
+        return list(sources)
+
+    def _allocate_id(self) -> str:
+        """
+        新しいメモIDを割り当てる（内部メソッド）
+
+        Returns:
+            str: 未使用のメモID
+        """
+        memo_id = str(self._next_id)
+        self._next_id += 1
         return memo_id
 
     def delete_memo(self, memo_id: str) -> bool:
@@ -59,139 +1122,909 @@ class MemoManager:
             bool: 削除が成功した場合はTrue、メモが存在しない場合はFalse
         """
         if memo_id in self.memos:
-            del self.memos[memo_id]
+            self._detach_memo(memo_id, self.memos.pop(memo_id))
+            if memo_id in self._added_ids:
+                # 保存前に追加・削除されたメモは保存先に書き込む必要がない
+                self._added_ids.discard(memo_id)
+            else:
+                self._dirty_fields.pop(memo_id, None)
+                self._deleted_ids.add(memo_id)
             return True
         return False
 
-    def get_all_tags(self) -> list[str]:
+    def _attach_memo(self, memo_id: str, memo: Memo, index_date: bool = True) -> None:
+        """
+        メモの変更通知を受け取るよう登録し、インデックスに追加する（内部メソッド）
+
+        Args:
+            memo_id (str): メモのID
+            memo (Memo): 登録するメモオブジェクト
+            index_date (bool): 日付インデックスにも追加するかどうか。
+                一括追加で日付インデックスをまとめて更新する場合はFalse
+        """
+        memo._observer = _MemoBinding(self, memo_id)
+        self._generation += 1
+        self._title_index.add(memo_id, memo.title)
+        self._title_length_total += len(memo.title)
+        if memo._content is None:
+            self._lazy_ids.add(memo_id)
+        else:
+            self._content_index.add(memo_id, memo._content)
+            self._content_length_total += len(memo._content)
+        self._tag_index.add(memo_id, memo.tags)
+        if index_date:
+            self._date_index.add(memo_id, memo.date)
+            if self._bitsets.valid:
+                self._bitsets.add(memo_id, memo)
+            for view in self._sorted_views.values():
+                if view.valid:
+                    view.add(memo_id, memo)
+        else:
+            # 一括で追加する場合、ビット集合と並び順の一覧は次の利用時にまとめて作り直す
+            self._bitsets.valid = False
+            for view in self._sorted_views.values():
+                view.valid = False
+
+    def _detach_memo(self, memo_id: str, memo: Memo) -> None:
+        """
+        メモの変更通知の登録を解除し、インデックスから取り除く（内部メソッド）
+
+        Args:
+            memo_id (str): メモのID
+            memo (Memo): 削除されたメモオブジェクト
+        """
+        memo._observer = None
+        self._generation += 1
+        self._title_index.remove(memo_id, memo.title)
+        self._title_length_total -= len(memo.title)
+        if memo._content is None:
+            self._lazy_ids.discard(memo_id)
+        else:
+            self._content_index.remove(memo_id, memo._content)
+            self._content_length_total -= len(memo._content)
+        self._tag_index.remove(memo_id, memo.tags)
+        self._date_index.remove(memo_id, memo.date)
+        if self._bitsets.valid:
+            self._bitsets.remove(memo_id, memo)
+        for view in self._sorted_views.values():
+            if view.valid:
+                view.remove(memo_id)
+
+    def _rebuild_indexes(self) -> None:
+        """
+        すべてのメモを変更通知に登録し、インデックスを作り直す（内部メソッド）
+        """
+        self._generation += 1
+        self._title_index.clear()
+        self._content_index.clear()
+        self._tag_index.clear()
+        self._lazy_ids.clear()
+        self._title_length_total = 0
+        self._content_length_total = 0
+        for memo_id, memo in self.memos.items():
+            self._attach_memo(memo_id, memo, index_date=False)
+        self._date_index.build((memo.date, memo_id) for memo_id, memo in self.memos.items())
+
+    def _on_memo_changed(self, memo_id: str, memo: Memo, field: str, old) -> None:
+        """
+        メモ属性の変更をインデックスに反映する（内部メソッド）
+
+        Args:
+            memo_id (str): 変更されたメモのID
+            memo (Memo): 変更されたメモオブジェクト
+            field (str): 変更された属性名
+            old: 変更前の値
+        """
+        self._generation += 1
+        if memo_id not in self._added_ids:
+            fields = self._dirty_fields.get(memo_id)
+            if fields is None:
+                self._dirty_fields[memo_id] = {field}
+            else:
+                fields.add(field)
+        if field == 'title':
+            self._title_index.replace(memo_id, old, memo.title)
+            self._title_length_total += len(memo.title) - len(old)
+            if self._sorted_views['title'].valid:
+                self._sorted_views['title'].update(memo_id, memo)
+        elif field == 'content':
+            if old is None:
+                # 未読み込みだった本文が置き換えられた
+                self._lazy_ids.discard(memo_id)
+                self._content_index.add(memo_id, memo._content)
+            else:
+                self._content_index.replace(memo_id, old, memo._content)
+                self._content_length_total -= len(old)
+            self._content_length_total += len(memo._content)
+        elif field == 'tags':
+            self._tag_index.replace(memo_id, old, memo.tags)
+            if self._bitsets.valid:
+                self._bitsets.replace_tags(memo_id, old, memo.tags)
+        elif field == 'date':
+            self._date_index.remove(memo_id, old)
+            self._date_index.add(memo_id, memo.date)
+            if self._bitsets.valid:
+                self._bitsets.replace_date(memo_id, old, memo.date)
+            if self._sorted_views['date'].valid:
+                self._sorted_views['date'].update(memo_id, memo)
+
+    def _load_content(self, memo_id: str, memo: Memo) -> str:
+        """
+        未読み込みのメモ本文をストレージから読み込む（内部メソッド）
+
+        読み込んだ本文はメモに保持され、本文のn-gramインデックスに登録される。
+        ただし読み取り専用の場合は、本文をメモに保持しない。
+
+        Args:
+            memo_id (str): メモのID
+            memo (Memo): 対象のメモオブジェクト
+
+        Returns:
+            str: メモの本文
+        """
+        if self.read_only:
+            # 読み取り専用のファイルの本文はメモに保持せず、ストレージのキャッシュから返す
+            return self.store.load_content(memo_id)
+        content = self.store.load_content(memo_id) if self.store is not None else ""
+        memo._content = content
+        self._lazy_ids.discard(memo_id)
+        self._content_index.add(memo_id, content)
+        self._content_length_total += len(content)
+        return content
+
+    def _fetch_contents(self, memo_ids: Set[str]) -> Dict[str, str]:
+        """
+        未読み込みのメモ本文をメモに保持せずにまとめて取得する（内部メソッド）
+
+        Args:
+            memo_ids (Set[str]): 本文が未読み込みのメモID
+
+        Returns:
+            Dict[str, str]: メモIDをキーとする本文の辞書
+        """
+        if not memo_ids or self.store is None:
+            return {}
+        return self.store.load_contents(memo_ids)
+
+    def get_all_tags(self) -> list[str]:
+        """
+        すべてのメモから一意のタグを収集し、ソートされたリストとして返す
+        
+        Returns:
+            list[str]: すべてのユニークなタグを含むソート済みリスト
+
+        Note:
+            タグインデックスから取得するため、メモの件数によらずタグの種類数に比例した時間で返る。
+        """
+        return self._tag_index.sorted_tags()
+
+    @timed("filter_by_tags")
+    def filter_by_tags(self, tags: Iterable[str]) -> Set[str]:
+        """
+        指定されたタグのいずれかを持つメモIDを取得する
+
+        Args:
+            tags (Iterable[str]): 絞り込みに使うタグ
+
+        Returns:
+            Set[str]: いずれかのタグを持つメモIDの集合
+        """
+        tags = frozenset(tags)
+        key = ('tags', tags)
+        cached = self._result_cache.get(key, self._generation)
+        if cached is not None:
+            return set(cached)
+        result: Set[str] = set()
+        for tag in tags:
+            ids = self._tag_index.memo_ids.get(tag)
+            if ids:
+                result |= ids
+        self._result_cache.put(key, self._generation, frozenset(result))
+        return result
+
+    def add_tags(self, memo_id: str, tags: Iterable[str]) -> None:
+        """
+        メモにタグを追加する
+
+        Args:
+            memo_id (str): 対象のメモID
+            tags (Iterable[str]): 追加するタグ
+        """
+        memo = self.memos[memo_id]
+        new_tags = memo.tags.union(tags)
+        if new_tags != memo.tags:
+            memo.tags = new_tags
+
+    def update_content(self, memo_id: str, content: str) -> bool:
+        """
+        メモの本文を置き換える
+
+        エディタでの連続した編集をまとめて反映するためのメソッド。本文が変わっていない場合は
+        何もしないため、インデックスの更新と変更の記録は実際に変更があった場合に1回だけ行われる。
+
+        Args:
+            memo_id (str): 対象のメモID
+            content (str): 新しい本文
+
+        Returns:
+            bool: 本文が変更された場合はTrue
+        """
+        memo = self.memos[memo_id]
+        # 未読み込みの本文は読み込んでから比較する（読み取り専用の場合はメモに保持されない）
+        current = memo._content if memo._content is not None else memo.content
+        if current == content:
+            return False
+        memo.content = content
+        return True
+
+    def remove_tags(self, memo_id: str, tags: Iterable[str]) -> None:
         """
-        すべてのメモから一意のタグを収集し、ソートされたリストとして返す
-        
-        Returns:
-            list[str]: すべてのユニークなタグを含むソート済みリスト
+        メモからタグを削除する
+
+        Args:
+            memo_id (str): 対象のメモID
+            tags (Iterable[str]): 削除するタグ
         """
-        all_tags = set()
-        for memo in self.memos.values():
-            all_tags.update(memo.tags)
-        return sorted(all_tags)
+        memo = self.memos[memo_id]
+        new_tags = memo.tags.difference(tags)
+        if new_tags != memo.tags:
+            memo.tags = new_tags
 
     def get_date_range(self) -> tuple[str, str]:
         """
-        すべてのメモの日付範囲を取得する
+        すべてのメモの日付範囲を取得する（日付インデックスの両端を参照するためO(1)）
         
         Returns:
             tuple[str, str]: (最古の日付, 最新の日付)のタプル。メモが存在しない場合は空文字のタプル
         """
-        if not self.memos:
+        entries = self._date_index.entries
+        if not entries:
             return "", ""
-        dates = [memo.date for memo in self.memos.values()]
-        return min(dates), max(dates)
+        return entries[0][0], entries[-1][0]
 
+    @timed("filter_by_date")
     def filter_by_date(self, start_date: str, end_date: str) -> list[str]:
         """
         指定された日付範囲内のメモIDを取得する
+
+        日付インデックスを二分探索するため、O(log n + 該当件数)で返る。
         
         Args:
             start_date (str): 開始日（YYYY/MM/DD形式）
             end_date (str): 終了日（YYYY/MM/DD形式）
             
         Returns:
-            list[str]: 日付範囲内のメモIDのリスト
+            list[str]: 日付範囲内のメモIDの日付順のリスト
         """
-        filtered_ids = []
-        for memo_id, memo in self.memos.items():
-            if start_date <= memo.date <= end_date:
-                filtered_ids.append(memo_id)
-        return filtered_ids
+        key = ('date', start_date, end_date)
+        cached = self._result_cache.get(key, self._generation)
+        if cached is not None:
+            return list(cached)
+        result = self._date_index.range(start_date, end_date)
+        self._result_cache.put(key, self._generation, tuple(result))
+        return result
+
+    @timed("filter_memos")
+    def filter_memos(self, tags: Optional[Iterable[str]] = None, match_all_tags: bool = False,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     query: Optional[str] = None, case_sensitive: bool = False) -> list[str]:
+        """
+        タグ・日付範囲・検索クエリの条件をすべて満たすメモIDを取得する
+
+        タグ・日付の条件をメモの通し番号上のビット集合として求め、ビット演算で組み合わせる。
+        検索クエリは絞り込んだメモだけを対象に評価する。指定されなかった条件（Noneや空のタグ）は
+        絞り込みに使わない。
+
+        Args:
+            tags (Optional[Iterable[str]]): 絞り込みに使うタグ
+            match_all_tags (bool): すべてのタグを持つメモに限る場合True（Falseの場合はいずれかのタグ）
+            start_date (Optional[str]): 開始日（YYYY/MM/DD形式）。Noneの場合は最古の日付から
+            end_date (Optional[str]): 終了日（YYYY/MM/DD形式）。Noneの場合は最新の日付まで
+            query (Optional[str]): 検索クエリ（query_memosと同じ構文）。一致箇所のあるメモに限る
+            case_sensitive (bool): 検索クエリで大文字小文字を区別するかどうか
+
+        Returns:
+            list[str]: 条件に一致するメモIDのリスト（メモの追加順）
+
+        Raises:
+            QuerySyntaxError: クエリの構文が正しくない場合
+
+        Note:
+            タグ・日付のビット集合はメモの変更に合わせて更新され、一括の読み込み後は最初の利用時に作り直される。
+            結果はフィルター・検索のキャッシュに記録される。
+        """
+        tags = frozenset(tags or ())
+        query = query if query and query.strip() else None
+        key = ('filter', tags, match_all_tags, start_date, end_date, query, case_sensitive)
+        cached = self._result_cache.get(key, self._generation)
+        if cached is not None:
+            return list(cached)
+
+        plan = None if query is None else compile_query(query, case_sensitive)
+        bitsets = self._bitsets
+        if not bitsets.valid:
+            bitsets.build(self.memos, self._tag_index, self._date_index)
+        bits = bitsets.live
+        if tags:
+            bits &= bitsets.tags(tags, match_all_tags)
+        if start_date is not None or end_date is not None:
+            first_date, last_date = self.get_date_range()
+            bits &= bitsets.date_range(start_date or first_date, end_date or last_date)
+        if plan is not None and bits:
+            # クエリはタグ・日付で絞り込んだメモだけを対象に評価し、一致箇所は求めない
+            bits &= bitsets.from_ids(plan.matching_ids(self, bitsets.to_ids(bits)))
+        result = bitsets.to_ids(bits)
+        self._result_cache.put(key, self._generation, tuple(result))
+        return result
+
+    def _title_sort_key(self, memo: Memo) -> object:
+        """タイトル順の一覧で使うソートキー（照合キー）を返す（内部メソッド）"""
+        collation = self._title_collation
+        return memo.title if collation is None else collation(memo.title)
+
+    def set_title_collation(self, collation: Optional[Callable[[str], object]]) -> None:
+        """
+        タイトル順で使う照合関数を設定する
+
+        照合キーはメモごとに記録され、タイトルが変更された時にだけ求め直す。
+
+        Args:
+            collation (Optional[Callable[[str], object]]): タイトルから照合キーを求める関数
+                （locale.strxfrmなど）。Noneの場合は文字コード順
+        """
+        if collation is self._title_collation:
+            return
+        self._title_collation = collation
+        self._sorted_views['title'].valid = False
+        self._generation += 1
+
+    @timed("sorted_memo_ids")
+    def sorted_memo_ids(self, field: str, reverse: bool = False) -> list[str]:
+        """
+        すべてのメモIDを指定した属性の順に取得する
+
+        並び順の一覧はメモの追加・削除・変更のたびに更新されるため、並べ替えの計算は
+        一括読み込み後の最初の呼び出しでのみ行われる。同じ値のメモはメモIDの順に並ぶ。
+
+        Args:
+            field (str): 並べ替えに使う属性（'title'または'date'）
+            reverse (bool): 降順にする場合True
+
+        Returns:
+            list[str]: メモIDのリスト
+
+        Raises:
+            ValueError: 並べ替えに使えない属性が指定された場合
+        """
+        view = self._sorted_views.get(field)
+        if view is None:
+            raise ValueError(f"並べ替えに使えない属性です: {field}")
+        key = ('sorted', field, reverse)
+        cached = self._result_cache.get(key, self._generation)
+        if cached is not None:
+            return list(cached)
+        if not view.valid:
+            view.build(self.memos)
+        result = view.memo_ids(reverse)
+        self._result_cache.put(key, self._generation, tuple(result))
+        return result
 
-    def save_to_file(self, file_path: str) -> None:
+    def result_cache_stats(self) -> Dict[str, int]:
+        """
+        フィルター・検索の結果のキャッシュの利用状況を返す
+
+        Returns:
+            Dict[str, int]: hits（キャッシュから返した回数）、misses（求め直した回数）、
+                size（記録中の結果の数）、maxsize（記録できる結果の数）、generation（データの世代番号）
+        """
+        cache = self._result_cache
+        return {"hits": cache.hits, "misses": cache.misses, "size": len(cache),
+                "maxsize": cache.maxsize, "generation": self._generation}
+
+    @timed("save_to_file")
+    def save_to_file(self, file_path: str, indent: Optional[str] = "    ",
+                     progress: Optional[Callable[[int, int], None]] = None) -> None:
         """
         メモをXMLファイルに保存する
+
+        メモは1件ずつバッファ付きの一時ファイルに直接書き出され、書き込み完了後に
+        保存先のファイルと置き換えられる。途中で失敗しても既存のファイルは壊れない。
         
         Args:
             file_path (str): 保存先のファイルパス
+            indent (Optional[str]): 整形に使うインデント文字列。Noneの場合は改行・インデントなしで出力する
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                メモを1件書き込むごとに(書き込んだメモ数, 全メモ数)を引数に呼ばれる
+
+        Raises:
+            ValueError: XMLで扱えない制御文字がメモに含まれている場合
         """
-        root = ET.Element("memos")
-        for memo_id, memo in self.memos.items():
-            memo_elem = ET.SubElement(root, "memo")
-            name = ET.SubElement(memo_elem, "name")
-            name.text = memo.title
-            date = ET.SubElement(memo_elem, "date")
-            date.text = memo.date
-            content = ET.SubElement(memo_elem, "content")
-            content.text = memo.content
-            tags = ET.SubElement(memo_elem, "tags")
-            tags.text = ','.join(sorted(memo.tags))
-
-        xml_str = minidom.parseString(ET.tostring(root, 'utf-8')).toprettyxml(indent="    ")
-        
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(xml_str)
+        temp_path = f"{file_path}.{os.urandom(4).hex()}.tmp"
+        try:
+            with open(temp_path, 'x', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as file:
+                self._write_xml(file, indent, progress)
+                file.flush()
+                os.fsync(file.fileno())
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
         
+        # 書き込み時にすべての本文が読み込まれているため、以降はXMLファイルとして扱う。
+        # 読み取り専用の場合は本文がメモに保持されないため、マップしたファイルを引き続き使う
+        if not self.read_only:
+            self._close_store()
+        self._clear_changes()
         self.current_file = file_path
 
-    def load_from_file(self, file_path: str) -> None:
+        # 保存したファイルにはすべての変更が含まれるため、ジャーナルは空の状態から始める
+        self._journal = MemoJournal(journal_path(file_path))
+        self._journal.remove()
+        keys = {memo_id: str(i) for i, memo_id in enumerate(self.memos)}
+        self._journal_keys = None if all(memo_id == key for memo_id, key in keys.items()) else keys
+        self._journal_next_key = len(keys)
+
+    @timed("save_changes")
+    def save_changes(self, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        現在開いているファイルに変更を保存する（上書き保存）
+
+        XMLファイルの場合は、前回の保存以降に追加・変更・削除されたメモのみをジャーナル
+        ファイルに追記するため、保存にかかる時間は変更されたメモの数に比例する。
+        ジャーナルがXMLファイルに対して一定の大きさを超えた場合はXMLファイルに統合する。
+        データベースの場合はsave_to_databaseと同じく変更された行のみを書き込む。
+
+        Args:
+            progress (Optional[Callable[[int, int], None]]): XMLファイル全体を書き直す場合の
+                進捗通知用のコールバック。引数はsave_to_fileと同じ
+
+        Raises:
+            ValueError: 保存先のファイルが開かれていない場合、読み取り専用で開いている場合、
+                またはXMLで扱えない制御文字がメモに含まれている場合
+        """
+        if self.current_file is None:
+            raise ValueError("保存先のファイルが開かれていません")
+        if self.read_only:
+            raise ValueError("読み取り専用で開いたファイルには上書き保存できません")
+        if self.store is not None:
+            self.save_to_database()
+            return
+        if self._journal is None or not os.path.exists(self.current_file):
+            self.save_to_file(self.current_file, progress=progress)
+            return
+
+        records = self._journal_records()
+        if records:
+            if not self._journal.active:
+                self._journal.start(self.current_file)
+            self._journal.append(records)
+            self._clear_changes()
+
+        limit = max(_JOURNAL_COMPACT_MIN_SIZE, os.path.getsize(self.current_file) * _JOURNAL_COMPACT_RATIO)
+        if self._journal.size() > limit:
+            self.compact_journal(progress)
+
+    @timed("compact_journal")
+    def compact_journal(self, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        ジャーナルの内容をXMLファイルに統合し、ジャーナルを削除する
+
+        Args:
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                引数はsave_to_fileと同じ
+
+        Raises:
+            ValueError: XMLファイルが開かれていない場合、または読み取り専用で開いている場合
+        """
+        if self.read_only:
+            raise ValueError("読み取り専用で開いたファイルには上書き保存できません")
+        if self.current_file is None or self.store is not None:
+            raise ValueError("XMLファイルが開かれていません")
+        self.save_to_file(self.current_file, progress=progress)
+
+    def _journal_records(self) -> list[dict]:
+        """
+        前回の保存以降の変更をジャーナルのレコードに変換する（内部メソッド）
+
+        Returns:
+            list[dict]: 削除、追加・変更の順に並んだレコードのリスト
+
+        Raises:
+            ValueError: XMLで扱えない制御文字がメモに含まれている場合
+        """
+        records = []
+        for memo_id in sorted(self._added_ids.union(self._dirty_fields), key=int):
+            memo = self.memos[memo_id]
+            added = memo_id in self._added_ids
+            record = {"op": "add" if added else "set", "id": self._journal_key(memo_id)}
+            for field in _MEMO_FIELDS if added else sorted(self._dirty_fields[memo_id]):
+                if field == 'tags':
+                    record[field] = sorted(memo.tags)
+                else:
+                    value = getattr(memo, field)
+                    if _INVALID_XML_CHARS.search(value):
+                        raise ValueError(f"XMLに保存できない制御文字が含まれています: {field}")
+                    record[field] = value
+            records.append(record)
+        deleted = [{"op": "del", "id": self._journal_key(memo_id)}
+                   for memo_id in sorted(self._deleted_ids, key=int)]
+        return deleted + records
+
+    def _journal_key(self, memo_id: str) -> str:
+        """
+        メモIDに対応するジャーナル上のIDを返す（内部メソッド）
+
+        ジャーナル上のIDは、XMLファイルを読み込み直してジャーナルを再生したときに
+        割り当てられるメモIDと一致する。
+
+        Args:
+            memo_id (str): メモのID
+
+        Returns:
+            str: ジャーナル上のID
+        """
+        if self._journal_keys is None:
+            return memo_id
+        key = self._journal_keys.get(memo_id)
+        if key is None:
+            key = self._journal_keys[memo_id] = str(self._journal_next_key)
+            self._journal_next_key += 1
+        return key
+
+    def _write_xml(self, file, indent: Optional[str],
+                   progress: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        メモをXML形式でファイルに書き込む（内部メソッド）
+
+        Args:
+            file: 書き込み先のファイルオブジェクト
+            indent (Optional[str]): インデント文字列。Noneの場合は整形しない
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック
+        """
+        file.write('<?xml version="1.0" ?>')
+        if not self.memos:
+            file.write('\n<memos/>\n' if indent is not None else '<memos/>')
+            return
+
+        if indent is None:
+            newline = memo_indent = field_indent = ""
+        else:
+            newline, memo_indent, field_indent = "\n", "\n" + indent, "\n" + indent * 2
+
+        total = len(self.memos)
+        file.write(newline + "<memos>")
+        for count, memo in enumerate(self.memos.values(), 1):
+            file.write(''.join((
+                memo_indent, "<memo>",
+                field_indent, _xml_element("name", memo.title),
+                field_indent, _xml_element("date", memo.date),
+                field_indent, _xml_element("content", memo.content),
+                field_indent, _xml_element("tags", ','.join(sorted(memo.tags))),
+                memo_indent, "</memo>",
+            )))
+            if progress:
+                progress(count, total)
+        file.write(newline + "</memos>" + newline)
+
+    @timed("load_from_file")
+    def load_from_file(self, file_path: str,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       read_only: bool = False) -> None:
         """
         XMLファイルからメモを読み込む
 
         既存のメモはすべて削除され、読み込んだメモには0から順にIDが再割り当てされる。
+        ファイルはiterparseで逐次解析し、変換済みの<memo>要素は直ちに破棄するため、
+        XMLツリー全体をメモリに保持しない。
+
+        読み取り専用の場合はファイルをメモリマップし、本文は文字列にせずバイト位置のみを記録する。
+        本文は参照された時点でデコードされ、メモには保持されない（最近使った本文のみキャッシュされる）。
+        そのため常駐するメモリはタイトル・日付・タグの量に比例する。
 
         Args:
             file_path (str): 読み込むファイルのパス
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                メモを1件読み込むごとに(読み込んだメモ数, 読み込んだバイト数)を引数に呼ばれる
+            read_only (bool): 読み取り専用で開く場合True。上書き保存はできなくなる
+
+        Note:
+            解析に失敗した場合、既存のメモは変更されない。
         """
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        self.memos.clear()
-        
-        for i, memo_elem in enumerate(root.findall('memo')):
-            memo_id = str(i)
-            title = memo_elem.find('name').text or "新規メモ"
-            date_text = memo_elem.find('date').text if memo_elem.find('date') is not None else datetime.now().strftime('%Y/%m/%d')
-            content = memo_elem.find('content').text or ""
-            tags_text = memo_elem.find('tags').text if memo_elem.find('tags') is not None else ""
-            tags = set(filter(None, tags_text.split(','))) if tags_text else set()
-            
-            self.memos[memo_id] = Memo(title, date_text, content, tags)
+        store = None
+        memos: Dict[str, Memo] = {}
+        if read_only:
+            from mmap_store import MappedXMLStore
+
+            store = MappedXMLStore(file_path)
+            try:
+                for i, (title, date, tags_text) in enumerate(store.scan(progress)):
+                    tags = filter(None, tags_text.split(',')) if tags_text else None
+                    memos[str(i)] = Memo(title, date, None, tags)
+            except BaseException:
+                store.close()
+                raise
+        else:
+            for i, memo in enumerate(self._iter_memo_file(file_path, progress)):
+                memos[str(i)] = memo
+
+        # 前回の保存以降にジャーナルに追記された変更を反映する
+        # （読み取り専用の場合はジャーナルの破損した末尾も切り詰めない）
+        journal = MemoJournal(journal_path(file_path))
+        try:
+            records = journal.replay(file_path, repair=not read_only)
+        except BaseException:
+            if store is not None:
+                store.close()
+            raise
+        next_id = self._apply_journal(memos, records or (), len(memos))
+
+        self._close_store()
+        self.store = store
+        self._replace_memos(memos, next_id)
+        self._journal = None if read_only else journal
+        self._journal_keys = None
         
         self.current_file = file_path
 
-    def export_memos(self, file_path: str, memo_ids: Optional[list[str]] = None) -> None:
+    @staticmethod
+    def _apply_journal(memos: Dict[str, Memo], records: Iterable[dict], next_id: int) -> int:
         """
-        メモをテキストファイルにエクスポートする
-        
+        ジャーナルのレコードを読み込んだメモに反映する（内部メソッド）
+
         Args:
-            file_path (str): エクスポート先のファイルパス
-            memo_ids (Optional[list[str]]): エクスポートするメモのIDリスト。Noneの場合は全メモをエクスポート
+            memos (Dict[str, Memo]): XMLファイルから読み込んだメモの辞書
+            records (Iterable[dict]): ジャーナルのレコード
+            next_id (int): 次に割り当てるメモIDの数値
+
+        Returns:
+            int: ジャーナルで追加されたメモを考慮した、次に割り当てるメモIDの数値
         """
-        with open(file_path, 'w', encoding='utf-8') as file:
-            target_memos = []
-            if memo_ids:
-                # 選択されたメモのみエクスポート
-                target_memos = [self.memos[memo_id] for memo_id in memo_ids if memo_id in self.memos]
-            else:
-                # すべてのメモをエクスポート
-                target_memos = list(self.memos.values())
+        for record in records:
+            op, key = record["op"], record["id"]
+            if op == "add":
+                memos[key] = Memo(record["title"], record["date"], record["content"], record["tags"])
+                next_id = max(next_id, int(key) + 1)
+            elif op == "set":
+                memo = memos.get(key)
+                if memo is not None:
+                    for field in _MEMO_FIELDS:
+                        if field in record:
+                            setattr(memo, field, record[field])
+            elif op == "del":
+                memos.pop(key, None)
+        return next_id
+
+    @timed("open_database")
+    def open_database(self, db_path: str) -> None:
+        """
+        SQLiteデータベースからメモを読み込む（存在しない場合は新規作成する）
+
+        タイトル・日付・タグのみを読み込み、本文は各メモが最初に参照された時点で読み込む。
+        メモIDにはデータベースの行IDがそのまま使われる。
+
+        Args:
+            db_path (str): データベースファイルのパス
+        """
+        from sqlite_store import SQLiteMemoStore
+
+        store = SQLiteMemoStore(db_path)
+        memos: Dict[str, Memo] = {}
+        next_id = 0
+        try:
+            for memo_id, title, date, tags_text in store.iter_metadata():
+                tags = filter(None, tags_text.split(',')) if tags_text else None
+                memos[memo_id] = Memo(title, date, None, tags)
+                next_id = int(memo_id) + 1
+        except BaseException:
+            store.close()
+            raise
+
+        self._close_store()
+        self.store = store
+        self._replace_memos(memos, next_id)
+        self._journal = None
+        self.current_file = db_path
+
+    @timed("save_to_database")
+    def save_to_database(self, db_path: Optional[str] = None) -> None:
+        """
+        メモをSQLiteデータベースに保存する
+
+        開いているデータベースに保存する場合は、前回の保存以降に追加・変更・削除された
+        メモの行のみを1つのトランザクションで書き込む。別のデータベースを指定した場合は
+        すべてのメモを書き込み、以降はそのデータベースを使用する。
+
+        Args:
+            db_path (Optional[str]): 保存先のデータベースのパス。Noneの場合は開いているデータベース
+
+        Raises:
+            ValueError: db_pathがNoneでデータベースが開かれていない場合
+        """
+        database = self.store if self.store is not None and not self.store.read_only else None
+        if db_path is None or (database is not None and db_path == database.db_path):
+            if database is None:
+                raise ValueError("データベースが開かれていません")
+            rows = [self._memo_row(memo_id, self.memos[memo_id])
+                    for memo_id in sorted(self._added_ids.union(self._dirty_fields), key=int)]
+            self.store.write_changes(rows, self._deleted_ids)
+        else:
+            from sqlite_store import SQLiteMemoStore
+
+            store = SQLiteMemoStore(db_path)
+            try:
+                # 未読み込みの本文はここで元のストレージから読み込まれる
+                store.replace_all((memo_id, memo.title, memo.date, memo.content, ','.join(sorted(memo.tags)))
+                                  for memo_id, memo in self.memos.items())
+            except BaseException:
+                store.close()
+                raise
+            self._close_store()
+            self.store = store
+            self._journal = None
+
+        self._clear_changes()
+        self.current_file = self.store.db_path
+
+    @staticmethod
+    def _memo_row(memo_id: str, memo: Memo) -> tuple:
+        """
+        メモをデータベースの行に変換する（内部メソッド）
+
+        Args:
+            memo_id (str): メモのID
+            memo (Memo): メモオブジェクト
+
+        Returns:
+            tuple: (メモID, タイトル, 日付, 本文, カンマ区切りのタグ)。本文が未読み込みの場合はNone
+        """
+        return memo_id, memo.title, memo.date, memo._content, ','.join(sorted(memo.tags))
 
-            for i, memo in enumerate(target_memos):
-                self._write_memo_to_file(file, memo)
-                # 最後のメモ以外は区切り線を追加
-                if i < len(target_memos) - 1:
-                    file.write("-" * 50 + "\n")
+    def _close_store(self) -> None:
+        """開いているデータベースを閉じる（内部メソッド）"""
+        if self.store is not None:
+            self.store.close()
+            self.store = None
 
-    def _write_memo_to_file(self, file, memo: Memo) -> None:
+    def _replace_memos(self, memos: Dict[str, Memo], next_id: int) -> None:
         """
-        メモの内容をファイルに書き込む（内部メソッド）
+        すべてのメモを置き換え、インデックスと変更履歴を初期化する（内部メソッド）
+
+        Args:
+            memos (Dict[str, Memo]): 新しいメモの辞書
+            next_id (int): 次に割り当てるメモIDの数値
+        """
+        for memo in self.memos.values():
+            memo._observer = None
+        self.memos = memos
+        self._next_id = next_id
+        self._clear_changes()
+        self._rebuild_indexes()
+
+    def _clear_changes(self) -> None:
+        """前回の保存以降の変更履歴を初期化する（内部メソッド）"""
+        self._added_ids.clear()
+        self._dirty_fields.clear()
+        self._deleted_ids.clear()
+
+    @staticmethod
+    def _iter_memo_file(file_path: str,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Iterator[Memo]:
+        """
+        XMLファイルを逐次解析し、メモオブジェクトを順に返す（内部メソッド）
+
+        Args:
+            file_path (str): 読み込むファイルのパス
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック
+
+        Yields:
+            Memo: ファイル内の順序で生成されたメモオブジェクト
+        """
+        default_date = None
+        count = 0
+        depth = 0
+        root = None
+        with open(file_path, 'rb') as file:
+            for event, elem in ET.iterparse(file, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    depth += 1
+                    continue
+
+                depth -= 1
+                if depth != 1 or elem.tag != 'memo':
+                    continue
+
+                name_elem = elem.find('name')
+                date_elem = elem.find('date')
+                content_elem = elem.find('content')
+                tags_elem = elem.find('tags')
+
+                title = (name_elem.text if name_elem is not None else None) or "新規メモ"
+                date_text = date_elem.text if date_elem is not None else None
+                if not date_text:
+                    if default_date is None:
+                        default_date = datetime.now().strftime('%Y/%m/%d')
+                    date_text = default_date
+                content = (content_elem.text if content_elem is not None else None) or ""
+                tags_text = tags_elem.text if tags_elem is not None else None
+                tags = filter(None, tags_text.split(',')) if tags_text else None
+
+                # 変換済みの要素を破棄してメモリ使用量を抑える
+                root.clear()
+
+                yield Memo(title, date_text, content, tags)
+
+                count += 1
+                if progress is not None:
+                    progress(count, file.tell())
+
+    @timed("export_memos")
+    def export_memos(self, file_path: str, memo_ids: Optional[list[str]] = None,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     export_format: Optional[str] = None, compress: Optional[bool] = None) -> None:
+        """
+        メモをファイルにエクスポートする
         
         Args:
-            file: 書き込み先のファイルオブジェクト
-            memo (Memo): 書き込むメモオブジェクト
+            file_path (str): エクスポート先のファイルパス
+            memo_ids (Optional[list[str]]): エクスポートするメモのIDリスト。Noneの場合は全メモをエクスポート
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                メモを1件書き込むごとに(書き込んだメモ数, エクスポートするメモ数)を引数に呼ばれる
+            export_format (Optional[str]): 形式名（"text"、"jsonl"、"csv"、"markdown"）。
+                Noneの場合はファイルの拡張子から判定する
+            compress (Optional[bool]): gzipで圧縮するかどうか。Noneの場合は拡張子が「.gz」なら圧縮する
+
+        Raises:
+            ValueError: 対応していない形式名の場合
+
+        Note:
+            メモは1件ずつ書き込まれ、未読み込みの本文はメモに保持せずにまとめて取得する。
+            一時ファイルに書き込んでから置き換えるため、書き込みに失敗した場合や中断された場合も
+            エクスポート先の既存のファイルは変更されない。
         """
-        file.write(f"タイトル: {memo.title}\n")
-        file.write(f"日付: {memo.date}\n")
-        file.write(f"タグ: {', '.join(sorted(memo.tags))}\n")
-        file.write(f"内容:\n{memo.content}\n")
+        from exporters import GZIP_SUFFIX, create_exporter, format_from_path, open_export_file
+
+        exporter = create_exporter(export_format or format_from_path(file_path))
+        if compress is None:
+            compress = file_path.lower().endswith(GZIP_SUFFIX)
+        if memo_ids:
+            # 選択されたメモのみエクスポート
+            target_ids = [memo_id for memo_id in memo_ids if memo_id in self.memos]
+        else:
+            # すべてのメモをエクスポート
+            target_ids = self.memos
+        total = len(target_ids)
+
+        temp_path = f"{file_path}.{os.urandom(4).hex()}.tmp"
+        try:
+            with open_export_file(temp_path, exporter.newline, compress, _WRITE_BUFFER_SIZE) as file:
+                exporter.begin(file)
+                remaining = iter(target_ids)
+                written = 0
+                while True:
+                    batch = list(islice(remaining, _EXPORT_FETCH_BATCH_SIZE))
+                    if not batch:
+                        break
+                    contents = self._peek_contents(batch)
+                    for memo_id in batch:
+                        exporter.write_memo(file, self.memos[memo_id], contents[memo_id])
+                        written += 1
+                        if progress:
+                            progress(written, total)
+                exporter.end(file)
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
 
+    @timed("search_memos")
     def search_memos(self, search_text: str, case_sensitive: bool = False) -> list[tuple[str, int, int, bool]]:
         """
         メモの内容を検索する
@@ -202,36 +2035,350 @@ class MemoManager:
             
         Returns:
             list[tuple[str, int, int, bool]]: (メモID, 開始位置, 終了位置, タイトル内フラグ)のリスト
+
+        Note:
+            n-gramインデックスで候補を絞り込み、候補のメモのみを走査する。
+            本文が未読み込みのメモはストレージの全文検索で候補を絞り込み、本文をメモに保持せずに走査する。
+        """
+        return list(self.iter_search_memos(search_text, case_sensitive))
+
+    def iter_search_memos(self, search_text: str, case_sensitive: bool = False, limit: Optional[int] = None,
+                          resume_token: Optional[str] = None) -> Iterator[tuple[str, int, int, bool]]:
+        """
+        メモの内容を検索し、一致箇所を1件ずつ返す
+
+        search_memosと同じ順序で一致箇所を返すが、各メモは結果が必要になった時点で走査される。
+        そのため先頭の結果だけを使う場合に、すべての一致箇所を求めずに済む。
+
+        Args:
+            search_text (str): 検索するテキスト
+            case_sensitive (bool): 大文字小文字を区別するかどうか
+            limit (Optional[int]): 返す一致箇所の最大数。Noneの場合は制限しない
+            resume_token (Optional[str]): query.make_resume_tokenで作成したトークン。
+                トークンの一致箇所の次から返す
+
+        Returns:
+            Iterator[tuple[str, int, int, bool]]: (メモID, 開始位置, 終了位置, タイトル内フラグ)のイテレーター
+
+        Raises:
+            ValueError: 再開トークンの形式が正しくない場合
+        """
+        resume = parse_resume_token(resume_token)
+        return self._iter_cached_matches(
+            ('search', search_text, case_sensitive),
+            lambda resume: self._iter_search_matches(search_text, case_sensitive, resume), resume, limit)
+
+    def _iter_cached_matches(self, key: tuple,
+                             matches: Callable[[Optional[tuple[int, int, int, int]]],
+                                               Iterator[tuple[str, int, int, bool]]],
+                             resume: Optional[tuple[int, int, int, int]],
+                             limit: Optional[int]) -> Iterator[tuple[str, int, int, bool]]:
+        """
+        キャッシュ済みの一致箇所を返す。キャッシュにない場合は走査し、最後まで走査した結果を記録する（内部メソッド）
+
+        Args:
+            key (tuple): 検索の種類と引数の組
+            matches (Callable): 再開位置を引数に取り、一致箇所を順に返す関数
+            resume (Optional[tuple[int, int, int, int]]): 再開位置
+            limit (Optional[int]): 返す一致箇所の最大数
+
+        Returns:
+            Iterator[tuple[str, int, int, bool]]: 一致箇所のイテレーター
+        """
+        cached = self._result_cache.get(key, self._generation)
+        if cached is not None:
+            start = 0 if resume is None else bisect_right(cached, resume, key=_match_position)
+            return islice(cached, start, None if limit is None else start + limit)
+        if resume is not None or limit is not None:
+            # 一部だけを求める場合は記録しない
+            return islice(matches(resume), limit)
+        return self._record_matches(key, matches(None))
+
+    def _record_matches(self, key: tuple,
+                        matches: Iterator[tuple[str, int, int, bool]]) -> Iterator[tuple[str, int, int, bool]]:
+        """
+        一致箇所を順に返し、最後まで返した時点で結果をキャッシュに記録する（内部メソッド）
+
+        途中でメモが変更された場合や、一致箇所が多すぎる場合は記録しない。
+
+        Args:
+            key (tuple): 検索の種類と引数の組
+            matches (Iterator[tuple[str, int, int, bool]]): 一致箇所のイテレーター
+
+        Yields:
+            tuple[str, int, int, bool]: 一致箇所
+        """
+        generation = self._generation
+        recorded: Optional[list] = []
+        for match in matches:
+            if recorded is not None:
+                recorded.append(match)
+                if len(recorded) > _RESULT_CACHE_MAX_MATCHES:
+                    recorded = None
+            yield match
+        if recorded is not None and generation == self._generation:
+            self._result_cache.put(key, generation, tuple(recorded))
+
+    def _iter_search_matches(self, search_text: str, case_sensitive: bool,
+                             resume: Optional[tuple[int, int, int, int]]) -> Iterator[tuple[str, int, int, bool]]:
+        """
+        検索テキストの一致箇所を順に返す（内部メソッド）
+
+        Args:
+            search_text (str): 検索するテキスト
+            case_sensitive (bool): 大文字小文字を区別するかどうか
+            resume (Optional[tuple[int, int, int, int]]): 再開位置
+
+        Yields:
+            tuple[str, int, int, bool]: (メモID, 開始位置, 終了位置, タイトル内フラグ)
         """
         if not search_text:
-            return []
+            return
 
-        results = []
+        # n-gramインデックスで候補となるメモを絞り込む（IDの昇順＝追加順）
+        candidate_ids = skip_to_resume(sorted(self._text_candidates(search_text), key=int), resume)
         search_len = len(search_text)
 
         # 大文字小文字を区別しない場合は検索テキストを小文字に変換
         if not case_sensitive:
             search_text = search_text.lower()
 
-        for memo_id, memo in self.memos.items():
-            # タイトル内を検索
-            title = memo.title if case_sensitive else memo.title.lower()
-            title_start = 0
-            while title_start <= len(title) - search_len:
-                pos = title.find(search_text, title_start)
-                if pos == -1:
-                    break
-                results.append((memo_id, pos, pos + search_len, True))
-                title_start = pos + search_len
-            
-            # 内容を検索
-            content = memo.content if case_sensitive else memo.content.lower()
-            content_start = 0
-            while content_start <= len(content) - search_len:
-                pos = content.find(search_text, content_start)
-                if pos == -1:
-                    break
-                results.append((memo_id, pos, pos + search_len, False))
-                content_start = pos + search_len
-        
-        return results
+        for batch_start in range(0, len(candidate_ids), _SEARCH_FETCH_BATCH_SIZE):
+            batch = candidate_ids[batch_start:batch_start + _SEARCH_FETCH_BATCH_SIZE]
+            # 未読み込みの本文はまとめて取得する
+            lazy_contents = self._fetch_contents(self._lazy_ids.intersection(batch))
+
+            for memo_id in batch:
+                memo = self.memos.get(memo_id)
+                if memo is None:
+                    # 走査中に削除されたメモ
+                    continue
+                matches = []
+                # タイトル内を検索
+                title = memo.title if case_sensitive else memo.title.lower()
+                title_start = 0
+                while title_start <= len(title) - search_len:
+                    pos = title.find(search_text, title_start)
+                    if pos == -1:
+                        break
+                    matches.append((memo_id, pos, pos + search_len, True))
+                    title_start = pos + search_len
+
+                # 内容を検索
+                content = memo._content
+                if content is None:
+                    content = lazy_contents.get(memo_id, "")
+                if not case_sensitive:
+                    content = content.lower()
+                content_start = 0
+                while content_start <= len(content) - search_len:
+                    pos = content.find(search_text, content_start)
+                    if pos == -1:
+                        break
+                    matches.append((memo_id, pos, pos + search_len, False))
+                    content_start = pos + search_len
+
+                yield from filter_resumed(memo_id, matches, resume)
+
+    @timed("rank_memos")
+    def rank_memos(self, search_text: str, limit: int = 10,
+                   case_sensitive: bool = False) -> list[tuple[str, float]]:
+        """
+        検索語との関連度が高い順にメモを返す
+
+        空白で区切った各語についてBM25でタイトルと本文のスコアを求め、タイトルのスコアに
+        重みを付けて合計する。スコアが同じメモはIDの昇順に並ぶ。
+
+        Args:
+            search_text (str): 検索する語（空白区切りで複数指定できる）
+            limit (int): 返すメモの最大数
+            case_sensitive (bool): 大文字小文字を区別するかどうか
+
+        Returns:
+            list[tuple[str, float]]: (メモID, スコア)のリスト。いずれかの語を含むメモのみを含む
+
+        Note:
+            上位limit件はヒープで選び、候補全体は並べ替えない。本文の平均文字数は
+            読み込み済みの本文から求め、未読み込みのメモは取得した本文の文字数を使う。
+        """
+        terms = list(dict.fromkeys(search_text.split()))
+        if not terms or limit <= 0 or not self.memos:
+            return []
+        if not case_sensitive:
+            terms = list(dict.fromkeys(term.lower() for term in terms))
+        key = ('rank', tuple(terms), limit, case_sensitive)
+        cached = self._result_cache.get(key, self._generation)
+        if cached is not None:
+            return list(cached)
+
+        candidate_ids = set()
+        for term in terms:
+            candidate_ids |= self._text_candidates(term)
+        contents = self._peek_contents(candidate_ids)
+
+        # 各語の出現回数を求める
+        frequencies = {}
+        document_counts = dict.fromkeys(terms, 0)
+        for memo_id in candidate_ids:
+            title = self.memos[memo_id].title
+            content = contents[memo_id]
+            if not case_sensitive:
+                title = title.lower()
+                content = content.lower()
+            counts = []
+            for term in terms:
+                title_count = title.count(term)
+                content_count = content.count(term)
+                if title_count or content_count:
+                    document_counts[term] += 1
+                    counts.append((term, title_count, content_count))
+            if counts:
+                frequencies[memo_id] = (len(title), len(content), counts)
+        if not frequencies:
+            self._result_cache.put(key, self._generation, ())
+            return []
+
+        memo_count = len(self.memos)
+        idf = {term: math.log(1 + (memo_count - count + 0.5) / (count + 0.5))
+               for term, count in document_counts.items()}
+        average_title = (self._title_length_total / memo_count) or 1
+        loaded_count = memo_count - len(self._lazy_ids)
+        average_content = (self._content_length_total / loaded_count if loaded_count else 0) or 1
+
+        def bm25(frequency: int, length: int, average: float) -> float:
+            norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / average)
+            return frequency * (_BM25_K1 + 1) / (frequency + norm)
+
+        def scored():
+            for memo_id, (title_length, content_length, counts) in frequencies.items():
+                score = 0.0
+                for term, title_count, content_count in counts:
+                    score += idf[term] * (_BM25_TITLE_WEIGHT * bm25(title_count, title_length, average_title)
+                                          + bm25(content_count, content_length, average_content))
+                yield score, -int(memo_id), memo_id
+
+        ranked = [(memo_id, score) for score, _, memo_id in heapq.nlargest(limit, scored())]
+        self._result_cache.put(key, self._generation, tuple(ranked))
+        return ranked
+
+    @timed("query_memos")
+    def query_memos(self, query: str, case_sensitive: bool = False) -> list[tuple[str, int, int, bool]]:
+        """
+        クエリ言語でメモを検索する
+
+        「title:会議 AND (予算 OR budget) NOT tag:done」のように、フィールド指定・正規表現・
+        AND/OR/NOT・括弧を組み合わせて検索する。構文はqueryモジュールを参照。
+
+        Args:
+            query (str): クエリ文字列
+            case_sensitive (bool): 語句・正規表現で大文字小文字を区別するかどうか
+
+        Returns:
+            list[tuple[str, int, int, bool]]: (メモID, 開始位置, 終了位置, タイトル内フラグ)のリスト。
+                タグ・日付の条件のみで一致したメモは(メモID, 0, 0, True)となる
+
+        Raises:
+            QuerySyntaxError: クエリの構文が正しくない場合
+
+        Note:
+            コンパイル済みのクエリはキャッシュされる。タグ・日付の条件を先に評価し、
+            絞り込まれたメモのみのタイトル・本文を走査する。
+        """
+        return list(self.iter_query_memos(query, case_sensitive))
+
+    def iter_query_memos(self, query: str, case_sensitive: bool = False, limit: Optional[int] = None,
+                         resume_token: Optional[str] = None,
+                         memo_ids: Optional[Iterable[str]] = None) -> Iterator[tuple[str, int, int, bool]]:
+        """
+        クエリ言語でメモを検索し、一致箇所を1件ずつ返す
+
+        query_memosと同じ順序で一致箇所を返す。インデックスで求めた候補のメモをIDの順に判定するため、
+        最初の結果はすべてのメモを判定する前に返され、各メモの一致箇所は結果が必要になった時点で求められる。
+
+        Args:
+            query (str): クエリ文字列
+            case_sensitive (bool): 語句・正規表現で大文字小文字を区別するかどうか
+            limit (Optional[int]): 返す一致箇所の最大数。Noneの場合は制限しない
+            resume_token (Optional[str]): query.make_resume_tokenで作成したトークン。
+                トークンの一致箇所の次から返す
+            memo_ids (Optional[Iterable[str]]): 検索対象のメモID。Noneの場合はすべてのメモ。
+                指定した場合、結果はキャッシュしない
+
+        Returns:
+            Iterator[tuple[str, int, int, bool]]: (メモID, 開始位置, 終了位置, タイトル内フラグ)のイテレーター
+
+        Raises:
+            QuerySyntaxError: クエリの構文が正しくない場合
+            ValueError: 再開トークンの形式が正しくない場合
+        """
+        if not query.strip():
+            return iter(())
+        plan = compile_query(query, case_sensitive)
+        if memo_ids is not None:
+            return islice(plan.iter_execute(self, parse_resume_token(resume_token), memo_ids), limit)
+        return self._iter_cached_matches(('query', query, case_sensitive),
+                                         lambda resume: plan.iter_execute(self, resume),
+                                         parse_resume_token(resume_token), limit)
+
+    def _text_candidates(self, text: str, title: bool = True, content: bool = True) -> Set[str]:
+        """
+        タイトル・本文にテキストを含む可能性のあるメモIDを返す（内部メソッド）
+
+        Args:
+            text (str): 検索するテキスト（空文字は不可）
+            title (bool): タイトルを対象にするかどうか
+            content (bool): 本文を対象にするかどうか
+
+        Returns:
+            Set[str]: 候補となるメモIDの集合（大文字小文字は区別しない）。
+                本文が未読み込みのメモはストレージで絞り込み、ストレージがなければすべて含める
+        """
+        candidate_ids = self._title_index.candidates(text) if title else set()
+        if content:
+            candidate_ids |= self._content_index.candidates(text)
+            if self._lazy_ids:
+                candidate_ids |= (self._lazy_ids & self.store.search_candidates(text)
+                                  if self.store is not None else self._lazy_ids)
+        return candidate_ids
+
+    def _peek_contents(self, memo_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        メモの本文を取得する。未読み込みの本文はメモに保持しない（内部メソッド）
+
+        Args:
+            memo_ids (Iterable[str]): メモIDのリスト
+
+        Returns:
+            Dict[str, str]: メモIDをキーとする本文の辞書
+        """
+        contents = {}
+        lazy_ids = set()
+        for memo_id in memo_ids:
+            content = self.memos[memo_id]._content
+            if content is None:
+                lazy_ids.add(memo_id)
+            else:
+                contents[memo_id] = content
+        if lazy_ids:
+            fetched = self._fetch_contents(lazy_ids)
+            for memo_id in lazy_ids:
+                contents[memo_id] = fetched.get(memo_id, "")
+        return contents
+
+def _parse_notebook(file_path: str) -> list[tuple[str, str, str, list[str]]]:
+    """
+    XMLファイルとそのジャーナルを読み込み、メモの内容を返す（プロセスプールのワーカーで実行される）
+
+    Memoオブジェクトの代わりに単純なタプルを返し、プロセス間の受け渡しを軽くする。
+    文字列のインターンやタグ集合の共有は、受け取った側でMemoを作成する際に行われる。
+
+    Args:
+        file_path (str): 読み込むファイルのパス
+
+    Returns:
+        list[tuple[str, str, str, list[str]]]: ファイル内の順序での(タイトル, 日付, 本文, タグ)のリスト
+    """
+    memos: Dict[str, Memo] = {str(i): memo for i, memo in enumerate(MemoManager._iter_memo_file(file_path))}
+    MemoManager._apply_journal(memos, MemoJournal(journal_path(file_path)).replay(file_path) or (), len(memos))
+    return [(memo.title, memo.date, memo.content, list(memo.tags))
+            for _, memo in sorted(memos.items(), key=lambda item: int(item[0]))]
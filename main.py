@@ -1,3 +1,4 @@
+from instrumentation import startup_profile
 import tkinter as tk
 from ui import MemoApp
 
@@ -5,8 +6,12 @@ def main():
     """
     メモアプリケーションのメインエントリーポイント
     Tkinterウィンドウを作成し、アプリケーションを起動する
+
+    環境変数MEMO_APP_STARTUP_PROFILEに1を指定すると、最初の描画までの起動時間の内訳を表示する
     """
+    startup_profile.mark("imports")
     root = tk.Tk()
+    startup_profile.mark("tk_root")
     app = MemoApp(root)
     root.mainloop()
 
@@ -0,0 +1,286 @@
+import mmap
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+from xml.parsers import expat
+
+# 解析時にファイルから一度に渡すバイト数
+_PARSE_CHUNK_SIZE = 1 << 20
+
+# デコード済みの本文を保持するメモの数
+_CONTENT_CACHE_SIZE = 256
+
+# 本文にこれらのバイトを含む場合は、エンティティ参照などを解釈してデコードする
+_MARKUP_BYTES = (b'&', b'<', b'\r')
+
+class MappedXMLStore:
+    """
+    XMLファイルをメモリマップし、メモの本文を必要になった時点でデコードする読み取り専用のストレージ
+
+    読み込み時は本文を文字列にせず、各メモの<content>要素のバイト位置のみを記録する。
+    本文は参照された時点でマップから切り出してデコードし、最近使った本文のみをLRUキャッシュに保持する。
+
+    Attributes:
+        file_path (str): マップしているXMLファイルのパス
+        read_only (bool): 常にTrue（メモの変更をこのストレージに書き戻すことはできない）
+
+    Note:
+        検索テキストに大文字小文字の区別がなく、XMLでエスケープされる文字も含まない場合は、
+        マップしたバイト列を直接検索して候補を絞り込む。
+    """
+    read_only = True
+
+    def __init__(self, file_path: str, cache_size: int = _CONTENT_CACHE_SIZE):
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空のファイルはマップできない
+            self._file.close()
+            raise ET.ParseError("no element found: line 1, column 0") from None
+        self._encoding = 'utf-8'
+        # 各メモの<content>開始タグと終了タグのバイト位置（ファイル内の順序）
+        self._starts = array('q')
+        self._ends = array('q')
+        self._cache: OrderedDict[int, str] = OrderedDict()
+        self._cache_size = cache_size
+        self._markup_ordinals: Optional[Set[int]] = None
+
+    def close(self) -> None:
+        """マップとファイルを閉じる"""
+        self._cache.clear()
+        self._map.close()
+        self._file.close()
+
+    def scan(self, progress: Optional[Callable[[int, int], None]] = None) -> Iterator[tuple[str, str, Optional[str]]]:
+        """
+        ファイルを解析し、本文以外のメモの情報を順に返す
+
+        返されたメモには0から順にIDが割り当てられたものとして本文の位置を記録する。
+
+        Args:
+            progress (Optional[Callable[[int, int], None]]): 進捗通知用のコールバック。
+                メモを1件読み込むごとに(読み込んだメモ数, 読み込んだバイト数)を引数に呼ばれる
+
+        Yields:
+            tuple[str, str, Optional[str]]: (タイトル, 日付, カンマ区切りのタグ)
+
+        Raises:
+            xml.etree.ElementTree.ParseError: XMLの解析に失敗した場合
+        """
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parsed = []
+        state = {"depth": 0, "field": None, "pieces": None, "fields": None, "content": None}
+        default_date = None
+
+        def on_xml_decl(version, encoding, standalone):
+            if encoding:
+                self._encoding = encoding.lower()
+
+        def on_start(name, attrs):
+            state["depth"] += 1
+            depth = state["depth"]
+            if depth == 2 and name == 'memo':
+                state["fields"] = {}
+                state["content"] = None
+            elif depth == 3 and state["fields"] is not None and name not in state["fields"]:
+                state["field"] = name
+                if name == 'content':
+                    state["content"] = [parser.CurrentByteIndex, parser.CurrentByteIndex]
+                else:
+                    state["pieces"] = []
+
+        def on_end(name):
+            depth = state["depth"]
+            state["depth"] -= 1
+            if depth == 3 and state["field"] == name:
+                if name == 'content':
+                    state["content"][1] = parser.CurrentByteIndex
+                    state["fields"][name] = None
+                else:
+                    state["fields"][name] = ''.join(state["pieces"])
+                    state["pieces"] = None
+                state["field"] = None
+            elif depth == 2 and name == 'memo' and state["fields"] is not None:
+                content = state["content"]
+                if content is None:
+                    # <content>要素のないメモは本文を空とする（位置の昇順を保つためメモの末尾を使う）
+                    content = [parser.CurrentByteIndex, parser.CurrentByteIndex]
+                parsed.append((state["fields"], content))
+                state["fields"] = None
+
+        def on_text(data):
+            if state["pieces"] is not None:
+                state["pieces"].append(data)
+
+        parser.XmlDeclHandler = on_xml_decl
+        parser.StartElementHandler = on_start
+        parser.EndElementHandler = on_end
+        parser.CharacterDataHandler = on_text
+
+        count = 0
+        size = len(self._map)
+        try:
+            for offset in range(0, size, _PARSE_CHUNK_SIZE):
+                parser.Parse(self._map[offset:offset + _PARSE_CHUNK_SIZE], False)
+                for fields, content in parsed:
+                    self._starts.append(content[0])
+                    self._ends.append(content[1])
+                    date_text = fields.get('date')
+                    if not date_text:
+                        if default_date is None:
+                            default_date = datetime.now().strftime('%Y/%m/%d')
+                        date_text = default_date
+                    yield fields.get('name') or "新規メモ", date_text, fields.get('tags')
+                    count += 1
+                    if progress is not None:
+                        progress(count, min(offset + _PARSE_CHUNK_SIZE, size))
+                parsed.clear()
+            parser.Parse(b"", True)
+        except expat.ExpatError as e:
+            raise ET.ParseError(str(e)) from None
+
+    def _ordinal(self, memo_id: str) -> Optional[int]:
+        """
+        メモIDに対応するファイル内の順序を返す（内部メソッド）
+
+        Args:
+            memo_id (str): メモのID（読み込み時に順序の文字列として割り当てられたもの）
+
+        Returns:
+            Optional[int]: 順序。ファイルに含まれないメモの場合はNone
+        """
+        ordinal = int(memo_id)
+        return ordinal if 0 <= ordinal < len(self._starts) else None
+
+    def _body_start(self, ordinal: int) -> int:
+        """
+        本文の先頭のバイト位置を返す（内部メソッド）
+
+        Args:
+            ordinal (int): 順序
+
+        Returns:
+            int: 開始タグの直後の位置。空要素の場合は終了位置
+        """
+        start, end = self._starts[ordinal], self._ends[ordinal]
+        tag_end = self._map.find(b'>', start, end)
+        return end if tag_end == -1 else tag_end + 1
+
+    def _decode(self, ordinal: int) -> str:
+        """
+        本文をマップから切り出してデコードする（内部メソッド）
+
+        Args:
+            ordinal (int): 順序
+
+        Returns:
+            str: メモの本文
+        """
+        raw = self._map[self._body_start(ordinal):self._ends[ordinal]]
+        if not any(marker in raw for marker in _MARKUP_BYTES):
+            return raw.decode(self._encoding)
+        # エンティティ参照・CDATA・改行の正規化はXMLパーサーに任せる
+        parser = expat.ParserCreate(self._encoding)
+        parser.buffer_text = True
+        pieces = []
+        parser.CharacterDataHandler = pieces.append
+        parser.Parse(b"<content>" + raw + b"</content>", True)
+        return ''.join(pieces)
+
+    def load_content(self, memo_id: str) -> str:
+        """
+        メモの本文を返す
+
+        デコードした本文はLRUキャッシュに保持され、キャッシュが一杯の場合は最も長く
+        使われていない本文が破棄される。
+
+        Args:
+            memo_id (str): メモのID
+
+        Returns:
+            str: メモの本文。ファイルに含まれないメモの場合は空文字
+        """
+        ordinal = self._ordinal(memo_id)
+        if ordinal is None:
+            return ""
+        content = self._cache.get(ordinal)
+        if content is not None:
+            self._cache.move_to_end(ordinal)
+            return content
+        content = self._decode(ordinal)
+        self._cache[ordinal] = content
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return content
+
+    def load_contents(self, memo_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        複数のメモの本文をまとめて返す
+
+        検索などでの一括の読み込みではLRUキャッシュを更新しない。
+
+        Args:
+            memo_ids (Iterable[str]): メモIDのリスト
+
+        Returns:
+            Dict[str, str]: メモIDをキーとする本文の辞書
+        """
+        contents = {}
+        for memo_id in memo_ids:
+            ordinal = self._ordinal(memo_id)
+            if ordinal is None:
+                continue
+            content = self._cache.get(ordinal)
+            contents[memo_id] = content if content is not None else self._decode(ordinal)
+        return contents
+
+    def search_candidates(self, search_text: str) -> Set[str]:
+        """
+        本文に検索テキストを含む可能性のあるメモIDを返す
+
+        検索テキストが大文字小文字の区別のない文字のみで、XMLでエスケープされる文字を
+        含まない場合は、マップしたバイト列を直接検索する。それ以外の場合はすべてのメモを返す。
+
+        Args:
+            search_text (str): 検索するテキスト
+
+        Returns:
+            Set[str]: 候補となるメモIDの集合（大文字小文字は区別しない）
+        """
+        count = len(self._starts)
+        if search_text.lower() != search_text.upper() or any(c in search_text for c in '&<>"\'\r'):
+            return {str(ordinal) for ordinal in range(count)}
+        try:
+            needle = search_text.encode(self._encoding)
+        except (LookupError, UnicodeEncodeError):
+            return {str(ordinal) for ordinal in range(count)}
+
+        if self._markup_ordinals is None:
+            # エスケープやCDATAを含む本文はバイト列の検索では判定できない
+            self._markup_ordinals = {
+                ordinal for ordinal in range(count)
+                if any(self._map.find(marker, self._body_start(ordinal), self._ends[ordinal]) != -1
+                       for marker in _MARKUP_BYTES)
+            }
+        candidates = set(self._markup_ordinals)
+
+        position = self._map.find(needle)
+        while position != -1:
+            ordinal = bisect_right(self._starts, position) - 1
+            if ordinal < 0:
+                position = self._map.find(needle, position + 1)
+                continue
+            end = self._ends[ordinal]
+            if position + len(needle) <= end and position >= self._body_start(ordinal):
+                candidates.add(ordinal)
+                # 同じメモの残りは調べずに次のメモへ進む
+                position = self._map.find(needle, end)
+            else:
+                position = self._map.find(needle, position + 1)
+        return {str(ordinal) for ordinal in candidates}
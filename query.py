@@ -0,0 +1,568 @@
+"""
+メモの検索クエリ言語
+
+クエリは次の要素を組み合わせて記述する。
+
+    会議                 タイトルまたは本文に「会議」を含む
+    "定例 会議"          空白を含む語句（\" と \\ でエスケープできる）
+    /予算.*承認/         正規表現
+    title:会議           タイトルのみを対象にする（content: は本文のみ）
+    tag:仕事             タグ「仕事」を持つ
+    date:2024/01         日付が指定した文字列で始まる
+    date:2024/01/01..2024/03/31   日付の範囲（どちらかの端は省略できる）
+    A AND B / A B        両方に一致する
+    A OR B               いずれかに一致する
+    NOT A                一致しない（A NOT B は A AND NOT B と同じ）
+    ( ... )              グループ化
+
+コンパイルした実行計画はクエリ文字列ごとにキャッシュされる。実行時はタグ・日付の条件を
+先に評価して対象のメモを絞り込み、残ったメモだけのタイトル・本文を走査する。
+一致箇所を順に返す場合は、インデックスだけで候補のメモを求め、IDの順に1件ずつ判定する。
+"""
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Set
+
+# 実行計画のキャッシュに保持するクエリの数
+_PLAN_CACHE_SIZE = 128
+
+# 日付の範囲の上端に付けて、前方一致する日付をすべて含めるための文字
+_DATE_PREFIX_END = "\uffff"
+
+# 一致箇所を順に返す際に、未読み込みの本文をまとめて取得するメモの数
+_STREAM_BATCH_SIZE = 256
+
+# 各条件の評価の相対的なコスト（小さいものから評価する）
+_TAG_COST = 1
+_DATE_COST = 2
+_LITERAL_COST = 10
+_REGEX_COST = 100
+
+_TOKEN_PATTERN = re.compile(r'''
+    \s*(?:
+        (?P<lparen>\() | (?P<rparen>\)) |
+        (?:(?P<field>title|content|tag|date):)?
+        (?:
+            "(?P<quoted>(?:[^"\\]|\\.)*)"
+          | /(?P<regex>(?:[^/\\]|\\.)+)/
+          | (?P<word>[^\s()"]+)
+        )
+    )''', re.VERBOSE)
+
+_KEYWORDS = ('AND', 'OR', 'NOT')
+
+class QuerySyntaxError(ValueError):
+    """クエリの構文が正しくない場合に送出される例外"""
+
+def make_resume_token(match: tuple[str, int, int, bool]) -> str:
+    """
+    一致箇所の次から検索を再開するためのトークンを作成する
+
+    一致箇所はメモIDの昇順、メモ内ではタイトル・本文の順、開始位置の順に並ぶため、
+    最後に受け取った一致箇所から再開位置が決まる。
+
+    Args:
+        match (tuple[str, int, int, bool]): 最後に受け取った(メモID, 開始位置, 終了位置, タイトル内フラグ)
+
+    Returns:
+        str: 再開トークン
+    """
+    memo_id, start, end, is_title = match
+    return f"{memo_id}:{0 if is_title else 1}:{start}:{end}"
+
+def parse_resume_token(token: Optional[str]) -> Optional[tuple[int, int, int, int]]:
+    """
+    再開トークンを解析する
+
+    Args:
+        token (Optional[str]): make_resume_tokenで作成したトークン
+
+    Returns:
+        Optional[tuple[int, int, int, int]]: (メモIDの数値, 区分（0: タイトル, 1: 本文）, 開始位置, 終了位置)。
+            トークンがNoneの場合はNone
+
+    Raises:
+        ValueError: トークンの形式が正しくない場合
+    """
+    if token is None:
+        return None
+    try:
+        memo_number, section, start, end = map(int, token.split(':'))
+    except ValueError:
+        raise ValueError(f"再開トークンが正しくありません: {token}") from None
+    return memo_number, section, start, end
+
+def skip_to_resume(memo_ids: list[str], resume: Optional[tuple[int, int, int, int]]) -> list[str]:
+    """
+    昇順に並んだメモIDから、再開位置より前のメモを取り除く
+
+    Args:
+        memo_ids (list[str]): IDの昇順に並んだメモIDのリスト
+        resume (Optional[tuple[int, int, int, int]]): parse_resume_tokenの結果
+
+    Returns:
+        list[str]: 再開位置のメモ以降のメモIDのリスト
+    """
+    if resume is None:
+        return memo_ids
+    return memo_ids[bisect_left(memo_ids, resume[0], key=int):]
+
+def filter_resumed(memo_id: str, matches: list[tuple[str, int, int, bool]],
+                   resume: Optional[tuple[int, int, int, int]]) -> list[tuple[str, int, int, bool]]:
+    """
+    再開位置のメモの一致箇所から、既に返した一致箇所を取り除く
+
+    Args:
+        memo_id (str): メモのID
+        matches (list[tuple[str, int, int, bool]]): メモ内の一致箇所
+        resume (Optional[tuple[int, int, int, int]]): parse_resume_tokenの結果
+
+    Returns:
+        list[tuple[str, int, int, bool]]: 再開位置より後の一致箇所
+    """
+    if resume is None or int(memo_id) != resume[0]:
+        return matches
+    position = resume[1:]
+    return [match for match in matches if (0 if match[3] else 1, match[1], match[2]) > position]
+
+class _QueryContext:
+    """
+    1回のクエリ実行で共有する状態（内部クラス）
+
+    未読み込みの本文は必要になった時点でまとめて取得し、実行中のみ保持する。
+    """
+    def __init__(self, manager):
+        self.manager = manager
+        self._contents = {}
+
+    def begin_batch(self, memo_ids: list[str], prefetch: bool) -> None:
+        """以前のバッチの本文を破棄し、次に判定するメモの本文をまとめて取得しておく"""
+        self._contents = {}
+        if prefetch:
+            self.prefetch(memo_ids)
+
+    def prefetch(self, memo_ids: Set[str]) -> None:
+        """本文をまとめて取得しておく"""
+        missing = [memo_id for memo_id in memo_ids if memo_id not in self._contents]
+        if missing:
+            self._contents.update(self.manager._peek_contents(missing))
+
+    def title(self, memo_id: str) -> str:
+        return self.manager.memos[memo_id].title
+
+    def content(self, memo_id: str) -> str:
+        content = self._contents.get(memo_id)
+        if content is None:
+            self.prefetch({memo_id})
+            content = self._contents[memo_id]
+        return content
+
+class _TagTerm:
+    """指定したタグを持つメモに一致する条件（内部クラス）"""
+    cost = _TAG_COST
+
+    def __init__(self, tag: str):
+        self.tag = tag
+
+    def evaluate(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        return ids & ctx.manager.filter_by_tags([self.tag])
+
+    candidates = evaluate
+
+    def matches(self, ctx: _QueryContext, memo_id: str) -> bool:
+        return self.tag in ctx.manager.memos[memo_id].tags
+
+class _DateTerm:
+    """日付が範囲内のメモに一致する条件（内部クラス）"""
+    cost = _DATE_COST
+
+    def __init__(self, start: str, end: str):
+        self.start = start
+        self.end = end
+
+    def evaluate(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        return ids.intersection(ctx.manager.filter_by_date(self.start, self.end))
+
+    candidates = evaluate
+
+    def matches(self, ctx: _QueryContext, memo_id: str) -> bool:
+        return self.start <= ctx.manager.memos[memo_id].date <= self.end
+
+class _TextTerm:
+    """
+    タイトル・本文に語句または正規表現を含むメモに一致する条件（内部クラス）
+
+    Attributes:
+        field (Optional[str]): 'title'または'content'。Noneの場合は両方を対象にする
+        literal (Optional[str]): 検索する語句（大文字小文字を区別しない場合は小文字化済み）
+        pattern (Optional[re.Pattern]): 検索する正規表現
+    """
+    def __init__(self, field: Optional[str], literal: Optional[str] = None,
+                 pattern: Optional[re.Pattern] = None, case_sensitive: bool = False):
+        self.field = field
+        self.literal = literal
+        self.pattern = pattern
+        self.case_sensitive = case_sensitive
+        self.cost = _LITERAL_COST if literal is not None else _REGEX_COST
+
+    def _texts(self, ctx: _QueryContext, memo_id: str) -> Iterator[tuple[str, bool]]:
+        """対象のテキストを(テキスト, タイトルかどうか)の形で返す"""
+        if self.field != 'content':
+            yield ctx.title(memo_id), True
+        if self.field != 'title':
+            yield ctx.content(memo_id), False
+
+    def candidates(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        """一致する可能性のあるメモに絞り込む（語句はn-gramインデックスを使い、正規表現は絞り込まない）"""
+        if self.literal is None:
+            return ids
+        return ids & ctx.manager._text_candidates(
+            self.literal, title=self.field != 'content', content=self.field != 'title')
+
+    def evaluate(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        # n-gramインデックスで候補を絞り込んでから走査する
+        ids = self.candidates(ctx, ids)
+        if self.field != 'title':
+            ctx.prefetch(ids)
+        return {memo_id for memo_id in ids if self.matches(ctx, memo_id)}
+
+    def matches(self, ctx: _QueryContext, memo_id: str) -> bool:
+        return next(self._find(ctx, memo_id, first_only=True), None) is not None
+
+    def _find(self, ctx: _QueryContext, memo_id: str, first_only: bool = False) -> Iterator[tuple[int, int, bool]]:
+        """
+        メモ内の一致箇所を返す
+
+        Yields:
+            tuple[int, int, bool]: (開始位置, 終了位置, タイトル内フラグ)
+        """
+        for text, is_title in self._texts(ctx, memo_id):
+            if self.literal is not None:
+                if not self.case_sensitive:
+                    text = text.lower()
+                length = len(self.literal)
+                pos = text.find(self.literal)
+                while pos != -1:
+                    yield pos, pos + length, is_title
+                    if first_only:
+                        return
+                    pos = text.find(self.literal, pos + length)
+            else:
+                for match in self.pattern.finditer(text):
+                    if match.end() > match.start():
+                        yield match.start(), match.end(), is_title
+                        if first_only:
+                            return
+
+    def spans(self, ctx: _QueryContext, memo_id: str) -> list[tuple[int, int, bool]]:
+        return list(self._find(ctx, memo_id))
+
+class _And:
+    """すべての子条件に一致する（内部クラス）"""
+    def __init__(self, children: list):
+        # 安価な条件から評価して、後の条件で走査するメモを減らす
+        self.children = sorted(children, key=lambda child: child.cost)
+        # すべての子条件を評価しうるため、最も高価な子条件のコストとする
+        self.cost = max(child.cost for child in self.children)
+
+    def evaluate(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        for child in self.children:
+            ids = child.evaluate(ctx, ids)
+            if not ids:
+                break
+        return ids
+
+    def candidates(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        for child in self.children:
+            ids = child.candidates(ctx, ids)
+            if not ids:
+                break
+        return ids
+
+    def matches(self, ctx: _QueryContext, memo_id: str) -> bool:
+        return all(child.matches(ctx, memo_id) for child in self.children)
+
+class _Or:
+    """いずれかの子条件に一致する（内部クラス）"""
+    def __init__(self, children: list):
+        self.children = sorted(children, key=lambda child: child.cost)
+        self.cost = max(child.cost for child in self.children)
+
+    def evaluate(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        result: Set[str] = set()
+        for child in self.children:
+            # 既に一致したメモは残りの条件で評価しない
+            matched = child.evaluate(ctx, ids - result)
+            result |= matched
+        return result
+
+    def candidates(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        result: Set[str] = set()
+        for child in self.children:
+            result |= child.candidates(ctx, ids - result)
+        return result
+
+    def matches(self, ctx: _QueryContext, memo_id: str) -> bool:
+        return any(child.matches(ctx, memo_id) for child in self.children)
+
+class _Not:
+    """子条件に一致しない（内部クラス）"""
+    def __init__(self, child):
+        self.child = child
+        # 否定は対象を絞り込まないため、同じコストの条件より後に評価する
+        self.cost = child.cost + 0.5
+
+    def evaluate(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        return ids - self.child.evaluate(ctx, ids)
+
+    def candidates(self, ctx: _QueryContext, ids: Set[str]) -> Set[str]:
+        # 子条件の候補は一致するメモを含むだけのため、否定では絞り込めない
+        return ids
+
+    def matches(self, ctx: _QueryContext, memo_id: str) -> bool:
+        return not self.child.matches(ctx, memo_id)
+
+class QueryPlan:
+    """
+    コンパイル済みのクエリ
+
+    Attributes:
+        query (str): 元のクエリ文字列
+        case_sensitive (bool): 大文字小文字を区別するかどうか
+    """
+    def __init__(self, query: str, root, case_sensitive: bool):
+        self.query = query
+        self.case_sensitive = case_sensitive
+        self._root = root
+        self._highlight_terms = list(_positive_text_terms(root))
+        self._reads_content = any(term.field != 'title' for term in _text_terms(root))
+
+    def matching_ids(self, manager, memo_ids: Optional[Iterable[str]] = None) -> list[str]:
+        """
+        クエリに一致するメモIDを返す
+
+        Args:
+            manager (MemoManager): 検索対象のMemoManager
+            memo_ids (Optional[Iterable[str]]): 検索対象のメモID。Noneの場合はすべてのメモ
+
+        Returns:
+            list[str]: 一致したメモIDの昇順（追加順）のリスト
+        """
+        universe = set(manager.memos) if memo_ids is None else set(memo_ids).intersection(manager.memos)
+        return sorted(self._root.evaluate(_QueryContext(manager), universe), key=int)
+
+    def execute(self, manager) -> list[tuple[str, int, int, bool]]:
+        """
+        クエリを実行し、一致したメモと一致箇所を返す
+
+        Args:
+            manager (MemoManager): 検索対象のMemoManager
+
+        Returns:
+            list[tuple[str, int, int, bool]]: (メモID, 開始位置, 終了位置, タイトル内フラグ)のリスト。
+                否定されていない語句の一致箇所をメモごとにタイトル、本文の順に並べる。
+                タグ・日付の条件のみで一致したメモは(メモID, 0, 0, True)となる
+        """
+        return list(self.iter_execute(manager))
+
+    def iter_execute(self, manager, resume: Optional[tuple[int, int, int, int]] = None,
+                     memo_ids: Optional[Iterable[str]] = None) -> Iterator[tuple[str, int, int, bool]]:
+        """
+        クエリを実行し、一致箇所を1件ずつ返す
+
+        インデックスだけで求めた候補のメモをIDの順に1件ずつ判定するため、最初の結果は
+        すべてのメモを判定する前に返される。走査中に削除されたメモは飛ばす。
+
+        Args:
+            manager (MemoManager): 検索対象のMemoManager
+            resume (Optional[tuple[int, int, int, int]]): parse_resume_tokenの結果。この位置より後の一致箇所のみを返す
+            memo_ids (Optional[Iterable[str]]): 検索対象のメモID。Noneの場合はすべてのメモ
+
+        Yields:
+            tuple[str, int, int, bool]: executeと同じ形式の一致箇所
+        """
+        ctx = _QueryContext(manager)
+        universe = set(manager.memos) if memo_ids is None else set(memo_ids).intersection(manager.memos)
+        candidate_ids = skip_to_resume(sorted(self._root.candidates(ctx, universe), key=int), resume)
+        for batch_start in range(0, len(candidate_ids), _STREAM_BATCH_SIZE):
+            batch = [memo_id for memo_id in candidate_ids[batch_start:batch_start + _STREAM_BATCH_SIZE]
+                     if memo_id in manager.memos]
+            ctx.begin_batch(batch, self._reads_content)
+            for memo_id in batch:
+                if memo_id in manager.memos and self._root.matches(ctx, memo_id):
+                    yield from self._memo_matches(ctx, memo_id, resume)
+
+    def _memo_matches(self, ctx: _QueryContext, memo_id: str,
+                      resume: Optional[tuple[int, int, int, int]]) -> list[tuple[str, int, int, bool]]:
+        """一致したメモのハイライトする一致箇所を求める（内部メソッド）"""
+        spans = set()
+        for term in self._highlight_terms:
+            spans.update(term.spans(ctx, memo_id))
+        if spans:
+            matches = [(memo_id, start, end, is_title) for start, end, is_title
+                       in sorted(spans, key=lambda span: (not span[2], span[0], span[1]))]
+        else:
+            matches = [(memo_id, 0, 0, True)]
+        return filter_resumed(memo_id, matches, resume)
+
+def _text_terms(node) -> Iterator[_TextTerm]:
+    """否定されたものも含め、すべての語句・正規表現の条件を返す"""
+    if isinstance(node, _TextTerm):
+        yield node
+    elif isinstance(node, _Not):
+        yield from _text_terms(node.child)
+    elif isinstance(node, (_And, _Or)):
+        for child in node.children:
+            yield from _text_terms(child)
+
+def _positive_text_terms(node, negated: bool = False) -> Iterator[_TextTerm]:
+    """否定されていない語句・正規表現の条件を返す（ハイライトの対象）"""
+    if isinstance(node, _TextTerm):
+        if not negated:
+            yield node
+    elif isinstance(node, _Not):
+        yield from _positive_text_terms(node.child, not negated)
+    elif isinstance(node, (_And, _Or)):
+        for child in node.children:
+            yield from _positive_text_terms(child, negated)
+
+def _tokenize(query: str) -> list[tuple]:
+    """
+    クエリを字句に分割する
+
+    Returns:
+        list[tuple]: ('(',)、(')',)、('op', キーワード)、('term', フィールド, 種類, 値)のリスト
+
+    Raises:
+        QuerySyntaxError: 解釈できない文字がある場合
+    """
+    tokens = []
+    pos = 0
+    query = query.rstrip()
+    while pos < len(query):
+        match = _TOKEN_PATTERN.match(query, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"クエリを解釈できません: {query[pos:].strip()}")
+        pos = match.end()
+        if match.group('lparen'):
+            tokens.append(('(',))
+        elif match.group('rparen'):
+            tokens.append((')',))
+        else:
+            field = match.group('field')
+            if match.group('quoted') is not None:
+                value = re.sub(r'\\(.)', r'\1', match.group('quoted'))
+                tokens.append(('term', field, 'literal', value))
+            elif match.group('regex') is not None:
+                tokens.append(('term', field, 'regex', match.group('regex').replace('\\/', '/')))
+            elif field is None and match.group('word') in _KEYWORDS:
+                tokens.append(('op', match.group('word')))
+            else:
+                tokens.append(('term', field, 'literal', match.group('word')))
+    return tokens
+
+class _Parser:
+    """
+    字句の列から条件の木を作る再帰下降パーサー（内部クラス）
+
+        or_expr  := and_expr (OR and_expr)*
+        and_expr := not_expr ([AND] not_expr)*
+        not_expr := NOT not_expr | primary
+        primary  := '(' or_expr ')' | term
+    """
+    def __init__(self, tokens: list[tuple], case_sensitive: bool):
+        self.tokens = tokens
+        self.pos = 0
+        self.case_sensitive = case_sensitive
+
+    def _peek(self) -> Optional[tuple]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> tuple:
+        token = self._peek()
+        if token is None:
+            raise QuerySyntaxError("クエリが途中で終わっています")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self._or_expr()
+        if self._peek() is not None:
+            raise QuerySyntaxError("対応する「(」のない「)」があります")
+        return node
+
+    def _or_expr(self):
+        children = [self._and_expr()]
+        while self._peek() == ('op', 'OR'):
+            self._next()
+            children.append(self._and_expr())
+        return children[0] if len(children) == 1 else _Or(children)
+
+    def _and_expr(self):
+        children = [self._not_expr()]
+        while True:
+            token = self._peek()
+            if token == ('op', 'AND'):
+                self._next()
+            elif token is None or token[0] == ')' or token == ('op', 'OR'):
+                break
+            children.append(self._not_expr())
+        return children[0] if len(children) == 1 else _And(children)
+
+    def _not_expr(self):
+        if self._peek() == ('op', 'NOT'):
+            self._next()
+            return _Not(self._not_expr())
+        return self._primary()
+
+    def _primary(self):
+        token = self._next()
+        if token[0] == '(':
+            node = self._or_expr()
+            if self._next()[0] != ')':
+                raise QuerySyntaxError("「)」がありません")
+            return node
+        if token[0] != 'term':
+            raise QuerySyntaxError(f"条件が必要な位置に「{token[-1]}」があります")
+        return self._term(*token[1:])
+
+    def _term(self, field: Optional[str], kind: str, value: str):
+        """フィールドと値から条件を作る"""
+        if field == 'tag':
+            return _TagTerm(value)
+        if field == 'date':
+            start, separator, end = value.partition('..')
+            if not separator:
+                end = start
+            return _DateTerm(start, end + _DATE_PREFIX_END)
+        if kind == 'regex':
+            try:
+                pattern = re.compile(value, 0 if self.case_sensitive else re.IGNORECASE)
+            except re.error as e:
+                raise QuerySyntaxError(f"正規表現が正しくありません: /{value}/ ({e})") from None
+            return _TextTerm(field, pattern=pattern, case_sensitive=self.case_sensitive)
+        if not value:
+            raise QuerySyntaxError("空の語句は検索できません")
+        literal = value if self.case_sensitive else value.lower()
+        return _TextTerm(field, literal=literal, case_sensitive=self.case_sensitive)
+
+@lru_cache(maxsize=_PLAN_CACHE_SIZE)
+def compile_query(query: str, case_sensitive: bool = False) -> QueryPlan:
+    """
+    クエリ文字列を実行計画にコンパイルする（結果はキャッシュされる）
+
+    Args:
+        query (str): クエリ文字列
+        case_sensitive (bool): 語句・正規表現で大文字小文字を区別するかどうか
+
+    Returns:
+        QueryPlan: コンパイル済みのクエリ
+
+    Raises:
+        QuerySyntaxError: クエリの構文が正しくない場合
+    """
+    tokens = _tokenize(query)
+    if not tokens:
+        raise QuerySyntaxError("クエリが空です")
+    return QueryPlan(query, _Parser(tokens, case_sensitive).parse(), case_sensitive)
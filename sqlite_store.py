@@ -0,0 +1,191 @@
+import sqlite3
+from typing import Dict, Iterable, Iterator, Set
+
+# 一度に問い合わせるIDの最大数（SQLiteのプレースホルダ上限より十分小さい値）
+_ID_BATCH_SIZE = 500
+
+# FTS5のtrigramトークナイザーで検索できる最小の文字数
+_FTS_MIN_QUERY_LENGTH = 3
+
+class SQLiteMemoStore:
+    """
+    メモをSQLiteデータベースに保存するストレージ
+
+    一覧表示に必要なタイトル・日付・タグはまとめて読み込み、本文はメモごとに必要になった
+    時点で読み込む。利用可能な場合はFTS5（trigramトークナイザー）で本文の全文検索を行う。
+
+    Attributes:
+        db_path (str): データベースファイルのパス
+        has_fts (bool): FTS5による全文検索が利用可能かどうか
+        read_only (bool): 常にFalse（変更を書き込める）
+    """
+    read_only = False
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # 接続はUIのワーカースレッドとメインスレッドから交互に使われる（同時には使われない）
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # 候補の絞り込みでn-gramインデックスと同じケースフォールドを使う
+        self.conn.create_function('memo_casefold', 1, str.casefold, deterministic=True)
+        self.has_fts = False
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """テーブルと全文検索用のインデックスを作成する（内部メソッド）"""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS memos ("
+                " id INTEGER PRIMARY KEY,"
+                " title TEXT NOT NULL,"
+                " date TEXT NOT NULL,"
+                " content TEXT NOT NULL DEFAULT '',"
+                " tags TEXT NOT NULL DEFAULT '')"
+            )
+        fts_exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'memos_fts'").fetchone() is not None
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS memos_fts USING fts5("
+                    " content, content='memos', content_rowid='id', tokenize='trigram')"
+                )
+                self.conn.executescript("""
+                    CREATE TRIGGER IF NOT EXISTS memos_fts_insert AFTER INSERT ON memos BEGIN
+                        INSERT INTO memos_fts(rowid, content) VALUES (new.id, new.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS memos_fts_delete AFTER DELETE ON memos BEGIN
+                        INSERT INTO memos_fts(memos_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS memos_fts_update AFTER UPDATE OF content ON memos BEGIN
+                        INSERT INTO memos_fts(memos_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                        INSERT INTO memos_fts(rowid, content) VALUES (new.id, new.content);
+                    END;
+                """)
+                if not fts_exists:
+                    # FTS5のないSQLiteで作成されたデータベースの既存の行を索引に登録する
+                    self.conn.execute("INSERT INTO memos_fts(memos_fts) VALUES ('rebuild')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # FTS5またはtrigramトークナイザーが使えないSQLiteでは本文を直接走査する
+            self.has_fts = False
+
+    def close(self) -> None:
+        """データベース接続を閉じる"""
+        self.conn.close()
+
+    def iter_metadata(self) -> Iterator[tuple[str, str, str, str]]:
+        """
+        すべてのメモの本文以外の情報をID順に返す
+
+        Yields:
+            tuple[str, str, str, str]: (メモID, タイトル, 日付, カンマ区切りのタグ)
+        """
+        cursor = self.conn.execute("SELECT id, title, date, tags FROM memos ORDER BY id")
+        for memo_id, title, date, tags in cursor:
+            yield str(memo_id), title, date, tags
+
+    def load_content(self, memo_id: str) -> str:
+        """
+        メモの本文を読み込む
+
+        Args:
+            memo_id (str): メモのID
+
+        Returns:
+            str: メモの本文。メモが存在しない場合は空文字
+        """
+        row = self.conn.execute("SELECT content FROM memos WHERE id = ?", (int(memo_id),)).fetchone()
+        return row[0] if row else ""
+
+    def load_contents(self, memo_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        複数のメモの本文をまとめて読み込む
+
+        Args:
+            memo_ids (Iterable[str]): メモIDのリスト
+
+        Returns:
+            Dict[str, str]: メモIDをキーとする本文の辞書
+        """
+        contents = {}
+        for batch in _batched(list(memo_ids)):
+            placeholders = ','.join('?' * len(batch))
+            cursor = self.conn.execute(
+                f"SELECT id, content FROM memos WHERE id IN ({placeholders})",
+                [int(memo_id) for memo_id in batch])
+            for memo_id, content in cursor:
+                contents[str(memo_id)] = content
+        return contents
+
+    def search_candidates(self, search_text: str) -> Set[str]:
+        """
+        本文に検索テキストを含む可能性のあるメモIDを返す
+
+        FTS5が利用でき、検索テキストが3文字以上の場合は全文検索インデックスを使う。
+        それ以外の場合は本文をケースフォールドして部分一致で探す。
+
+        Args:
+            search_text (str): 検索するテキスト
+
+        Returns:
+            Set[str]: 候補となるメモIDの集合（大文字小文字は区別しない）
+        """
+        if self.has_fts and len(search_text) >= _FTS_MIN_QUERY_LENGTH:
+            phrase = '"' + search_text.replace('"', '""') + '"'
+            cursor = self.conn.execute("SELECT rowid FROM memos_fts WHERE memos_fts MATCH ?", (phrase,))
+        else:
+            cursor = self.conn.execute(
+                "SELECT id FROM memos WHERE instr(memo_casefold(content), ?) > 0", (search_text.casefold(),))
+        return {str(row[0]) for row in cursor}
+
+    def write_changes(self, rows: Iterable[tuple], deleted_ids: Iterable[str]) -> None:
+        """
+        変更されたメモと削除されたメモを1つのトランザクションで書き込む
+
+        Args:
+            rows (Iterable[tuple]): (メモID, タイトル, 日付, 本文, カンマ区切りのタグ)のタプル。
+                本文がNoneの行は本文を更新しない
+            deleted_ids (Iterable[str]): 削除されたメモのID
+        """
+        with self.conn:
+            self.conn.executemany("DELETE FROM memos WHERE id = ?",
+                                  [(int(memo_id),) for memo_id in deleted_ids])
+            for memo_id, title, date, content, tags in rows:
+                if content is None:
+                    self.conn.execute(
+                        "UPDATE memos SET title = ?, date = ?, tags = ? WHERE id = ?",
+                        (title, date, tags, int(memo_id)))
+                else:
+                    self.conn.execute(
+                        "INSERT INTO memos (id, title, date, content, tags) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT(id) DO UPDATE SET"
+                        " title = excluded.title, date = excluded.date,"
+                        " content = excluded.content, tags = excluded.tags",
+                        (int(memo_id), title, date, content, tags))
+
+    def replace_all(self, rows: Iterable[tuple]) -> None:
+        """
+        データベースの内容をすべて置き換える
+
+        Args:
+            rows (Iterable[tuple]): (メモID, タイトル, 日付, 本文, カンマ区切りのタグ)のタプル
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM memos")
+            self.conn.executemany(
+                "INSERT INTO memos (id, title, date, content, tags) VALUES (?, ?, ?, ?, ?)",
+                ((int(memo_id), title, date, content, tags)
+                 for memo_id, title, date, content, tags in rows))
+
+def _batched(items: list) -> Iterator[list]:
+    """
+    リストを問い合わせ用の大きさに分割する
+
+    Args:
+        items (list): 分割するリスト
+
+    Yields:
+        list: 最大_ID_BATCH_SIZE件の部分リスト
+    """
+    for start in range(0, len(items), _ID_BATCH_SIZE):
+        yield items[start:start + _ID_BATCH_SIZE]
@@ -0,0 +1,27 @@
+import unittest
+
+from benchmarks.bench_memo import compare_results, generate_memos, run_benchmarks
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generate_memos_is_deterministic(self):
+        first = generate_memos(20, seed=1)
+        second = generate_memos(20, seed=1)
+        self.assertEqual([(m.title, m.date, m.content, m.tags) for m in first],
+                         [(m.title, m.date, m.content, m.tags) for m in second])
+
+    def test_run_and_compare_small_corpus(self):
+        results = run_benchmarks([20], repeat=1)
+        operations = {r["operation"] for r in results}
+        self.assertEqual(operations, {"add_memo", "save_to_file", "load_from_file", "search_memos",
+                                      "search_memos_cached", "filter_by_date", "get_all_tags", "export_memos"})
+        self.assertTrue(all(r["seconds"] >= 0 and r["peak_bytes"] >= 0 for r in results))
+
+        report = {"results": results}
+        slower = {"results": [dict(r, seconds=r["seconds"] * 2 + 1) for r in results]}
+        self.assertEqual(compare_results(report, report, 1.2), [])
+        self.assertEqual(len(compare_results(report, slower, 1.2)), len(results))
+
+
+if __name__ == "__main__":
+    unittest.main()
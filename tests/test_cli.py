@@ -0,0 +1,91 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import cli
+from logic import MemoManager
+
+
+class TestCommandLine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.xml_path = os.path.join(self.temp_dir.name, "memos.xml")
+        manager = MemoManager()
+        entries = [
+            ("会議メモ", "2024/01/10", "来期の予算について議論した", {"仕事"}),
+            ("買い物", "2024/02/20", "牛乳と予算外のお菓子", {"個人"}),
+            ("旅行", "2024/03/05", "温泉の予約", {"個人", "仕事"}),
+        ]
+        for title, date, content, tags in entries:
+            memo = manager.memos[manager.add_memo()]
+            memo.title = title
+            memo.date = date
+            memo.content = content
+            memo.tags = tags
+        manager.save_to_file(self.xml_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_cli(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            status = cli.main(list(argv))
+        return status, stdout.getvalue().splitlines(), stderr.getvalue()
+
+    def test_search_and_filter(self):
+        status, lines, _ = self.run_cli("search", self.xml_path, "予算")
+        self.assertEqual(status, 0)
+        self.assertEqual([line.split("\t")[:3] for line in lines],
+                         [["0", "2024/01/10", "会議メモ"], ["1", "2024/02/20", "買い物"]])
+
+        _, lines, _ = self.run_cli("search", self.xml_path, "予算 会議", "--ranked")
+        self.assertEqual(lines[0].split("\t")[0], "0")
+
+        _, lines, _ = self.run_cli("filter", self.xml_path, "--tag", "仕事", "--from", "2024/02/01")
+        self.assertEqual([line.split("\t")[0] for line in lines], ["2"])
+        _, lines, _ = self.run_cli("filter", self.xml_path, "--tag", "仕事", "--tag", "個人", "--all-tags")
+        self.assertEqual([line.split("\t")[0] for line in lines], ["2"])
+        _, lines, _ = self.run_cli("filter", self.xml_path, "--tag", "仕事", "--query", "予算")
+        self.assertEqual([line.split("\t")[0] for line in lines], ["0"])
+
+        status, _, error = self.run_cli("search", self.xml_path, "(予算")
+        self.assertEqual(status, 1)
+        self.assertTrue(error.startswith("エラー:"))
+
+    def test_export_stats_and_merge(self):
+        output = os.path.join(self.temp_dir.name, "out.jsonl")
+        self.assertEqual(self.run_cli("export", self.xml_path, output, "--tag", "個人")[0], 0)
+        with open(output, encoding='utf-8') as file:
+            self.assertEqual([json.loads(line)["title"] for line in file], ["買い物", "旅行"])
+
+        status, lines, _ = self.run_cli("stats", self.xml_path, "--json")
+        stats = json.loads("\n".join(lines))
+        self.assertEqual((status, stats["memos"], stats["first_date"], stats["last_date"]),
+                         (0, 3, "2024/01/10", "2024/03/05"))
+        self.assertEqual(stats["tags"], {"仕事": 2, "個人": 2})
+
+        merged = os.path.join(self.temp_dir.name, "merged.xml")
+        self.assertEqual(self.run_cli("merge", merged, self.xml_path, self.xml_path, "--jobs", "1")[0], 0)
+        _, lines, _ = self.run_cli("stats", merged)
+        self.assertEqual(lines[0], "メモ数: 6")
+
+        status, _, error = self.run_cli("stats", os.path.join(self.temp_dir.name, "missing.db"))
+        self.assertEqual(status, 1)
+        self.assertIn("missing.db", error)
+
+    def test_tkinter_is_not_imported(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, cli; print('tkinter' in sys.modules)"],
+            cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+
+from exporters import format_from_path
+from logic import MemoManager
+
+
+class TestExportFormats(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.manager = MemoManager()
+        memos = [
+            ("会議メモ", "2024/01/10", "来期の予算\n要確認, \"至急\"", {"仕事", "done"}),
+            ("買い物", "2024/02/20", "牛乳", set()),
+        ]
+        for title, date, content, tags in memos:
+            memo_id = self.manager.add_memo()
+            memo = self.manager.memos[memo_id]
+            memo.title = title
+            memo.date = date
+            memo.content = content
+            memo.tags = tags
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def export(self, file_name, **options):
+        path = os.path.join(self.temp_dir.name, file_name)
+        self.manager.export_memos(path, **options)
+        return path
+
+    def test_text_format(self):
+        with open(self.export("memos.txt"), encoding='utf-8') as file:
+            self.assertEqual(file.read(),
+                             "タイトル: 会議メモ\n日付: 2024/01/10\nタグ: done, 仕事\n"
+                             "内容:\n来期の予算\n要確認, \"至急\"\n" + "-" * 50 + "\n"
+                             "タイトル: 買い物\n日付: 2024/02/20\nタグ: \n内容:\n牛乳\n")
+
+    def test_jsonl_csv_and_markdown_formats(self):
+        with open(self.export("memos.jsonl"), encoding='utf-8') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(records[0], {"title": "会議メモ", "date": "2024/01/10", "tags": ["done", "仕事"],
+                                      "content": "来期の予算\n要確認, \"至急\""})
+        self.assertEqual(len(records), 2)
+
+        with open(self.export("memos.csv"), encoding='utf-8', newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows, [["タイトル", "日付", "タグ", "内容"],
+                                ["会議メモ", "2024/01/10", "done, 仕事", "来期の予算\n要確認, \"至急\""],
+                                ["買い物", "2024/02/20", "", "牛乳"]])
+
+        with open(self.export("memos.md"), encoding='utf-8') as file:
+            markdown = file.read()
+        self.assertTrue(markdown.startswith("# 会議メモ\n\n- 日付: 2024/01/10\n- タグ: done, 仕事\n\n"))
+        self.assertIn("\n---\n\n# 買い物\n", markdown)
+
+    def test_gzip_and_explicit_format(self):
+        path = self.export("memos.jsonl.gz")
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            self.assertEqual([json.loads(line)["title"] for line in file], ["会議メモ", "買い物"])
+
+        path = self.export("export.dat", memo_ids=["1"], export_format="csv", compress=True)
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+            self.assertEqual(list(csv.reader(file))[1][0], "買い物")
+
+        with self.assertRaises(ValueError):
+            self.export("memos.xml", export_format="xml")
+
+    def test_format_from_path(self):
+        self.assertEqual(format_from_path("a.JSONL"), "jsonl")
+        self.assertEqual(format_from_path("a.csv.gz"), "csv")
+        self.assertEqual(format_from_path("a.md"), "markdown")
+        self.assertEqual(format_from_path("a.log"), "text")
+
+    def test_export_does_not_keep_unloaded_contents(self):
+        db_path = os.path.join(self.temp_dir.name, "memos.db")
+        self.manager.save_to_database(db_path)
+        self.manager.store.close()
+        manager = MemoManager()
+        manager.open_database(db_path)
+        try:
+            path = os.path.join(self.temp_dir.name, "memos.jsonl")
+            manager.export_memos(path)
+            with open(path, encoding='utf-8') as file:
+                self.assertEqual(json.loads(file.readline())["content"], "来期の予算\n要確認, \"至急\"")
+            self.assertIsNone(manager.memos["0"]._content)
+        finally:
+            manager.store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from instrumentation import Instrumentation, StartupProfile, instrumentation
+from logic import MemoManager
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = instrumentation.enabled
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.enabled = self.was_enabled
+        instrumentation.reset()
+
+    def test_manager_operations_are_recorded_only_when_enabled(self):
+        manager = MemoManager()
+        manager.memos[manager.add_memo()].content = "会議の予算"
+
+        instrumentation.enabled = False
+        manager.search_memos("予算")
+        self.assertEqual(instrumentation.summary(), [])
+
+        instrumentation.enabled = True
+        manager.search_memos("予算")
+        manager.search_memos("会議")
+        manager.filter_by_tags(["仕事"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(path)
+            manager.load_from_file(path)
+        counts = {row["operation"]: row["count"] for row in instrumentation.summary()}
+        self.assertEqual(counts, {"search_memos": 2, "filter_by_tags": 1,
+                                  "save_to_file": 1, "load_from_file": 1})
+
+    def test_slow_operations_and_dumps(self):
+        recorder = Instrumentation(slow_threshold=0.5, history_size=2)
+        recorder.record("load_from_file", 0.2)
+        recorder.record("load_from_file", 1.0)
+        recorder.record("search_memos", 0.7)
+        recorder.record("export_memos", 0.9)
+
+        self.assertEqual([entry["operation"] for entry in recorder.slow_operations()],
+                         ["export_memos", "search_memos"])
+        load = recorder.summary()[0]
+        self.assertEqual((load["operation"], load["count"], load["max_seconds"]), ("load_from_file", 2, 1.0))
+        self.assertAlmostEqual(load["mean_seconds"], 0.6)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            json_path = os.path.join(temp_dir, "stats.json")
+            csv_path = os.path.join(temp_dir, "stats.csv")
+            recorder.dump_json(json_path)
+            recorder.dump_csv(csv_path)
+            with open(json_path, encoding='utf-8') as file:
+                report = json.load(file)
+            with open(csv_path, encoding='utf-8', newline='') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual(len(report["summary"]), 3)
+        self.assertEqual(len(report["slow_operations"]), 2)
+        self.assertEqual([row["operation"] for row in rows], ["load_from_file", "export_memos", "search_memos"])
+
+        recorder.reset()
+        self.assertEqual((recorder.summary(), recorder.slow_operations()), ([], []))
+
+    def test_measure_context_manager(self):
+        recorder = Instrumentation()
+        with recorder.measure("refresh"):
+            pass
+        self.assertEqual(recorder.summary(), [])
+        recorder.enabled = True
+        with recorder.measure("refresh"):
+            pass
+        self.assertEqual(recorder.summary()[0]["count"], 1)
+
+    def test_startup_profile_reports_phases(self):
+        profile = StartupProfile()
+        profile.mark("imports")
+        self.assertEqual(profile.phases(), [])
+
+        profile.enabled = True
+        profile.mark("tk_root")
+        profile.mark("first_paint")
+        phases = profile.phases()
+        self.assertEqual([row["phase"] for row in phases], ["tk_root", "first_paint"])
+        self.assertAlmostEqual(phases[-1]["elapsed_seconds"], sum(row["seconds"] for row in phases))
+
+        output = io.StringIO()
+        profile.report(output)
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,13 @@
+import gc
 import os
 import tempfile
 import unittest
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
 
-from logic import MemoManager
+import logic
+from logic import Memo, MemoManager, OperationCancelled
+from query import make_resume_token
 
 
 class TestMemoManager(unittest.TestCase):
@@ -84,6 +89,628 @@ class TestMemoManager(unittest.TestCase):
         res_content2 = manager.search_memos("milk")
         self.assertTrue(any(r[0] == id0 and not r[3] for r in res_content2))
 
+    def test_search_memos_index_follows_edits(self):
+        manager = MemoManager()
+        id0 = manager.add_memo()
+        manager.memos[id0].title = "定例会議"
+        manager.memos[id0].content = "来期の予算について"
+        id1 = manager.add_memo()
+        manager.memos[id1].content = "予算案を作成する。予算は未定"
+
+        self.assertEqual(manager.search_memos("予算"),
+                         [(id0, 3, 5, False), (id1, 0, 2, False), (id1, 9, 11, False)])
+        self.assertEqual(manager.search_memos("会"), [(id0, 2, 3, True)])
+
+        # 本文の編集と削除がインデックスに反映される
+        manager.memos[id0].content = "議事録"
+        self.assertEqual(manager.search_memos("予算"),
+                         [(id1, 0, 2, False), (id1, 9, 11, False)])
+        manager.delete_memo(id1)
+        self.assertEqual(manager.search_memos("予算"), [])
+        self.assertEqual(manager.search_memos("議事"), [(id0, 0, 2, False)])
+
+    def test_search_memos_index_keeps_case_sensitive_matches(self):
+        manager = MemoManager()
+        memo_id = manager.add_memo()
+        # lowerでは語末のΣがςになるため、小文字化したインデックスでは候補から漏れる
+        manager.memos[memo_id].title = "ΟΔΟΣ"
+        manager.memos[memo_id].content = "Straße"
+        self.assertEqual(manager.search_memos("Σ", case_sensitive=True), [(memo_id, 3, 4, True)])
+        self.assertEqual(manager.search_memos("ΟΣ", case_sensitive=True), [(memo_id, 2, 4, True)])
+        self.assertEqual(manager.search_memos("ς"), [(memo_id, 3, 4, True)])
+        self.assertEqual(manager.search_memos("ße", case_sensitive=True), [(memo_id, 4, 6, False)])
+
+    def test_search_memos_after_load_and_insert(self):
+        manager = MemoManager()
+        id0 = manager.add_memo()
+        manager.memos[id0].content = "Budget Review"
+
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            temp_path = tmp.name
+        try:
+            manager.save_to_file(temp_path)
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path)
+        finally:
+            os.remove(temp_path)
+
+        self.assertEqual(loaded.search_memos("budget"), [("0", 0, 6, False)])
+        self.assertEqual(loaded.search_memos("budget", case_sensitive=True), [])
+
+        new_id = loaded.insert_memo(manager.memos[id0])
+        self.assertEqual(new_id, "1")
+        self.assertEqual([r[0] for r in loaded.search_memos("review")], ["0", "1"])
+
+    def test_load_from_file_reports_progress(self):
+        manager = MemoManager()
+        for _ in range(3):
+            manager.add_memo()
+
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            temp_path = tmp.name
+        try:
+            manager.save_to_file(temp_path)
+            calls = []
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path, progress=lambda count, size: calls.append((count, size)))
+            file_size = os.path.getsize(temp_path)
+        finally:
+            os.remove(temp_path)
+
+        self.assertEqual([count for count, _ in calls], [1, 2, 3])
+        self.assertTrue(all(0 < size <= file_size for _, size in calls))
+        self.assertEqual(list(loaded.memos.keys()), ["0", "1", "2"])
+
+    def test_load_from_file_keeps_memos_on_parse_error(self):
+        manager = MemoManager()
+        memo_id = manager.add_memo()
+
+        with tempfile.NamedTemporaryFile('w', suffix='.xml', delete=False, encoding='utf-8') as tmp:
+            tmp.write("<memos><memo><name>壊れた</name><date>2024/01/01</date>")
+            temp_path = tmp.name
+        try:
+            with self.assertRaises(Exception):
+                manager.load_from_file(temp_path)
+        finally:
+            os.remove(temp_path)
+
+        self.assertEqual(list(manager.memos.keys()), [memo_id])
+        self.assertIsNone(manager.current_file)
+
+    def test_save_to_file_matches_pretty_printed_format(self):
+        manager = MemoManager()
+        memo_id = manager.add_memo()
+        manager.memos[memo_id].title = "A & B"
+        manager.memos[memo_id].date = "2024/03/03"
+        manager.memos[memo_id].content = '<予定> "10時"\n2行目'
+        manager.memos[memo_id].tags = {"b", "a"}
+        manager.add_memo()
+
+        # 従来のElementTree + minidomによる出力と同じ内容になる
+        root = ET.Element("memos")
+        for memo in manager.memos.values():
+            memo_elem = ET.SubElement(root, "memo")
+            ET.SubElement(memo_elem, "name").text = memo.title
+            ET.SubElement(memo_elem, "date").text = memo.date
+            ET.SubElement(memo_elem, "content").text = memo.content
+            ET.SubElement(memo_elem, "tags").text = ','.join(sorted(memo.tags))
+        expected = minidom.parseString(ET.tostring(root, 'utf-8')).toprettyxml(indent="    ")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(temp_path)
+            with open(temp_path, encoding='utf-8') as file:
+                self.assertEqual(file.read(), expected)
+
+            manager.save_to_file(temp_path, indent=None)
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path)
+            self.assertEqual(loaded.memos["0"].content, '<予定> "10時"\n2行目')
+            self.assertEqual(loaded.memos["0"].tags, {"a", "b"})
+            self.assertEqual(os.listdir(temp_dir), ["memos.xml"])
+
+    def test_save_to_file_failure_keeps_existing_file(self):
+        manager = MemoManager()
+        memo_id = manager.add_memo()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(temp_path)
+            with open(temp_path, encoding='utf-8') as file:
+                saved = file.read()
+
+            manager.memos[memo_id].content = "制御文字\x00"
+            with self.assertRaises(ValueError):
+                manager.save_to_file(temp_path)
+
+            with open(temp_path, encoding='utf-8') as file:
+                self.assertEqual(file.read(), saved)
+            self.assertEqual(os.listdir(temp_dir), ["memos.xml"])
+
+    def test_tag_index_follows_tag_changes(self):
+        manager = MemoManager()
+        id0 = manager.add_memo()
+        id1 = manager.add_memo()
+        manager.add_tags(id0, ["仕事", "重要"])
+        manager.add_tags(id1, ["仕事"])
+        self.assertEqual(manager.get_all_tags(), ["仕事", "重要"])
+        self.assertEqual(manager.filter_by_tags(["重要"]), {id0})
+        self.assertEqual(manager.filter_by_tags(["仕事", "未使用"]), {id0, id1})
+
+        # 参照数が0になったタグは一覧から消える
+        manager.remove_tags(id0, ["重要"])
+        self.assertEqual(manager.get_all_tags(), ["仕事"])
+        manager.memos[id1].tags = {"個人"}
+        self.assertEqual(manager.filter_by_tags(["仕事"]), {id0})
+        manager.delete_memo(id0)
+        self.assertEqual(manager.get_all_tags(), ["個人"])
+        self.assertEqual(manager.filter_by_tags(["仕事"]), set())
+
+    def test_tag_index_after_load_and_insert(self):
+        manager = MemoManager()
+        memo_id = manager.add_memo()
+        manager.memos[memo_id].tags = {"a", "b"}
+
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            temp_path = tmp.name
+        try:
+            manager.save_to_file(temp_path)
+            imported = MemoManager()
+            imported.load_from_file(temp_path)
+            manager.load_from_file(temp_path)
+        finally:
+            os.remove(temp_path)
+
+        self.assertEqual(manager.get_all_tags(), ["a", "b"])
+        new_id = manager.insert_memo(imported.memos["0"])
+        self.assertEqual(manager.filter_by_tags(["b"]), {"0", new_id})
+
+        # 登録済みのメモは複製されるため、元のMemoManagerのインデックスは変更に追従する
+        self.assertIsNot(manager.memos[new_id], imported.memos["0"])
+        imported.memos["0"].tags = {"c"}
+        imported.memos["0"].title = "編集後"
+        self.assertEqual(imported.filter_by_tags(["c"]), {"0"})
+        self.assertEqual(imported.search_memos("編集"), [("0", 0, 2, True)])
+        self.assertEqual(manager.filter_by_tags(["c"]), set())
+        self.assertEqual(manager.merge_memos([imported.memos["0"]]), [str(int(new_id) + 1)])
+        self.assertEqual(imported.search_memos("編集"), [("0", 0, 2, True)])
+
+    def test_date_index_follows_date_changes(self):
+        manager = MemoManager()
+        self.assertEqual(manager.get_date_range(), ("", ""))
+        id0 = manager.add_memo()
+        manager.memos[id0].date = "2023/09/15"
+        id1 = manager.add_memo()
+        manager.memos[id1].date = "2023/09/01"
+        id2 = manager.add_memo()
+        manager.memos[id2].date = "2023/09/20"
+
+        self.assertEqual(manager.get_date_range(), ("2023/09/01", "2023/09/20"))
+        self.assertEqual(manager.filter_by_date("2023/09/01", "2023/09/15"), [id1, id0])
+        self.assertEqual(manager.filter_by_date("2023/09/16", "2023/09/19"), [])
+
+        manager.memos[id1].date = "2023/10/01"
+        manager.delete_memo(id2)
+        self.assertEqual(manager.get_date_range(), ("2023/09/15", "2023/10/01"))
+        self.assertEqual(manager.filter_by_date("2023/09/01", "2023/12/31"), [id0, id1])
+
+    def test_add_memo_does_not_reuse_deleted_max_id(self):
+        manager = MemoManager()
+        manager.add_memo()
+        id1 = manager.add_memo()
+        manager.delete_memo(id1)
+        self.assertEqual(manager.add_memo(), "2")
+
+    def test_merge_from_file_appends_with_unique_ids(self):
+        source = MemoManager()
+        src0 = source.add_memo()
+        source.memos[src0].date = "2022/01/01"
+        source.memos[src0].content = "インポート元"
+        source.memos[src0].tags = {"外部"}
+        source.add_memo()
+
+        manager = MemoManager()
+        id0 = manager.add_memo()
+        manager.memos[id0].date = "2024/01/01"
+
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            temp_path = tmp.name
+        try:
+            source.save_to_file(temp_path)
+            new_ids = manager.merge_from_file(temp_path)
+        finally:
+            os.remove(temp_path)
+
+        self.assertEqual(new_ids, ["1", "2"])
+        self.assertEqual(list(manager.memos.keys()), ["0", "1", "2"])
+        self.assertIsNone(manager.current_file)
+        self.assertEqual(manager.filter_by_tags(["外部"]), {"1"})
+        self.assertEqual(manager.search_memos("インポート"), [("1", 0, 5, False)])
+        self.assertEqual(manager.get_date_range()[0], "2022/01/01")
+        self.assertEqual(manager.add_memo(), "3")
+
+    def test_merge_from_file_replays_journal(self):
+        source = MemoManager()
+        source.memos[source.add_memo()].title = "orig"
+        source.memos[source.add_memo()].title = "deleted"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            source.save_to_file(temp_path)
+            source.memos["0"].title = "edited"
+            source.delete_memo("1")
+            source.memos[source.add_memo()].title = "journaled"
+            source.save_changes()
+
+            manager = MemoManager()
+            new_ids = manager.merge_from_file(temp_path)
+            self.assertEqual([manager.memos[memo_id].title for memo_id in new_ids], ["edited", "journaled"])
+            self.assertEqual(manager.memos[new_ids[1]].source, temp_path)
+
+    def test_merge_from_files_loads_notebooks_in_parallel(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = []
+            for i in range(3):
+                source = MemoManager()
+                for j in range(i + 1):
+                    memo_id = source.add_memo()
+                    source.memos[memo_id].title = f"ファイル{i}-{j}"
+                    source.memos[memo_id].tags = {f"tag{i}"}
+                path = os.path.join(temp_dir, f"notebook{i}.xml")
+                source.save_to_file(path)
+                paths.append(path)
+            # ジャーナルに追記された変更も反映される
+            source.memos["0"].title = "ジャーナル"
+            source.save_changes()
+            with open(os.path.join(temp_dir, "readme.txt"), "w", encoding="utf-8") as file:
+                file.write("対象外")
+
+            manager = MemoManager()
+            manager.add_memo()
+            progress = []
+            new_ids = manager.merge_from_files(temp_dir, max_workers=2,
+                                               progress=lambda done, total: progress.append((done, total)))
+            self.assertEqual(new_ids, ["1", "2", "3", "4", "5", "6"])
+            self.assertEqual([manager.memos[memo_id].title for memo_id in new_ids],
+                             ["ファイル0-0", "ファイル1-0", "ファイル1-1", "ジャーナル", "ファイル2-1", "ファイル2-2"])
+            self.assertEqual([manager.memos[memo_id].source for memo_id in new_ids],
+                             [paths[0], paths[1], paths[1], paths[2], paths[2], paths[2]])
+            self.assertIsNone(manager.memos["0"].source)
+            self.assertEqual(manager.filter_by_tags(["tag1"]), {"2", "3"})
+            self.assertEqual(progress[-1], (3, 3))
+
+            serial = MemoManager()
+            serial.merge_from_files(reversed(paths), max_workers=1)
+            self.assertEqual(serial.memos["0"].source, paths[2])
+
+            with self.assertRaises(FileNotFoundError):
+                manager.merge_from_files([paths[0], os.path.join(temp_dir, "missing.xml")], max_workers=2)
+            self.assertEqual(len(manager.memos), 7)
+
+    def test_memo_storage_is_compact_and_shared(self):
+        first = Memo("a", "2024/01/01", "", {"仕事", "重要"})
+        second = Memo("b", "".join(["2024/", "01/01"]), "", ["重要", "仕事"])
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertIs(first.tags, second.tags)
+        self.assertIs(first.date, second.date)
+        self.assertEqual(first.tags, {"仕事", "重要"})
+        with self.assertRaises(AttributeError):
+            first.tags.add("個人")
+
+        second.tags = {"個人"}
+        self.assertEqual(second.tags, frozenset({"個人"}))
+        self.assertEqual(first.tags, {"仕事", "重要"})
+
+        # どのメモも使わなくなったタグ集合は共有テーブルに残らない
+        unused = frozenset({"一時的なタグ"})
+        Memo("c", "2024/01/01", "", unused)
+        gc.collect()
+        self.assertNotIn(unused, logic._SHARED_TAG_SETS)
+
+    def _snapshot(self, manager):
+        return {memo_id: (memo.title, memo.date, memo.content, memo.tags)
+                for memo_id, memo in manager.memos.items()}
+
+    def test_save_changes_appends_journal_and_load_replays_it(self):
+        manager = MemoManager()
+        for title in ("A", "B", "C"):
+            manager.memos[manager.add_memo()].title = title
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(temp_path)
+            with open(temp_path, 'rb') as file:
+                saved = file.read()
+
+            manager.memos["0"].content = "編集した本文"
+            manager.delete_memo("1")
+            new_id = manager.add_memo()
+            manager.memos[new_id].tags = {"新規"}
+            # 保存前に追加して削除したメモは書き込まれない
+            manager.delete_memo(manager.add_memo())
+            manager.save_changes()
+
+            with open(temp_path, 'rb') as file:
+                self.assertEqual(file.read(), saved)
+            with open(temp_path + ".journal", encoding='utf-8') as file:
+                self.assertEqual(len(file.readlines()), 4)
+
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path)
+            self.assertEqual(self._snapshot(loaded), self._snapshot(manager))
+            self.assertEqual(loaded.filter_by_tags(["新規"]), {new_id})
+            self.assertEqual(loaded.add_memo(), "4")
+
+    def test_journal_ids_after_save_renumbers_memos(self):
+        manager = MemoManager()
+        for title in ("A", "B", "C"):
+            manager.memos[manager.add_memo()].title = title
+        manager.delete_memo("0")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            # 保存したファイルではメモ"1", "2"が0, 1番目になる
+            manager.save_to_file(temp_path)
+            manager.memos["2"].title = "C2"
+            manager.delete_memo("1")
+            manager.memos[manager.add_memo()].title = "D"
+            manager.save_changes()
+            manager.memos["3"].title = "D2"
+            manager.save_changes()
+
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path)
+            self.assertEqual([memo.title for memo in loaded.memos.values()], ["C2", "D2"])
+
+    def test_load_ignores_stale_or_torn_journal(self):
+        manager = MemoManager()
+        manager.add_memo()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(temp_path)
+            manager.memos["0"].title = "保存済み"
+            manager.save_changes()
+            with open(temp_path + ".journal", 'a', encoding='utf-8') as file:
+                file.write('{"op": "set", "id": "0", "ti')
+
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path)
+            self.assertEqual(loaded.memos["0"].title, "保存済み")
+            # 不完全な行は切り詰められ、以降の追記は正しく再生される
+            loaded.memos["0"].content = "追記"
+            loaded.save_changes()
+            reloaded = MemoManager()
+            reloaded.load_from_file(temp_path)
+            self.assertEqual(self._snapshot(reloaded), self._snapshot(loaded))
+
+            # 別の内容で置き換えられたXMLファイルには古いジャーナルを適用しない
+            other = MemoManager()
+            other.memos[other.add_memo()].title = "別のファイル"
+            other.add_memo()
+            other.save_to_file(os.path.join(temp_dir, "other.xml"))
+            os.replace(os.path.join(temp_dir, "other.xml"), temp_path)
+            replaced = MemoManager()
+            replaced.load_from_file(temp_path)
+            self.assertEqual(replaced.memos["0"].title, "別のファイル")
+
+    def test_compact_journal_rewrites_file(self):
+        manager = MemoManager()
+        manager.add_memo()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(temp_path)
+            manager.memos["0"].content = "統合される本文"
+            manager.save_changes()
+            self.assertTrue(os.path.exists(temp_path + ".journal"))
+
+            manager.compact_journal()
+            self.assertEqual(os.listdir(temp_dir), ["memos.xml"])
+            loaded = MemoManager()
+            loaded.load_from_file(temp_path)
+            self.assertEqual(loaded.memos["0"].content, "統合される本文")
+
+    def test_cancelled_save_and_export_leave_no_partial_files(self):
+        manager = MemoManager()
+        for _ in range(3):
+            manager.add_memo()
+
+        def cancel_at_second(done, total):
+            self.assertEqual(total, 3)
+            if done == 2:
+                raise OperationCancelled()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, "memos.xml")
+            manager.save_to_file(temp_path)
+            with open(temp_path, 'rb') as file:
+                saved = file.read()
+            manager.add_memo()
+            with self.assertRaises(OperationCancelled):
+                manager.save_to_file(temp_path, progress=lambda done, total: cancel_at_second(done, total - 1))
+            with open(temp_path, 'rb') as file:
+                self.assertEqual(file.read(), saved)
+            self.assertEqual(manager.current_file, temp_path)
+
+            export_path = os.path.join(temp_dir, "memos.txt")
+            with self.assertRaises(OperationCancelled):
+                manager.export_memos(export_path, ["0", "1", "2"], progress=cancel_at_second)
+            self.assertEqual(os.listdir(temp_dir), ["memos.xml"])
+
+            # 既存のファイルへのエクスポートを中断しても、元のファイルは残る
+            with open(export_path, 'w', encoding='utf-8') as file:
+                file.write("以前のエクスポート")
+            with self.assertRaises(OperationCancelled):
+                manager.export_memos(export_path, ["0", "1", "2"], progress=cancel_at_second)
+            with open(export_path, encoding='utf-8') as file:
+                self.assertEqual(file.read(), "以前のエクスポート")
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["memos.txt", "memos.xml"])
+
+            progress = []
+            manager.export_memos(export_path, progress=lambda done, total: progress.append((done, total)))
+            self.assertEqual(progress[-1], (4, 4))
+
+    def test_update_content_reindexes_only_on_change(self):
+        manager = MemoManager()
+        memo_id = manager.add_memo()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager.save_to_file(os.path.join(temp_dir, "memos.xml"))
+
+            self.assertFalse(manager.update_content(memo_id, ""))
+            self.assertEqual(manager._dirty_fields, {})
+
+            self.assertTrue(manager.update_content(memo_id, "まとめて反映"))
+            self.assertEqual(manager._dirty_fields, {memo_id: {"content"}})
+            self.assertEqual(manager.search_memos("反映"), [(memo_id, 4, 6, False)])
+
+    def test_iter_search_memos_is_lazy_and_resumable(self):
+        manager = MemoManager()
+        for i in range(5):
+            memo_id = manager.add_memo()
+            manager.memos[memo_id].content = f"memo {i} memo"
+
+        results = manager.iter_search_memos("memo", limit=3)
+        self.assertEqual(list(results), [("0", 0, 4, False), ("0", 7, 11, False), ("1", 0, 4, False)])
+
+        resumed = manager.iter_search_memos("memo", resume_token="1:1:0:4")
+        self.assertEqual(next(resumed), ("1", 7, 11, False))
+        # 走査中に削除されたメモは返さない
+        manager.delete_memo("2")
+        self.assertEqual([match[0] for match in resumed], ["3", "3", "4", "4"])
+        self.assertEqual(len(manager.search_memos("memo")), 8)
+
+    def test_rank_memos_orders_by_bm25_score(self):
+        manager = MemoManager()
+        entries = [
+            ("買い物", "牛乳と卵"),
+            ("予算", "来期の計画"),
+            ("議事録", "予算の話と予算の確認と予算の修正"),
+            ("議事録", "予算の話"),
+            ("日記", "天気が良かった"),
+        ]
+        for title, content in entries:
+            memo_id = manager.add_memo()
+            manager.memos[memo_id].title = title
+            manager.memos[memo_id].content = content
+
+        ranked = manager.rank_memos("予算")
+        # タイトルの一致は本文より重く、出現回数の多いメモが上位になる
+        self.assertEqual([memo_id for memo_id, _ in ranked], ["1", "2", "3"])
+        self.assertTrue(ranked[0][1] > ranked[1][1] > ranked[2][1] > 0)
+        self.assertEqual(manager.rank_memos("予算", limit=1), ranked[:1])
+        # 複数の語を含むメモほどスコアが高い
+        self.assertEqual(manager.rank_memos("予算 確認")[0][0], "2")
+        self.assertEqual(manager.rank_memos("存在しない"), [])
+        self.assertEqual(manager.rank_memos("   "), [])
+
+        manager.memos["1"].title = "計画"
+        self.assertEqual([memo_id for memo_id, _ in manager.rank_memos("予算")], ["2", "3"])
+
+    def test_rank_memos_without_memos(self):
+        manager = MemoManager()
+        self.assertEqual(manager.rank_memos("予算"), [])
+        # タイトル・本文が空のメモしかない場合も失敗しない
+        manager.add_memo()
+        manager.memos["0"].title = ""
+        self.assertEqual(manager.rank_memos("予算"), [])
+
+    def test_result_cache_is_invalidated_by_changes(self):
+        manager = MemoManager()
+        for title, tags in (("会議の予算", {"仕事"}), ("買い物", {"個人"}), ("予算案", {"仕事"})):
+            memo_id = manager.add_memo()
+            manager.memos[memo_id].title = title
+            manager.memos[memo_id].tags = tags
+
+        first = manager.query_memos("予算")
+        self.assertEqual(manager.filter_by_tags(["仕事"]), {"0", "2"})
+        self.assertEqual(manager.query_memos("予算"), first)
+        self.assertEqual(manager.filter_by_tags(["仕事"]), {"0", "2"})
+        stats = manager.result_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+
+        # 返された結果を変更してもキャッシュには影響しない
+        manager.filter_by_tags(["仕事"]).add("1")
+        self.assertEqual(manager.filter_by_tags(["仕事"]), {"0", "2"})
+        # キャッシュ済みの結果からも途中から再開できる
+        self.assertEqual(list(manager.iter_query_memos("予算", resume_token=make_resume_token(first[0]))),
+                         first[1:])
+
+        manager.memos["1"].title = "予算外の買い物"
+        manager.memos["1"].tags = {"仕事"}
+        self.assertEqual([match[0] for match in manager.search_memos("予算")], ["0", "1", "2"])
+        self.assertEqual([match[0] for match in manager.query_memos("予算")], ["0", "1", "2"])
+        self.assertEqual(manager.filter_by_tags(["仕事"]), {"0", "1", "2"})
+        manager.delete_memo("0")
+        self.assertEqual(manager.filter_by_tags(["仕事"]), {"1", "2"})
+        self.assertEqual(manager.filter_by_date("2000/01/01", "2999/12/31"), ["1", "2"])
+
+    def test_filter_memos_combines_tags_dates_and_query(self):
+        manager = MemoManager()
+        entries = [
+            ("会議の予算", "2024/01/10", {"仕事", "重要"}),
+            ("買い物", "2024/02/20", {"個人"}),
+            ("予算案", "2024/03/05", {"仕事"}),
+            ("旅行の予算", "2024/04/01", {"個人", "重要"}),
+        ]
+        for title, date, tags in entries:
+            memo = manager.memos[manager.add_memo()]
+            memo.title, memo.date, memo.tags = title, date, tags
+
+        self.assertEqual(manager.filter_memos(), ["0", "1", "2", "3"])
+        self.assertEqual(manager.filter_memos(["仕事", "重要"]), ["0", "2", "3"])
+        self.assertEqual(manager.filter_memos(["仕事", "重要"], match_all_tags=True), ["0"])
+        self.assertEqual(manager.filter_memos(start_date="2024/02/01", end_date="2024/03/31"), ["1", "2"])
+        self.assertEqual(manager.filter_memos(start_date="2024/03/01"), ["2", "3"])
+        self.assertEqual(manager.filter_memos(["重要"], query="予算", end_date="2024/03/31"), ["0"])
+        self.assertEqual(manager.filter_memos(["存在しない"]), [])
+
+        # ビット集合はメモの変更・追加・削除に追従する
+        manager.memos["1"].tags = {"仕事", "重要"}
+        manager.memos["2"].date = "2024/05/01"
+        manager.delete_memo("0")
+        new_id = manager.add_memo()
+        manager.memos[new_id].tags = {"仕事"}
+        manager.memos[new_id].date = "2024/06/01"
+        self.assertEqual(manager.filter_memos(["仕事"]), ["1", "2", new_id])
+        self.assertEqual(manager.filter_memos(["仕事", "重要"], match_all_tags=True), ["1"])
+        self.assertEqual(manager.filter_memos(start_date="2024/04/01", end_date="2024/12/31"),
+                         ["2", "3", new_id])
+
+    def test_sorted_memo_ids_follow_changes(self):
+        manager = MemoManager()
+        for title, date in [("b", "2024/02/01"), ("c", "2024/01/01"), ("a", "2024/02/01")]:
+            memo = manager.memos[manager.add_memo()]
+            memo.title, memo.date = title, date
+
+        self.assertEqual(manager.sorted_memo_ids("title"), ["2", "0", "1"])
+        self.assertEqual(manager.sorted_memo_ids("title", reverse=True), ["1", "0", "2"])
+        self.assertEqual(manager.sorted_memo_ids("date"), ["1", "0", "2"])
+        with self.assertRaises(ValueError):
+            manager.sorted_memo_ids("tags")
+
+        # 並び順の一覧はメモの変更・追加・削除に追従する
+        manager.memos["1"].title = "0"
+        manager.memos["2"].date = "2023/12/31"
+        manager.delete_memo("0")
+        new_id = manager.add_memo()
+        manager.memos[new_id].title = "d"
+        manager.memos[new_id].date = "2024/06/01"
+        self.assertEqual(manager.sorted_memo_ids("title"), ["1", "2", new_id])
+        self.assertEqual(manager.sorted_memo_ids("date"), ["2", "1", new_id])
+
+        # 照合キーはタイトルから一度だけ求める
+        calls = []
+        manager.set_title_collation(lambda title: calls.append(title) or title[::-1])
+        self.assertEqual(manager.sorted_memo_ids("title", reverse=True), [new_id, "2", "1"])
+        manager.memos["2"].title = "z"
+        self.assertEqual(manager.sorted_memo_ids("title"), ["1", new_id, "2"])
+        self.assertEqual(sorted(calls), ["0", "a", "d", "z"])
+
+        # 一括で読み込んだ場合は最初の利用時に作り直す
+        manager.merge_memos([Memo(title="A", date="2025/01/01")])
+        self.assertEqual(manager.sorted_memo_ids("date")[-1], str(int(new_id) + 1))
+
 
 if __name__ == "__main__":
     unittest.main()
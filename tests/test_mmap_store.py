@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from logic import MemoManager
+from mmap_store import MappedXMLStore
+
+
+class TestMappedXMLStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.xml_path = os.path.join(self.temp_dir.name, "memos.xml")
+        source = MemoManager()
+        entries = [
+            ("会議メモ", "2024/01/10", "来期の予算について議論した", {"仕事"}),
+            ("記号", "2024/02/01", 'A & B <c> "引用"\n二行目', set()),
+            ("空", "2024/03/01", "", {"仕事", "個人"}),
+            ("English", "2024/04/01", "Budget review 予算", set()),
+        ]
+        for title, date, content, tags in entries:
+            memo_id = source.add_memo()
+            memo = source.memos[memo_id]
+            memo.title = title
+            memo.date = date
+            memo.content = content
+            memo.tags = tags
+        source.save_to_file(self.xml_path)
+        self.manager = MemoManager()
+
+    def tearDown(self):
+        self.manager._close_store()
+        self.temp_dir.cleanup()
+
+    def test_read_only_load_keeps_contents_out_of_memos(self):
+        self.manager.load_from_file(self.xml_path, read_only=True)
+        self.assertTrue(self.manager.read_only)
+        self.assertEqual([memo.title for memo in self.manager.memos.values()],
+                         ["会議メモ", "記号", "空", "English"])
+        self.assertEqual(self.manager.filter_by_tags(["仕事"]), {"0", "2"})
+        self.assertEqual(self.manager.filter_by_date("2024/02/01", "2024/03/31"), ["1", "2"])
+
+        self.assertEqual(self.manager.memos["0"].content, "来期の予算について議論した")
+        self.assertEqual(self.manager.memos["1"].content, 'A & B <c> "引用"\n二行目')
+        self.assertEqual(self.manager.memos["2"].content, "")
+        self.assertTrue(all(memo._content is None for memo in self.manager.memos.values()))
+        self.assertFalse(self.manager.update_content("0", "来期の予算について議論した"))
+        self.assertEqual(self.manager._dirty_fields, {})
+
+    def test_search_in_mapped_file(self):
+        self.manager.load_from_file(self.xml_path, read_only=True)
+        store = self.manager.store
+        # 大文字小文字のない語はバイト列で絞り込む（エスケープを含む本文は常に候補になる）
+        self.assertEqual(store.search_candidates("予算"), {"0", "1", "3"})
+        self.assertEqual(store.search_candidates("budget"), {"0", "1", "2", "3"})
+        self.assertEqual(self.manager.search_memos("予算"), [("0", 3, 5, False), ("3", 14, 16, False)])
+        self.assertEqual(self.manager.search_memos("budget"), [("3", 0, 6, False)])
+        self.assertEqual(self.manager.search_memos("& b"), [("1", 2, 5, False)])
+        self.assertTrue(all(memo._content is None for memo in self.manager.memos.values()))
+
+    def test_lru_cache_keeps_recent_contents(self):
+        store = MappedXMLStore(self.xml_path, cache_size=2)
+        try:
+            self.assertEqual(len(list(store.scan())), 4)
+            for memo_id in ("0", "1", "0", "3"):
+                store.load_content(memo_id)
+            self.assertEqual(list(store._cache), [0, 3])
+            self.assertEqual(store.load_contents(["1", "9"]), {"1": 'A & B <c> "引用"\n二行目'})
+            self.assertEqual(list(store._cache), [0, 3])
+        finally:
+            store.close()
+
+    def test_read_only_files_cannot_be_overwritten(self):
+        self.manager.load_from_file(self.xml_path, read_only=True)
+        self.manager.memos["1"].title = "変更"
+        with self.assertRaises(ValueError):
+            self.manager.save_changes()
+        with self.assertRaises(ValueError):
+            self.manager.compact_journal()
+
+        copy_path = os.path.join(self.temp_dir.name, "copy.xml")
+        self.manager.save_to_file(copy_path)
+        self.assertTrue(self.manager.read_only)
+        reloaded = MemoManager()
+        reloaded.load_from_file(copy_path)
+        self.assertEqual(reloaded.memos["1"].title, "変更")
+        self.assertEqual(reloaded.memos["1"].content, 'A & B <c> "引用"\n二行目')
+
+        db_path = os.path.join(self.temp_dir.name, "memos.db")
+        self.manager.save_to_database(db_path)
+        self.assertFalse(self.manager.read_only)
+        self.assertEqual(self.manager.memos["3"].content, "Budget review 予算")
+
+    def test_read_only_load_replays_journal(self):
+        manager = MemoManager()
+        manager.load_from_file(self.xml_path)
+        manager.memos["0"].content = "ジャーナルの本文"
+        manager.delete_memo("2")
+        manager.save_changes()
+
+        self.manager.load_from_file(self.xml_path, read_only=True)
+        self.assertEqual(list(self.manager.memos), ["0", "1", "3"])
+        self.assertEqual(self.manager.memos["0"].content, "ジャーナルの本文")
+        self.assertEqual(self.manager.memos["3"].content, "Budget review 予算")
+
+
+if __name__ == "__main__":
+    unittest.main()
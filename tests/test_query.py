@@ -0,0 +1,114 @@
+import unittest
+
+from logic import MemoManager
+from query import QuerySyntaxError, compile_query, make_resume_token
+
+
+class TestQueryLanguage(unittest.TestCase):
+    def setUp(self):
+        self.manager = MemoManager()
+        memos = [
+            ("定例会議", "2024/01/10", "来期の予算を確認した", {"仕事"}),
+            ("会議メモ", "2024/02/05", "Budget review", {"仕事", "done"}),
+            ("買い物", "2024/02/20", "会議室の予約とbudget", set()),
+            ("読書", "2023/12/31", "予算の本を読んだ", {"個人"}),
+        ]
+        for title, date, content, tags in memos:
+            memo_id = self.manager.add_memo()
+            memo = self.manager.memos[memo_id]
+            memo.title = title
+            memo.date = date
+            memo.content = content
+            memo.tags = tags
+
+    def ids(self, query, case_sensitive=False):
+        return compile_query(query, case_sensitive).matching_ids(self.manager)
+
+    def test_boolean_operators_and_field_scoping(self):
+        self.assertEqual(self.ids("title:会議 AND (予算 OR budget) NOT tag:done"), ["0"])
+        self.assertEqual(self.ids("会議"), ["0", "1", "2"])
+        self.assertEqual(self.ids("content:会議"), ["2"])
+        self.assertEqual(self.ids("予算 OR budget"), ["0", "1", "2", "3"])
+        # ANDはORより優先される
+        self.assertEqual(self.ids("読書 OR 会議 tag:done"), ["1", "3"])
+        self.assertEqual(self.ids("NOT (会議 OR 読書)"), [])
+        self.assertEqual(self.ids('"review" title:"会議メモ"'), ["1"])
+
+    def test_regex_tags_and_dates(self):
+        self.assertEqual(self.ids("/予.*確認/"), ["0"])
+        self.assertEqual(self.ids("title:/^会議/"), ["1"])
+        self.assertEqual(self.ids("tag:仕事"), ["0", "1"])
+        self.assertEqual(self.ids("date:2024/02"), ["1", "2"])
+        self.assertEqual(self.ids("date:2024/01/10..2024/02/05"), ["0", "1"])
+        self.assertEqual(self.ids("date:..2024/01"), ["0", "3"])
+        self.assertEqual(self.ids("date:2024/02/06.. budget"), ["2"])
+
+    def test_case_sensitivity(self):
+        self.assertEqual(self.ids("budget"), ["1", "2"])
+        self.assertEqual(self.ids("budget", case_sensitive=True), ["2"])
+        self.assertEqual(self.ids("/^b/", case_sensitive=True), [])
+
+    def test_query_memos_returns_highlight_spans(self):
+        results = self.manager.query_memos("会議 NOT 予約")
+        self.assertEqual(results, [("0", 2, 4, True), ("1", 0, 2, True)])
+        self.assertEqual(self.manager.query_memos("tag:個人"), [("3", 0, 0, True)])
+        self.assertEqual(self.manager.query_memos("  "), [])
+
+    def test_cheap_predicates_are_evaluated_first(self):
+        plan = compile_query("/予算/ budget tag:仕事")
+        self.assertEqual([type(child).__name__ for child in plan._root.children],
+                         ["_TagTerm", "_TextTerm", "_TextTerm"])
+        self.assertIsNone(plan._root.children[1].pattern)
+
+        scanned = []
+        original = self.manager._peek_contents
+        self.manager._peek_contents = lambda ids: scanned.extend(ids) or original(ids)
+        self.assertEqual(self.ids("tag:個人 AND content:/本/"), ["3"])
+        self.assertEqual(scanned, ["3"])
+
+        # 正規表現を含むグループは、語句の条件で絞り込んだ後に評価する
+        plan = compile_query("予算 (tag:仕事 OR /確認/) (tag:仕事 /確認/)")
+        self.assertEqual([type(child).__name__ for child in plan._root.children],
+                         ["_TextTerm", "_Or", "_And"])
+
+    def test_compiled_plans_are_cached(self):
+        compile_query.cache_clear()
+        first = compile_query("title:会議 OR tag:done")
+        self.assertIs(compile_query("title:会議 OR tag:done"), first)
+        self.assertIsNot(compile_query("title:会議 OR tag:done", True), first)
+        self.assertEqual(compile_query.cache_info().hits, 1)
+
+    def test_syntax_errors(self):
+        for query in ("(会議", "会議)", "AND", "会議 OR", "/[/", '""', '"unterminated'):
+            with self.subTest(query=query):
+                with self.assertRaises(QuerySyntaxError):
+                    compile_query(query)
+
+    def test_iter_query_memos_pages_with_resume_token(self):
+        expected = self.manager.query_memos("会議 OR /[a-z]+/")
+        pages = []
+        token = None
+        while True:
+            page = list(self.manager.iter_query_memos("会議 OR /[a-z]+/", limit=2, resume_token=token))
+            if not page:
+                break
+            pages.append(page)
+            token = make_resume_token(page[-1])
+        self.assertEqual([match for page in pages for match in page], expected)
+        self.assertTrue(all(len(page) == 2 for page in pages[:-1]))
+
+        with self.assertRaises(ValueError):
+            self.manager.iter_query_memos("会議", resume_token="broken")
+
+    def test_search_is_limited_to_given_memo_ids(self):
+        self.assertEqual(self.ids("予算 OR budget"), ["0", "1", "2", "3"])
+        self.assertEqual(compile_query("予算 OR budget").matching_ids(self.manager, ["3", "1", "9"]), ["1", "3"])
+        scoped = list(self.manager.iter_query_memos("会議 OR budget", memo_ids={"1", "2"}))
+        self.assertEqual(scoped, [match for match in self.manager.query_memos("会議 OR budget")
+                                  if match[0] in {"1", "2"}])
+        self.assertEqual(self.manager.filter_memos(["仕事"], query="会議"), ["0", "1"])
+        self.assertEqual(self.manager.filter_memos(["仕事"], query="予算 NOT tag:done"), ["0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from logic import MemoManager
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "memos.db")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _create_database(self):
+        manager = MemoManager()
+        id0 = manager.add_memo()
+        manager.memos[id0].title = "会議メモ"
+        manager.memos[id0].date = "2024/01/01"
+        manager.memos[id0].content = "来期の予算について議論した"
+        manager.memos[id0].tags = {"仕事"}
+        id1 = manager.add_memo()
+        manager.memos[id1].title = "買い物"
+        manager.memos[id1].date = "2024/02/01"
+        manager.memos[id1].content = "Milk and eggs"
+        manager.save_to_database(self.db_path)
+        manager.store.close()
+
+    def test_open_database_loads_content_lazily(self):
+        self._create_database()
+        manager = MemoManager()
+        manager.open_database(self.db_path)
+        try:
+            self.assertEqual(manager.current_file, self.db_path)
+            self.assertEqual(manager.memos["0"].title, "会議メモ")
+            self.assertEqual(manager.filter_by_tags(["仕事"]), {"0"})
+            self.assertEqual(manager.get_date_range(), ("2024/01/01", "2024/02/01"))
+            self.assertIsNone(manager.memos["0"]._content)
+
+            self.assertEqual(manager.memos["0"].content, "来期の予算について議論した")
+            self.assertIsNone(manager.memos["1"]._content)
+        finally:
+            manager.store.close()
+
+    def test_search_uses_store_for_unloaded_content(self):
+        self._create_database()
+        manager = MemoManager()
+        manager.open_database(self.db_path)
+        try:
+            self.assertEqual(manager.search_memos("予算について"), [("0", 3, 9, False)])
+            self.assertEqual(manager.search_memos("milk"), [("1", 0, 4, False)])
+            self.assertEqual(manager.search_memos("Milk", case_sensitive=True), [("1", 0, 4, False)])
+            self.assertEqual(manager.search_memos("会議"), [("0", 0, 2, True)])
+            # 検索だけでは本文をメモに保持しない
+            self.assertIsNone(manager.memos["0"]._content)
+
+            # 未保存の編集内容も検索対象になる
+            manager.memos["1"].content = "Bread"
+            self.assertEqual(manager.search_memos("milk"), [])
+        finally:
+            manager.store.close()
+
+    def test_case_sensitive_search_of_unloaded_final_sigma(self):
+        manager = MemoManager()
+        manager.memos[manager.add_memo()].content = "ΟΔΟΣ"
+        manager.save_to_database(self.db_path)
+        manager.store.close()
+
+        manager = MemoManager()
+        manager.open_database(self.db_path)
+        try:
+            # 短い検索語は本文をケースフォールドして絞り込むため、語末のΣも候補に残る
+            self.assertEqual(manager.search_memos("Σ", case_sensitive=True), [("0", 3, 4, False)])
+        finally:
+            manager.store.close()
+
+    def test_save_writes_only_changed_rows(self):
+        self._create_database()
+        manager = MemoManager()
+        manager.open_database(self.db_path)
+        try:
+            manager.memos["0"].title = "定例会議"
+            manager.delete_memo("1")
+            new_id = manager.add_memo()
+            manager.memos[new_id].content = "新しいメモ"
+
+            statements = []
+            manager.store.conn.set_trace_callback(statements.append)
+            manager.save_to_database()
+            manager.store.conn.set_trace_callback(None)
+
+            writes = [s for s in statements if s.startswith(("INSERT INTO memos ", "UPDATE memos", "DELETE"))]
+            self.assertEqual(len(set(writes)), 3)
+        finally:
+            manager.store.close()
+
+        reopened = MemoManager()
+        reopened.open_database(self.db_path)
+        try:
+            self.assertEqual(list(reopened.memos.keys()), ["0", "2"])
+            self.assertEqual(reopened.memos["0"].title, "定例会議")
+            # 本文を読み込まずにタイトルだけ更新しても本文は失われない
+            self.assertEqual(reopened.memos["0"].content, "来期の予算について議論した")
+            self.assertEqual(reopened.memos["2"].content, "新しいメモ")
+            self.assertEqual(reopened.add_memo(), "3")
+        finally:
+            reopened.store.close()
+
+    def test_xml_import_and_export_with_database(self):
+        self._create_database()
+        xml_path = os.path.join(self.temp_dir.name, "memos.xml")
+
+        manager = MemoManager()
+        manager.open_database(self.db_path)
+        new_ids = manager.merge_from_file(self._write_xml())
+        manager.save_to_database()
+        self.assertEqual(new_ids, ["2"])
+
+        manager.save_to_file(xml_path)
+        self.assertIsNone(manager.store)
+        self.assertEqual(manager.current_file, xml_path)
+
+        loaded = MemoManager()
+        loaded.load_from_file(xml_path)
+        self.assertEqual([memo.content for memo in loaded.memos.values()],
+                         ["来期の予算について議論した", "Milk and eggs", "XMLから"])
+
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM memos").fetchone()[0], 3)
+
+    def test_database_opened_on_worker_thread_is_usable(self):
+        self._create_database()
+        manager = MemoManager()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(manager.open_database, self.db_path).result()
+        try:
+            # 本文の遅延読み込みと保存はメインスレッドから行われる
+            self.assertEqual(manager.memos["1"].content, "Milk and eggs")
+            manager.memos["1"].title = "買い物リスト"
+            manager.save_changes()
+        finally:
+            manager.store.close()
+
+    def _write_xml(self):
+        source = MemoManager()
+        memo_id = source.add_memo()
+        source.memos[memo_id].content = "XMLから"
+        path = os.path.join(self.temp_dir.name, "import.xml")
+        source.save_to_file(path)
+        return path
+
+
+if __name__ == "__main__":
+    unittest.main()
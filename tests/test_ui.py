@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+class TestStartupImports(unittest.TestCase):
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = ("import sys, ui; print(' '.join(m for m in ('tkcalendar', 'dialogs', 'exporters', "
+                "'concurrent.futures', 'locale') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        if result.returncode != 0 and "tkinter" in result.stderr:
+            self.skipTest("tkinter is not available")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,49 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from tkcalendar import DateEntry
 from datetime import datetime
-import locale
-from logic import MemoManager, Memo
+import os
+import threading
+from instrumentation import instrumentation, startup_profile, timed
+from logic import MemoManager, Memo, OperationCancelled
+
+# 大量のメモをTreeviewに追加する際の1回あたりの行数
+_POPULATE_CHUNK_SIZE = 500
+# この件数を超える行を再表示する場合は並びを一括で設定する
+_REATTACH_BATCH_THRESHOLD = 200
+# 本文の編集が止まってからメモに反映するまでの時間（ミリ秒）
+_CONTENT_SYNC_DELAY = 400
+# バックグラウンドのファイル処理の完了と進捗を確認する間隔（ミリ秒）
+_OPERATION_POLL_INTERVAL = 50
+
+class _BackgroundOperation:
+    """
+    ワーカースレッドで実行中のファイル処理（内部クラス）
+
+    ワーカースレッドは進捗を属性に書き込むだけで、Tkのウィジェットには触れない。
+    メインスレッドがafter()で定期的に進捗と完了を確認する。
+
+    Attributes:
+        future (Future): 処理の結果
+        progress (tuple[int, int]): (処理済みの量, 全体の量)。全体の量が不明な場合は0
+        on_success (Callable): 処理の成功後にメインスレッドで呼ばれるコールバック
+        error_message (str): 失敗時に表示するメッセージ
+    """
+    def __init__(self, on_success, error_message):
+        self.future = None
+        self.progress = (0, 0)
+        self.on_success = on_success
+        self.error_message = error_message
+        self._cancel_event = threading.Event()
+
+    def report(self, done, total):
+        """進捗を記録する（ワーカースレッドから呼ばれ、中止要求があればOperationCancelledを送出する）"""
+        if self._cancel_event.is_set():
+            raise OperationCancelled()
+        self.progress = (done, total)
+
+    def cancel(self):
+        """処理の中止を要求する"""
+        self._cancel_event.set()
 
 class MemoApp:
     def __init__(self, root):
@@ -12,23 +52,72 @@ class MemoApp:
         self.current_memo_id = None
         self.is_tag_filtered = False
         self.is_date_filtered = False
+
+        # Treeviewの行の状態（detachした行も含む表示順と、表示中の行）
+        self._row_order = []
+        self._visible_ids = set()
+        self._pending_rows = []
+        self._populate_job = None
+        # 選択中の並び順（('title'または'date', 降順かどうか)。未選択の場合はNone）
+        self._sort_order = None
+        self._collation_ready = False
+
+        # メモに未反映の本文の編集（編集中のメモIDと反映の予約）
+        self._content_dirty_id = None
+        self._content_sync_job = None
+
+        # ファイル処理を実行するワーカースレッド（最初の処理で作成）と、実行中の処理
+        self._executor = None
+        self._operation = None
+        # これまでに開始したファイル処理の数（検索ダイアログが結果の有効性の確認に使う）
+        self.operation_count = 0
         
         self._setup_window()
         self._create_menu()
+        startup_profile.mark("menu")
         self._create_main_frame()
+        self._create_status_bar()
         self._setup_shortcuts()
+        startup_profile.mark("main_frame")
         
         # 初期メモの追加
         self.add_memo()
+        startup_profile.mark("initial_memo")
+
+        # 日付選択（tkcalendar）はウィンドウが描画されてから作成する
+        self._first_paint_binding = self.root.bind('<Expose>', self._on_first_expose, '+')
 
     def _setup_window(self):
         self.root.geometry("1000x600")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.update_title()
 
+    def on_close(self):
+        """実行中のファイル処理を中止してウィンドウを閉じる"""
+        if self._operation is not None:
+            self._operation.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def _on_first_expose(self, event):
+        """最初の描画の要求を受けて、描画後に残りの初期化を予約する"""
+        self.root.unbind('<Expose>', self._first_paint_binding)
+        # 描画はアイドル時に行われるため、その後に実行されるよう予約する
+        self.root.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
+        """ウィンドウの描画後に日付選択を作成し、起動時間の内訳を出力する"""
+        startup_profile.mark("first_paint")
+        self._create_date_entry()
+        startup_profile.mark("date_entry")
+        startup_profile.report()
+
     def update_title(self):
         base_title = "メモ帳"
         if self.memo_manager.current_file:
-            self.root.title(f"{base_title} - {self.memo_manager.current_file}")
+            suffix = " [読み取り専用]" if self.memo_manager.read_only else ""
+            self.root.title(f"{base_title} - {self.memo_manager.current_file}{suffix}")
         else:
             self.root.title(base_title)
 
@@ -40,13 +129,18 @@ class MemoApp:
         self.file_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="ファイル", menu=self.file_menu)
         self.file_menu.add_command(label="開く (Ctrl+O)", command=self.open_file, accelerator="Control-O")
+        self.file_menu.add_command(label="読み取り専用で開く", command=lambda: self.open_file(read_only=True))
+        self.file_menu.add_command(label="データベースを開く", command=self.open_database)
         self.file_menu.add_command(label="インポート", command=self.import_file)
+        self.file_menu.add_command(label="複数のファイルをインポート", command=self.import_files)
         self.file_menu.add_separator()
         self.file_menu.add_command(label="上書き保存 (Ctrl+S)", command=self.save_file, accelerator="Control-S")
         self.file_menu.add_command(label="名前をつけて保存", command=self.save_file_as)
+        self.file_menu.add_command(label="変更履歴をファイルに統合", command=self.compact_file)
+        self.file_menu.add_command(label="データベースとして保存", command=self.save_database_as)
         self.file_menu.add_command(label="エクスポート", command=self.show_export_dialog)
         self.file_menu.add_separator()
-        self.file_menu.add_command(label="終了", command=self.root.quit)
+        self.file_menu.add_command(label="終了", command=self.on_close)
 
         # フィルターメニュー
         self.filter_menu = tk.Menu(self.menu_bar, tearoff=0)
@@ -61,6 +155,22 @@ class MemoApp:
         self.menu_bar.add_cascade(label="検索", menu=self.search_menu)
         self.search_menu.add_command(label="メモを検索", command=self.show_search_dialog)
 
+        # 表示メニュー（処理時間の計測）
+        self.view_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="表示", menu=self.view_menu)
+        self.instrumentation_var = tk.BooleanVar(value=instrumentation.enabled)
+        self.view_menu.add_checkbutton(label="処理時間を記録する", variable=self.instrumentation_var,
+                                       command=self.toggle_instrumentation)
+        self.view_menu.add_command(label="処理時間の統計", command=self.show_stats_dialog)
+
+    def toggle_instrumentation(self):
+        """処理時間の計測の有効・無効を切り替える"""
+        instrumentation.enabled = self.instrumentation_var.get()
+
+    def show_stats_dialog(self):
+        from dialogs import StatsDialog
+        StatsDialog(self.root)
+
     def update_filter_menu(self):
         """フィルターメニューの表示を更新"""
         tag_label = "タグでフィルター（実行中）" if self.is_tag_filtered else "タグでフィルター"
@@ -77,40 +187,68 @@ class MemoApp:
             self.update_filter_menu()
             self.update_buttons_state()
 
-    def refresh_memo_list(self):
-        """メモリストを更新"""
-        # 現在の表示をクリア
-        self.tree.delete(*self.tree.get_children())
-
-        # メモをフィルタリング
-        filtered_ids = set(self.memo_manager.memos.keys())
+    def filter_memo_ids(self):
+        """
+        現在のフィルター条件に一致するメモIDの集合を返す
 
+        Returns:
+            Optional[set]: 一致するメモIDの集合。フィルターが無効な場合はNone
+        """
+        tags = getattr(self, 'current_tag_filter', None) if self.is_tag_filtered else None
+        date_range = getattr(self, 'current_date_range', None) if self.is_date_filtered else None
+        if not tags and date_range is None:
+            return None
+        start_date, end_date = date_range or (None, None)
+        # タグ・日付の条件はMemoManagerのビット集合で組み合わせる
+        return set(self.memo_manager.filter_memos(tags, start_date=start_date, end_date=end_date))
+
+    def _matches_filter(self, memo):
+        """メモが現在のフィルター条件に一致するかを判定"""
         if self.is_tag_filtered and hasattr(self, 'current_tag_filter'):
-            filtered_ids &= {memo_id for memo_id, memo in self.memo_manager.memos.items()
-                           if any(tag in memo.tags for tag in self.current_tag_filter)}
-
+            if not any(tag in memo.tags for tag in self.current_tag_filter):
+                return False
         if self.is_date_filtered and hasattr(self, 'current_date_range'):
             start_date, end_date = self.current_date_range
-            date_filtered_ids = self.memo_manager.filter_by_date(start_date, end_date)
-            filtered_ids &= set(date_filtered_ids)
+            if not start_date <= memo.date <= end_date:
+                return False
+        return True
 
-        # フィルター結果を表示
-        first_filtered_id = None
-        current_memo_filtered = False
+    @timed("refresh_memo_list")
+    def refresh_memo_list(self):
+        """
+        メモリストを更新
 
-        for memo_id in filtered_ids:
-            memo = self.memo_manager.memos[memo_id]
-            self.tree.insert('', 'end', memo_id, 
-                           values=(memo.title, memo.date, ', '.join(sorted(memo.tags))))
-            
-            if first_filtered_id is None:
-                first_filtered_id = memo_id
-            if memo_id == self.current_memo_id:
-                current_memo_filtered = True
+        すべての行を削除・再挿入せず、フィルター結果から外れた行をdetachし、
+        新たに一致した行だけを現在の並び順の位置に戻す。
+        """
+        filtered_ids = self.filter_memo_ids()
+        if filtered_ids is None:
+            new_visible_ids = set(self._row_order)
+        else:
+            new_visible_ids = filtered_ids.intersection(self._row_order)
+
+        leaving_ids = self._visible_ids - new_visible_ids
+        entering_ids = new_visible_ids - self._visible_ids
+
+        if leaving_ids:
+            self.tree.detach(*leaving_ids)
+
+        # 列の並べ替えを選択している場合は、追加・編集されたメモもその順に並べ直す
+        reordered = self._sort_order is not None and self._update_row_order()
+        visible_order = [memo_id for memo_id in self._row_order if memo_id in new_visible_ids]
+        if reordered or len(entering_ids) > _REATTACH_BATCH_THRESHOLD:
+            # 並び順が変わった場合や戻す行が多い場合は子要素の並びを一括で設定する
+            self.tree.set_children('', *visible_order)
+        elif entering_ids:
+            for index, memo_id in enumerate(visible_order):
+                if memo_id in entering_ids:
+                    self.tree.move(memo_id, '', index)
+        self._visible_ids = new_visible_ids
 
         # 選択状態の更新
-        if first_filtered_id:
-            if not current_memo_filtered:
+        if visible_order:
+            if self.current_memo_id not in new_visible_ids:
+                first_filtered_id = visible_order[0]
                 self.tree.selection_set(first_filtered_id)
                 self.tree.see(first_filtered_id)
                 self.on_tree_select(None)
@@ -122,11 +260,90 @@ class MemoApp:
         style = 'Filtered.Treeview' if self.is_tag_filtered or self.is_date_filtered else ''
         self.tree.configure(style=style)
 
+    def _insert_row(self, memo_id):
+        """メモの行をリストの末尾に追加し、フィルター条件に一致しなければdetachする"""
+        memo = self.memo_manager.memos[memo_id]
+        self.tree.insert('', 'end', memo_id,
+                         values=(memo.title, memo.date, ', '.join(sorted(memo.tags))))
+        self._row_order.append(memo_id)
+        if self._matches_filter(memo):
+            self._visible_ids.add(memo_id)
+        else:
+            self.tree.detach(memo_id)
+
+    def _remove_row(self, memo_id):
+        """メモの行をリストから削除する"""
+        self.tree.delete(memo_id)
+        self._row_order.remove(memo_id)
+        self._visible_ids.discard(memo_id)
+
+    def _clear_rows(self):
+        """リストのすべての行と未挿入の行を破棄する"""
+        self._cancel_populate()
+        if self._row_order:
+            self.tree.delete(*self._row_order)
+        self._row_order = []
+        self._visible_ids = set()
+
+    def _populate_rows(self, memo_ids, on_first_chunk=None):
+        """
+        メモの行を分割してリストに追加する
+
+        最初のチャンクは即座に挿入し、残りはafter()で順次挿入するため、
+        大量のメモでもウィンドウが応答しなくならない。
+
+        Args:
+            memo_ids (list): 追加するメモIDのリスト
+            on_first_chunk (Optional[Callable]): 最初のチャンクの挿入後に呼ばれるコールバック
+        """
+        self._pending_rows.extend(memo_ids)
+        if self._populate_job is None:
+            self._populate_next_chunk()
+        if on_first_chunk:
+            on_first_chunk()
+
+    @timed("_populate_next_chunk")
+    def _populate_next_chunk(self):
+        """未挿入の行を1チャンク分挿入し、残りがあれば次のチャンクを予約する"""
+        if self._operation is not None:
+            # ファイル処理中はメモが変更されるため、挿入を待機する
+            self._populate_job = self.root.after(_OPERATION_POLL_INTERVAL, self._populate_next_chunk)
+            return
+        self._populate_job = None
+        chunk = self._pending_rows[:_POPULATE_CHUNK_SIZE]
+        del self._pending_rows[:_POPULATE_CHUNK_SIZE]
+        for memo_id in chunk:
+            if memo_id in self.memo_manager.memos:
+                self._insert_row(memo_id)
+        if self._pending_rows:
+            self._populate_job = self.root.after(1, self._populate_next_chunk)
+
+    def _cancel_populate(self):
+        """予約済みの行の挿入を取り消す"""
+        if self._populate_job is not None:
+            self.root.after_cancel(self._populate_job)
+            self._populate_job = None
+        self._pending_rows = []
+
     def _setup_shortcuts(self):
-        self.root.bind("<Control-o>", lambda e: self.open_file())
-        self.root.bind("<Control-O>", lambda e: self.open_file())
-        self.root.bind("<Control-s>", lambda e: self.save_file())
-        self.root.bind("<Control-S>", lambda e: self.save_file())
+        # ファイル処理中はメニューと同様にショートカットも無効にする
+        def unless_busy(command):
+            return lambda e: None if self._operation is not None else command()
+
+        self.root.bind("<Control-o>", unless_busy(self.open_file))
+        self.root.bind("<Control-O>", unless_busy(self.open_file))
+        self.root.bind("<Control-s>", unless_busy(self.save_file))
+        self.root.bind("<Control-S>", unless_busy(self.save_file))
+
+    def _create_status_bar(self):
+        """ファイル処理の進捗バーと中止ボタンを作成する（処理中のみ表示）"""
+        self.status_frame = ttk.Frame(self.root, padding=(5, 0, 5, 5))
+        self.status_label = ttk.Label(self.status_frame, text="")
+        self.status_label.pack(side='left')
+        self.cancel_button = ttk.Button(self.status_frame, text="中止", command=self.cancel_operation)
+        self.cancel_button.pack(side='right')
+        self.progress_bar = ttk.Progressbar(self.status_frame, length=300)
+        self.progress_bar.pack(side='right', padx=5)
 
     def _create_main_frame(self):
         # メインフレーム
@@ -202,17 +419,30 @@ class MemoApp:
         self.title_entry.pack(side='left', fill='x', expand=True)
         self.title_var.trace_add('write', self.on_title_change)
 
-        # 日付選択
-        self.date_entry = DateEntry(self.edit_top_frame, width=12, background='darkblue',
-                                  foreground='white', borderwidth=2, locale='ja_JP',
-                                  date_pattern='yyyy/mm/dd')
-        self.date_entry.pack(side='left', padx=5)
-        self.date_entry.bind('<<DateEntrySelected>>', self.on_date_change)
+        # 日付選択（ウィンドウの描画後に_create_date_entryで作成する）
+        self.date_frame = ttk.Frame(self.edit_top_frame)
+        self.date_frame.pack(side='left', padx=5)
+        self.date_entry = None
 
         # 削除ボタン
         self.delete_button = ttk.Button(self.edit_top_frame, text="削除", command=self.delete_current_memo)
         self.delete_button.pack(side='right', padx=5)
 
+    def _create_date_entry(self):
+        """日付選択を作成し、選択中のメモの日付を表示する"""
+        if self.date_entry is not None:
+            return
+        from dialogs import create_date_entry
+
+        self.date_entry = create_date_entry(self.date_frame)
+        self.date_entry.pack()
+        self.date_entry.bind('<<DateEntrySelected>>', self.on_date_change)
+        if self.current_memo_id in self.memo_manager.memos:
+            memo = self.memo_manager.memos[self.current_memo_id]
+            self.date_entry.set_date(datetime.strptime(memo.date, '%Y/%m/%d').date())
+        if self._operation is not None or self.memo_manager.read_only:
+            self.date_entry.configure(state='disabled')
+
     def _create_tags_frame(self):
         self.tags_frame = ttk.LabelFrame(self.right_frame, text="タグ", padding=5)
         self.tags_frame.pack(fill='x', pady=5)
@@ -236,59 +466,215 @@ class MemoApp:
         self.remove_tag_button = ttk.Button(self.tag_edit_frame, text="削除", command=self.remove_tag)
         self.remove_tag_button.pack(side='left', padx=2)
 
+    # バックグラウンド処理
+    def _run_in_background(self, message, work, on_success, error_message):
+        """
+        ファイル処理をワーカースレッドで実行する
+
+        処理中は進捗バーと中止ボタンを表示し、メモを変更する操作を無効にする。
+        結果はafter()による確認でメインスレッドに受け渡される。
+
+        Args:
+            message (str): 進捗バーの横に表示するメッセージ
+            work (Callable): ワーカースレッドで実行する処理。進捗通知用のコールバック
+                （引数は(処理済みの量, 全体の量)）を引数に取り、結果を返す
+            on_success (Callable): 処理の成功後にメインスレッドで呼ばれるコールバック。処理の結果を引数に取る
+            error_message (str): 失敗時に表示するメッセージ
+        """
+        if self._operation is not None:
+            return
+        # ワーカースレッドが参照する前に編集中の本文を反映する
+        self.flush_content()
+        operation = _BackgroundOperation(on_success, error_message)
+        self._operation = operation
+        self.operation_count += 1
+        self._set_busy(True, message)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memo-file")
+        operation.future = self._executor.submit(work, operation.report)
+        self.root.after(_OPERATION_POLL_INTERVAL, self._poll_operation)
+
+    def _poll_operation(self):
+        """実行中の処理の進捗を表示し、完了していれば結果を処理する"""
+        operation = self._operation
+        if not operation.future.done():
+            done, total = operation.progress
+            if total:
+                if str(self.progress_bar.cget('mode')) != 'determinate':
+                    self.progress_bar.stop()
+                    self.progress_bar.configure(mode='determinate')
+                self.progress_bar.configure(maximum=total, value=done)
+            self.root.after(_OPERATION_POLL_INTERVAL, self._poll_operation)
+            return
+
+        self._operation = None
+        self._set_busy(False)
+        try:
+            result = operation.future.result()
+        except OperationCancelled:
+            messagebox.showinfo("中止", "処理を中止しました。")
+            return
+        except Exception as e:
+            messagebox.showerror("エラー", f"{operation.error_message}：{str(e)}")
+            return
+        operation.on_success(result)
+
+    def is_busy(self):
+        """ファイル処理を実行中かどうかを返す"""
+        return self._operation is not None
+
+    def cancel_operation(self):
+        """実行中のファイル処理の中止を要求する"""
+        if self._operation is not None:
+            self._operation.cancel()
+            self.cancel_button.configure(state='disabled')
+            self.status_label.configure(text="中止しています...")
+
+    def _set_busy(self, busy, message=""):
+        """
+        ファイル処理中の表示に切り替え、メモを変更する操作を無効にする（または元に戻す）
+
+        Args:
+            busy (bool): 処理中かどうか
+            message (str): 進捗バーの横に表示するメッセージ
+        """
+        state = 'disabled' if busy else 'normal'
+        for index in range(self.menu_bar.index(tk.END) + 1):
+            self.menu_bar.entryconfig(index, state=state)
+
+        if busy:
+            for widget in (self.delete_button, self.title_entry, self.date_entry, self.text_area):
+                if widget is not None:
+                    widget.configure(state='disabled')
+            self.add_button.configure(state='disabled')
+            self.add_tag_button.configure(state='disabled')
+            self.remove_tag_button.configure(state='disabled')
+            self.tag_entry.configure(state='disabled')
+            self.status_label.configure(text=message)
+            self.cancel_button.configure(state='normal')
+            self.progress_bar.configure(mode='indeterminate', value=0)
+            self.progress_bar.start()
+            self.status_frame.pack(side='bottom', fill='x')
+        else:
+            self.update_buttons_state()
+            self.progress_bar.stop()
+            self.status_frame.pack_forget()
+
+    @staticmethod
+    def _file_progress(file_path, report):
+        """
+        読み込み処理の進捗(メモ数, 読み込んだバイト数)を、ファイルサイズに対する進捗に変換する
+
+        Args:
+            file_path (str): 読み込むファイルのパス
+            report (Callable): 進捗通知用のコールバック
+
+        Returns:
+            Callable: load_from_fileなどに渡す進捗通知用のコールバック
+        """
+        total = os.path.getsize(file_path)
+        return lambda count, position: report(position, total)
+
     # イベントハンドラー
+    @timed("on_tree_select")
     def on_tree_select(self, event):
         selection = self.tree.selection()
         if not selection:
             return
+        if self._operation is not None:
+            # ファイル処理中は編集中のメモを切り替えない
+            if self.current_memo_id in self._visible_ids and selection != (self.current_memo_id,):
+                self.tree.selection_set(self.current_memo_id)
+            return
+
+        # 切り替える前に、前のメモの編集中の本文を反映する
+        self.flush_content()
         
         self.current_memo_id = selection[0]
         memo = self.memo_manager.memos[self.current_memo_id]
         
+        # 読み取り専用で無効にした入力欄も、表示の間だけ有効にして内容を入れ替える
+        read_only = self.memo_manager.read_only
+        if read_only:
+            self._set_edit_state('normal')
+
         self.title_var.set(memo.title)
-        self.date_entry.set_date(datetime.strptime(memo.date, '%Y/%m/%d').date())
+        if self.date_entry is not None:
+            self.date_entry.set_date(datetime.strptime(memo.date, '%Y/%m/%d').date())
         
+        # データベースから開いた場合、本文はここで初めて読み込まれる
         self.text_area.delete(1.0, tk.END)
         self.text_area.insert(1.0, memo.content)
         self.text_area.edit_modified(False)
+
+        if read_only:
+            self._set_edit_state('disabled')
         
         self.update_tags_display()
 
     def on_title_change(self, *args):
-        if self.current_memo_id:
+        if self.current_memo_id and not self.memo_manager.read_only:
             title = self.title_var.get()
             self.memo_manager.memos[self.current_memo_id].title = title
             self.tree.set(self.current_memo_id, 'title', title)
 
     def on_date_change(self, event):
-        if self.current_memo_id:
+        if self.current_memo_id and not self.memo_manager.read_only:
             date = self.date_entry.get_date().strftime('%Y/%m/%d')
             self.memo_manager.memos[self.current_memo_id].date = date
             self.tree.set(self.current_memo_id, 'date', date)
 
     def on_text_modified(self, event=None):
+        """
+        本文の編集を記録し、入力が止まった時点でメモに反映するよう予約する
+
+        キー入力ごとにテキスト全体をコピーしないよう、連続した編集はまとめて
+        flush_contentで反映する。
+        """
         if self.text_area.edit_modified() and self.current_memo_id:
-            self.memo_manager.memos[self.current_memo_id].content = self.text_area.get(1.0, tk.END)
             self.text_area.edit_modified(False)
+            if self.memo_manager.read_only:
+                return
+            self._content_dirty_id = self.current_memo_id
+            if self._content_sync_job is not None:
+                self.root.after_cancel(self._content_sync_job)
+            self._content_sync_job = self.root.after(_CONTENT_SYNC_DELAY, self.flush_content)
+
+    def flush_content(self):
+        """未反映の本文の編集をメモに反映する（編集がなければ何もしない）"""
+        if self._content_sync_job is not None:
+            self.root.after_cancel(self._content_sync_job)
+            self._content_sync_job = None
+        memo_id = self._content_dirty_id
+        self._content_dirty_id = None
+        if memo_id is not None and memo_id in self.memo_manager.memos:
+            self.memo_manager.update_content(memo_id, self.text_area.get(1.0, tk.END))
 
     # メモ操作
     def add_memo(self):
+        # 読み取り専用では追加しない（空のファイルを開いた場合に表示するメモを除く）
+        if self.memo_manager.read_only and self.memo_manager.memos:
+            return
         memo_id = self.memo_manager.add_memo()
-        memo = self.memo_manager.memos[memo_id]
         
-        self.tree.insert('', 'end', memo_id, values=(memo.title, memo.date, ""))
+        self._insert_row(memo_id)
+        if self._sort_order is not None and self._update_row_order():
+            self._apply_row_order()
         self.tree.selection_set(memo_id)
         self.tree.see(memo_id)
         self.on_tree_select(None)
 
     def delete_current_memo(self):
+        if self.memo_manager.read_only:
+            return
         if len(self.memo_manager.memos) <= 1:
             messagebox.showwarning("警告", "最後のメモは削除できません。")
             return
 
         if self.current_memo_id:
             self.memo_manager.delete_memo(self.current_memo_id)
-            self.tree.delete(self.current_memo_id)
+            self._remove_row(self.current_memo_id)
             
             remaining = self.tree.get_children()
             if remaining:
@@ -300,46 +686,45 @@ class MemoApp:
 
     # タグ操作
     def add_tag(self):
-        if not self.current_memo_id:
+        if not self.current_memo_id or self.memo_manager.read_only:
             return
 
         tag = self.tag_var.get().strip()
         if tag:
-            memo = self.memo_manager.memos[self.current_memo_id]
-            memo.tags.add(tag)
+            self.memo_manager.add_tags(self.current_memo_id, [tag])
             self.update_tags_display()
             self.tag_var.set("")
         else:
+            from dialogs import TagSelectionDialog
             TagSelectionDialog(self.root, self, "追加するタグを選択", self.add_selected_tags)
 
     def add_selected_tags(self, selected_tags):
-        if not selected_tags or not self.current_memo_id:
+        if not selected_tags or not self.current_memo_id or self.memo_manager.read_only:
             return
         
-        memo = self.memo_manager.memos[self.current_memo_id]
-        memo.tags.update(selected_tags)
+        self.memo_manager.add_tags(self.current_memo_id, selected_tags)
         self.update_tags_display()
 
     def remove_tag(self):
-        if not self.current_memo_id:
+        if not self.current_memo_id or self.memo_manager.read_only:
             return
 
         tag = self.tag_var.get().strip()
         if tag:
             memo = self.memo_manager.memos[self.current_memo_id]
             if tag in memo.tags:
-                memo.tags.remove(tag)
+                self.memo_manager.remove_tags(self.current_memo_id, [tag])
                 self.update_tags_display()
             self.tag_var.set("")
         else:
+            from dialogs import TagSelectionDialog
             TagSelectionDialog(self.root, self, "削除するタグを選択", self.remove_selected_tags)
 
     def remove_selected_tags(self, selected_tags):
         if not selected_tags or not self.current_memo_id:
             return
         
-        memo = self.memo_manager.memos[self.current_memo_id]
-        memo.tags -= set(selected_tags)
+        self.memo_manager.remove_tags(self.current_memo_id, selected_tags)
         self.update_tags_display()
 
     def update_tags_display(self):
@@ -354,82 +739,190 @@ class MemoApp:
 
     # ファイル操作
     def save_file(self):
-        if self.memo_manager.current_file:
-            try:
-                self.memo_manager.save_to_file(self.memo_manager.current_file)
-                messagebox.showinfo("保存完了", "ファイルを保存しました。")
-            except Exception as e:
-                messagebox.showerror("エラー", f"保存中にエラーが発生しました：{str(e)}")
+        if self.memo_manager.read_only:
+            messagebox.showinfo("情報", "読み取り専用で開いています。「名前をつけて保存」で別のファイルに保存してください。")
+        elif self.memo_manager.current_file:
+            # 変更のあったメモのみをジャーナル（データベースの場合は行）に書き込む
+            self._run_in_background(
+                "保存しています...",
+                lambda report: self.memo_manager.save_changes(progress=report),
+                lambda _: messagebox.showinfo("保存完了", "ファイルを保存しました。"),
+                "保存中にエラーが発生しました")
         else:
             self.save_file_as()
 
+    def compact_file(self):
+        """未統合の変更履歴（ジャーナル）をXMLファイルに書き戻す"""
+        if self.memo_manager.read_only:
+            messagebox.showinfo("情報", "読み取り専用で開いています。")
+            return
+        if not self.memo_manager.current_file or self.memo_manager.store is not None:
+            messagebox.showinfo("情報", "XMLファイルが開かれていません。")
+            return
+        self._run_in_background(
+            "変更履歴を統合しています...",
+            lambda report: self.memo_manager.compact_journal(progress=report),
+            lambda _: messagebox.showinfo("保存完了", "変更履歴をファイルに統合しました。"),
+            "保存中にエラーが発生しました")
+
     def save_file_as(self):
-        try:
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".xml",
-                filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
-            )
-            if file_path:
-                self.memo_manager.save_to_file(file_path)
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".xml",
+            filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            def on_saved(_):
                 self.update_title()
                 messagebox.showinfo("保存完了", "ファイルを保存しました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"保存中にエラーが発生しました：{str(e)}")
 
-    def open_file(self):
-        try:
-            file_path = filedialog.askopenfilename(
-                filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
-            )
-            if file_path:
-                self.memo_manager.load_from_file(file_path)
+            self._run_in_background(
+                "保存しています...",
+                lambda report: self.memo_manager.save_to_file(file_path, progress=report),
+                on_saved,
+                "保存中にエラーが発生しました")
+
+    def save_database_as(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".db",
+            filetypes=[("データベースファイル", "*.db"), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            def on_saved(_):
                 self.update_title()
-                
-                # Treeviewの更新
-                for item_id in self.tree.get_children():
-                    self.tree.delete(item_id)
-                
-                for memo_id, memo in self.memo_manager.memos.items():
-                    self.tree.insert('', 'end', memo_id, 
-                                   values=(memo.title, memo.date, ', '.join(sorted(memo.tags))))
-                
-                if not self.memo_manager.memos:
-                    self.add_memo()
-                else:
-                    first_id = self.tree.get_children()[0]
-                    self.tree.selection_set(first_id)
-                    self.tree.see(first_id)
-                    self.on_tree_select(None)
-                
+                messagebox.showinfo("保存完了", "データベースに保存しました。")
+
+            self._run_in_background(
+                "データベースに保存しています...",
+                lambda report: self.memo_manager.save_to_database(file_path),
+                on_saved,
+                "保存中にエラーが発生しました")
+
+    def open_file(self, read_only=False):
+        """
+        XMLファイルを開く
+
+        Args:
+            read_only (bool): 読み取り専用で開く場合True（本文は選択時にファイルから読み込まれる）
+        """
+        file_path = filedialog.askopenfilename(
+            filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            def on_loaded(_):
+                self._show_loaded_memos()
                 messagebox.showinfo("読み込み完了", "ファイルを読み込みました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"ファイルを開く際にエラーが発生しました：{str(e)}")
+
+            # 読み込みに失敗した場合や中止した場合、現在のメモはそのまま残る
+            self._run_in_background(
+                "ファイルを読み込んでいます...",
+                lambda report: self.memo_manager.load_from_file(
+                    file_path, self._file_progress(file_path, report), read_only=read_only),
+                on_loaded,
+                "ファイルを開く際にエラーが発生しました")
+
+    def open_database(self):
+        """SQLiteデータベースを開く（本文は選択時に読み込まれる）"""
+        file_path = filedialog.askopenfilename(
+            filetypes=[("データベースファイル", "*.db"), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            def on_loaded(_):
+                self._show_loaded_memos()
+                messagebox.showinfo("読み込み完了", "データベースを読み込みました。")
+
+            self._run_in_background(
+                "データベースを読み込んでいます...",
+                lambda report: self.memo_manager.open_database(file_path),
+                on_loaded,
+                "データベースを開く際にエラーが発生しました")
+
+    @timed("_show_loaded_memos")
+    def _show_loaded_memos(self):
+        """読み込んだメモでタイトルとメモリストを更新する"""
+        self.update_title()
+        
+        # Treeviewの更新（行は分割して追加する）
+        self._clear_rows()
+        self.current_memo_id = None
+        
+        if not self.memo_manager.memos:
+            self.add_memo()
+        else:
+            if self._sort_order is None:
+                memo_ids = list(self.memo_manager.memos)
+            else:
+                memo_ids = self.memo_manager.sorted_memo_ids(*self._sort_order)
+            self._populate_rows(memo_ids, self._select_first_row)
+
+    def _select_first_row(self):
+        """表示中の先頭の行を選択する"""
+        children = self.tree.get_children()
+        if children:
+            self.tree.selection_set(children[0])
+            self.tree.see(children[0])
+            self.on_tree_select(None)
 
     # ソート機能
+    @timed("sort_by_title")
     def sort_by_title(self):
-        items = [(self.tree.set(item, 'title'), item) for item in self.tree.get_children('')]
-        locale.setlocale(locale.LC_ALL, '')
-        items.sort(key=lambda x: locale.strxfrm(x[0]), reverse=self.sort_reverse_title)
+        if self._operation is not None:
+            return
+        if not self._collation_ready:
+            # ロケールの設定と照合関数の登録は最初の並べ替えで1回だけ行う
+            import locale
+            locale.setlocale(locale.LC_ALL, '')
+            self.memo_manager.set_title_collation(locale.strxfrm)
+            self._collation_ready = True
+        self._sort_order = ('title', self.sort_reverse_title)
         self.sort_reverse_title = not self.sort_reverse_title
-        for index, (title, item) in enumerate(items):
-            self.tree.move(item, '', index)
+        self._update_row_order()
+        self._apply_row_order()
 
+    @timed("sort_by_date")
     def sort_by_date(self):
-        items = [(self.tree.set(item, 'date'), item) for item in self.tree.get_children('')]
-        items.sort(reverse=self.sort_reverse_date)
+        if self._operation is not None:
+            return
+        self._sort_order = ('date', self.sort_reverse_date)
         self.sort_reverse_date = not self.sort_reverse_date
-        for index, (date, item) in enumerate(items):
-            self.tree.move(item, '', index)
+        self._update_row_order()
+        self._apply_row_order()
+
+    def _update_row_order(self):
+        """
+        行の並び順をMemoManagerが保持する並び順の一覧に合わせる
+
+        Returns:
+            bool: 並び順が変わった場合True
+        """
+        field, reverse = self._sort_order
+        sorted_ids = self.memo_manager.sorted_memo_ids(field, reverse)
+        if len(sorted_ids) != len(self._row_order):
+            # 未挿入の行があるため、リストにある行だけを取り出す
+            inserted_ids = set(self._row_order)
+            sorted_ids = [memo_id for memo_id in sorted_ids if memo_id in inserted_ids]
+        if sorted_ids == self._row_order:
+            return False
+        self._row_order = sorted_ids
+        return True
+
+    def _apply_row_order(self):
+        """現在の並び順を表示中の行に反映する（detach中の行は非表示のまま）"""
+        visible_ids = self._visible_ids
+        self.tree.set_children('', *[memo_id for memo_id in self._row_order if memo_id in visible_ids])
 
     # フィルター機能
+    # ダイアログのモジュールは最初に開く時点で読み込む
     def show_tag_filter_dialog(self):
+        from dialogs import TagFilterDialog
         TagFilterDialog(self.root, self)
 
     def show_date_filter_dialog(self):
+        from dialogs import DateFilterDialog
         DateFilterDialog(self.root, self)
 
     def show_search_dialog(self):
         """検索ダイアログを表示"""
+        from dialogs import SearchDialog
         SearchDialog(self.root, self)
 
     def apply_date_filter(self, start_date: str, end_date: str):
@@ -459,17 +952,35 @@ class MemoApp:
         self.update_buttons_state()
 
     def update_buttons_state(self):
-        state = 'disabled' if self.is_tag_filtered or self.is_date_filtered else 'normal'
+        """
+        フィルター・読み取り専用の状態に合わせて、メモを変更する操作の有効・無効を切り替える
+
+        読み取り専用で開いたファイルは上書き保存できないため、メモの編集・追加・削除と
+        インポートを無効にする。フィルター中はメモの追加とタグの編集を無効にする。
+        """
+        read_only = self.memo_manager.read_only
+        self._set_edit_state('disabled' if read_only else 'normal')
+        for label in ("インポート", "複数のファイルをインポート"):
+            self.file_menu.entryconfig(label, state='disabled' if read_only else 'normal')
+        state = 'disabled' if read_only or self.is_tag_filtered or self.is_date_filtered else 'normal'
         self.add_button.configure(state=state)
         self.add_tag_button.configure(state=state)
         self.remove_tag_button.configure(state=state)
         self.tag_entry.configure(state=state)
 
+    def _set_edit_state(self, state):
+        """メモの削除ボタンとタイトル・日付・本文の入力欄の状態を設定する"""
+        for widget in (self.delete_button, self.title_entry, self.date_entry, self.text_area):
+            if widget is not None:
+                widget.configure(state=state)
+
     # エクスポート機能
     def show_export_dialog(self):
+        from dialogs import ExportDialog
         ExportDialog(self.root, self)
 
-    def export_memos(self, selected_only=False, filtered_only=False, filtered_ids=None):
+    def export_memos(self, selected_only=False, filtered_only=False, filtered_ids=None,
+                     export_format="text", compress=False):
         """
         メモをエクスポートする
         
@@ -477,337 +988,61 @@ class MemoApp:
             selected_only (bool): 選択中のメモのみエクスポートする場合True
             filtered_only (bool): フィルター中のメモのみエクスポートする場合True
             filtered_ids (list): フィルター中のメモIDのリスト
+            export_format (str): エクスポート形式の名前
+            compress (bool): gzipで圧縮する場合True
         """
-        try:
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=".txt",
-                filetypes=[("テキストファイル", "*.txt"), ("すべてのファイル", "*.*")]
-            )
-            if file_path:
-                if selected_only and self.current_memo_id:
-                    self.memo_manager.export_memos(file_path, [self.current_memo_id])
-                elif filtered_only and filtered_ids:
-                    self.memo_manager.export_memos(file_path, filtered_ids)
-                else:
-                    self.memo_manager.export_memos(file_path)
-                messagebox.showinfo("エクスポート完了", "メモをエクスポートしました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"エクスポート中にエラーが発生しました：{str(e)}")
+        from exporters import EXPORT_FORMATS, GZIP_SUFFIX
+
+        exporter = EXPORT_FORMATS[export_format]
+        extension = exporter.extension + (GZIP_SUFFIX if compress else "")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=extension,
+            filetypes=[(exporter.label, "*" + extension), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            if selected_only and self.current_memo_id:
+                memo_ids = [self.current_memo_id]
+            elif filtered_only and filtered_ids:
+                memo_ids = filtered_ids
+            else:
+                memo_ids = None
+            self._run_in_background(
+                "エクスポートしています...",
+                lambda report: self.memo_manager.export_memos(file_path, memo_ids, progress=report,
+                                                              export_format=export_format, compress=compress),
+                lambda _: messagebox.showinfo("エクスポート完了", "メモをエクスポートしました。"),
+                "エクスポート中にエラーが発生しました")
 
     def import_file(self):
         """XMLファイルから既存のメモリストにメモをインポートする"""
-        try:
-            file_path = filedialog.askopenfilename(
-                filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
-            )
-            if file_path:
-                # 一時的なMemoManagerを作成してファイルを読み込む
-                temp_manager = MemoManager()
-                temp_manager.load_from_file(file_path)
-                
-                # 既存のメモIDの最大値を取得
-                next_id = max([int(id) for id in self.memo_manager.memos.keys()], default=-1) + 1
-                
-                # 新しいメモを追加
-                for memo in temp_manager.memos.values():
-                    memo_id = str(next_id)
-                    self.memo_manager.memos[memo_id] = memo
-                    self.tree.insert('', 'end', memo_id, 
-                                   values=(memo.title, memo.date, ', '.join(sorted(memo.tags))))
-                    next_id += 1
-                
+        file_path = filedialog.askopenfilename(
+            filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
+        )
+        if file_path:
+            def on_imported(new_ids):
+                self._populate_rows(new_ids)
                 messagebox.showinfo("インポート完了", "メモをインポートしました。")
-        except Exception as e:
-            messagebox.showerror("エラー", f"インポート中にエラーが発生しました：{str(e)}")
-
-class ExportDialog:
-    def __init__(self, parent, app):
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("エクスポート設定")
-        self.dialog.geometry("300x200")  # サイズを調整
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-        
-        self.export_frame = ttk.LabelFrame(self.dialog, text="エクスポート範囲", padding=10)
-        self.export_frame.pack(fill='x', padx=10, pady=5)
-        
-        self.export_var = tk.StringVar(value="all")
-        ttk.Radiobutton(self.export_frame, text="すべてのメモ", 
-                       variable=self.export_var, value="all").pack(anchor='w')
-        ttk.Radiobutton(self.export_frame, text="選択中のメモのみ", 
-                       variable=self.export_var, value="selected").pack(anchor='w')
-        # フィルター中のメモのエクスポートオプションを追加
-        ttk.Radiobutton(self.export_frame, text="フィルター中のメモ", 
-                       variable=self.export_var, value="filtered",
-                       state='normal' if app.is_tag_filtered or app.is_date_filtered else 'disabled'
-                       ).pack(anchor='w')
-        
-        button_frame = ttk.Frame(self.dialog)
-        button_frame.pack(fill='x', padx=10, pady=10)
-        
-        ttk.Button(button_frame, text="キャンセル", 
-                  command=self.dialog.destroy).pack(side='right', padx=5)
-        ttk.Button(button_frame, text="エクスポート", 
-                  command=lambda: self.export(app)).pack(side='right')
-
-    def export(self, app):
-        export_type = self.export_var.get()
-        self.dialog.destroy()
-        
-        if export_type == "selected":
-            app.export_memos(selected_only=True)
-        elif export_type == "filtered":
-            # フィルター中のメモをエクスポート
-            filtered_ids = [item for item in app.tree.get_children()]
-            app.export_memos(filtered_only=True, filtered_ids=filtered_ids)
-        else:  # "all"
-            app.export_memos()
-
-class TagFilterDialog:
-    def __init__(self, parent, app):
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("タグでフィルター")
-        self.dialog.geometry("300x400")
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-
-        self.tag_frame = ttk.LabelFrame(self.dialog, text="フィルターするタグを選択", padding=10)
-        self.tag_frame.pack(fill='both', expand=True, padx=10, pady=5)
-
-        self.tag_listbox = tk.Listbox(self.tag_frame, selectmode=tk.MULTIPLE)
-        self.tag_listbox.pack(fill='both', expand=True)
-
-        for tag in app.memo_manager.get_all_tags():
-            self.tag_listbox.insert(tk.END, tag)
-
-        button_frame = ttk.Frame(self.dialog)
-        button_frame.pack(fill='x', padx=10, pady=10)
-
-        ttk.Button(button_frame, text="フィルター解除", 
-                  command=lambda: self.apply_filter(app, None)).pack(side='left', padx=5)
-        ttk.Button(button_frame, text="キャンセル", 
-                  command=self.dialog.destroy).pack(side='right', padx=5)
-        ttk.Button(button_frame, text="実行", 
-                  command=lambda: self.apply_filter(app)).pack(side='right')
-
-    def apply_filter(self, app, selected_tags=None):
-        if selected_tags is None and self.tag_listbox.curselection():
-            selected_tags = [self.tag_listbox.get(i) for i in self.tag_listbox.curselection()]
-        
-        app.apply_tag_filter(selected_tags)
-        self.dialog.destroy()
-
-class DateFilterDialog:
-    def __init__(self, parent, app):
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("日付でフィルター")
-        self.dialog.geometry("400x200")
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-
-        # 日付範囲の取得
-        start_date, end_date = app.memo_manager.get_date_range()
-
-        # 日付選択フレーム
-        self.date_frame = ttk.LabelFrame(self.dialog, text="日付範囲を選択", padding=10)
-        self.date_frame.pack(fill='x', padx=10, pady=5)
-
-        # 開始日
-        start_frame = ttk.Frame(self.date_frame)
-        start_frame.pack(fill='x', pady=5)
-        ttk.Label(start_frame, text="開始日：").pack(side='left')
-        self.start_date = DateEntry(start_frame, width=12, background='darkblue',
-                                  foreground='white', borderwidth=2, locale='ja_JP',
-                                  date_pattern='yyyy/mm/dd')
-        if start_date:
-            self.start_date.set_date(datetime.strptime(start_date, '%Y/%m/%d').date())
-        self.start_date.pack(side='left', padx=5)
-
-        # 終了日
-        end_frame = ttk.Frame(self.date_frame)
-        end_frame.pack(fill='x', pady=5)
-        ttk.Label(end_frame, text="終了日：").pack(side='left')
-        self.end_date = DateEntry(end_frame, width=12, background='darkblue',
-                                foreground='white', borderwidth=2, locale='ja_JP',
-                                date_pattern='yyyy/mm/dd')
-        if end_date:
-            self.end_date.set_date(datetime.strptime(end_date, '%Y/%m/%d').date())
-        self.end_date.pack(side='left', padx=5)
-
-        # ボタンフレーム
-        button_frame = ttk.Frame(self.dialog)
-        button_frame.pack(fill='x', padx=10, pady=10)
-
-        ttk.Button(button_frame, text="フィルター解除", 
-                  command=lambda: self.apply_filter(app, None, None)).pack(side='left', padx=5)
-        ttk.Button(button_frame, text="キャンセル", 
-                  command=self.dialog.destroy).pack(side='right', padx=5)
-        ttk.Button(button_frame, text="実行", 
-                  command=lambda: self.apply_filter(app, self.start_date.get_date().strftime('%Y/%m/%d'), 
-                                                  self.end_date.get_date().strftime('%Y/%m/%d'))).pack(side='right')
-
-    def apply_filter(self, app, start_date=None, end_date=None):
-        if start_date is None and end_date is None:
-            app.apply_date_filter("", "")
-        else:
-            app.apply_date_filter(start_date, end_date)
-        self.dialog.destroy()
-
-class SearchDialog:
-    def __init__(self, parent, app):
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("メモを検索")
-        self.dialog.geometry("400x180")
-        self.dialog.transient(parent)
-        
-        self.app = app
-        self.search_results = []
-        self.current_result_index = -1
-        
-        # 検索フレーム
-        search_frame = ttk.Frame(self.dialog, padding=10)
-        search_frame.pack(fill='x')
-        
-        ttk.Label(search_frame, text="検索内容：").pack(side='left')
-        self.search_var = tk.StringVar()
-        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
-        self.search_entry.pack(side='left', padx=5)
-        
-        # 検索結果表示ラベル
-        self.result_label = ttk.Label(self.dialog, text="")
-        self.result_label.pack(fill='x', padx=10)
-        
-        # ボタンフレーム
-        button_frame = ttk.Frame(self.dialog, padding=10)
-        button_frame.pack(fill='x')
-        
-        self.prev_button = ttk.Button(button_frame, text="前の項目", command=self.prev_result, state='disabled')
-        self.prev_button.pack(side='left', padx=5)
-        
-        self.next_button = ttk.Button(button_frame, text="次の項目", command=self.next_result, state='disabled')
-        self.next_button.pack(side='left', padx=5)
-        
-        ttk.Button(button_frame, text="実行", command=self.execute_search).pack(side='right', padx=5)
-        ttk.Button(button_frame, text="キャンセル", command=self.close_dialog).pack(side='right', padx=5)
-        
-        self.search_entry.focus_set()
-        self.dialog.bind('<Return>', lambda e: self.execute_search())
-        self.dialog.protocol("WM_DELETE_WINDOW", self.close_dialog)
-
-    def execute_search(self):
-        search_text = self.search_var.get()
-        if not search_text:
-            return
-            
-        # 大文字小文字を区別しない検索を実行
-        self.search_results = self.app.memo_manager.search_memos(search_text, case_sensitive=False)
-        self.current_result_index = -1
-        
-        if self.search_results:
-            self.next_result()
-            self.update_button_states()
-            self.result_label.config(text=f"{len(self.search_results)}件見つかりました。")
-        else:
-            self.result_label.config(text="見つかりませんでした。")
-
-    def close_dialog(self):
-        # ハイライトを解除
-        self.app.text_area.tag_remove('search', '1.0', tk.END)
-        self.dialog.destroy()
-
-    def next_result(self):
-        if not self.search_results:
-            return
-            
-        self.current_result_index = (self.current_result_index + 1) % len(self.search_results)
-        self.show_current_result()
-        self.update_button_states()
-
-    def prev_result(self):
-        if not self.search_results:
-            return
-            
-        self.current_result_index = (self.current_result_index - 1) % len(self.search_results)
-        self.show_current_result()
-        self.update_button_states()
-
-    def show_current_result(self):
-        if not (0 <= self.current_result_index < len(self.search_results)):
-            return
-
-        memo_id, start, end, is_title = self.search_results[self.current_result_index]
-        memo = self.app.memo_manager.memos[memo_id]
-        
-        # メモを選択してテキストエリアを更新
-        self.app.tree.selection_set(memo_id)
-        self.app.tree.see(memo_id)
-        self.app.on_tree_select(None)
-        
-        # テキストエリアの更新を待つ
-        self.dialog.after(10, lambda: self._highlight_text(start, end, is_title))
-
-    def _highlight_text(self, start, end, is_title):
-        try:
-            self.app.text_area.tag_remove('search', '1.0', tk.END)
-            self.app.text_area.tag_config('search', background='yellow')
-
-            # タイトルとコンテンツの位置を計算
-            if is_title:
-                start_pos = f"1.{start}"
-                end_pos = f"1.{end}"
-            else:
-                # コンテンツ内の位置を計算（タイトル行を考慮）
-                content = self.app.text_area.get('1.0', tk.END)
-                lines = content[:start].count('\n') + 1
-                start_col = start - content[:start].rindex('\n') - 1 if '\n' in content[:start] else start
-                end_col = end - content[:end].rindex('\n') - 1 if '\n' in content[:end] else end
-                start_pos = f"{lines}.{start_col}"
-                end_pos = f"{lines}.{end_col}"
-
-            # ハイライトを適用
-            self.app.text_area.tag_add('search', start_pos, end_pos)
-            self.app.text_area.see(start_pos)
-            self.app.text_area.focus_set()
-            self.app.text_area.mark_set(tk.INSERT, start_pos)
-        except Exception as e:
-            messagebox.showerror("エラー", f"検索結果のハイライト中にエラーが発生しました：{str(e)}")
-
-    def update_button_states(self):
-        state = 'normal' if self.search_results else 'disabled'
-        self.prev_button.configure(state=state)
-        self.next_button.configure(state=state)
-
-class TagSelectionDialog:
-    def __init__(self, parent, app, title, callback):
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title(title)
-        self.dialog.geometry("300x400")
-        self.dialog.transient(parent)
-        self.dialog.grab_set()
-
-        self.tag_frame = ttk.LabelFrame(self.dialog, text="タグを選択", padding=10)
-        self.tag_frame.pack(fill='both', expand=True, padx=10, pady=5)
-
-        self.tag_listbox = tk.Listbox(self.tag_frame, selectmode=tk.MULTIPLE)
-        self.tag_listbox.pack(fill='both', expand=True)
-
-        if title == "削除するタグを選択":
-            tags = sorted(app.memo_manager.memos[app.current_memo_id].tags)
-        else:
-            tags = app.memo_manager.get_all_tags()
-
-        for tag in tags:
-            self.tag_listbox.insert(tk.END, tag)
-
-        button_frame = ttk.Frame(self.dialog)
-        button_frame.pack(fill='x', padx=10, pady=10)
-
-        ttk.Button(button_frame, text="キャンセル", 
-                  command=self.dialog.destroy).pack(side='right', padx=5)
-        ttk.Button(button_frame, text="実行", 
-                  command=lambda: self.apply_selection(callback)).pack(side='right')
 
-    def apply_selection(self, callback):
-        selected_tags = [self.tag_listbox.get(i) for i in self.tag_listbox.curselection()]
-        self.dialog.destroy()
-        callback(selected_tags)
+            # 読み込んだメモを一括で追加（IDはMemoManagerが割り当てる）
+            self._run_in_background(
+                "インポートしています...",
+                lambda report: self.memo_manager.merge_from_file(
+                    file_path, self._file_progress(file_path, report)),
+                on_imported,
+                "インポート中にエラーが発生しました")
+
+    def import_files(self):
+        """複数のXMLファイルを並列に解析し、既存のメモリストにメモをインポートする"""
+        file_paths = filedialog.askopenfilenames(
+            filetypes=[("XMLファイル", "*.xml"), ("すべてのファイル", "*.*")]
+        )
+        if file_paths:
+            def on_imported(new_ids):
+                self._populate_rows(new_ids)
+                messagebox.showinfo("インポート完了", f"{len(file_paths)}個のファイルからメモをインポートしました。")
+
+            self._run_in_background(
+                "インポートしています...",
+                lambda report: self.memo_manager.merge_from_files(list(file_paths), progress=report),
+                on_imported,
+                "インポート中にエラーが発生しました")